@@ -5,6 +5,7 @@ Django Admin 配置
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import User
+from django.utils import timezone
 from django.utils.html import format_html
 from django.db.models import Count
 from .models import (
@@ -14,7 +15,10 @@ from .models import (
     LunarCalendar, 
     DailyFortune, 
     UserFortune, 
-    DataSyncLog
+    DataSyncLog,
+    HolidaySourceState,
+    ReminderPreference,
+    CalendarFeedToken
 )
 
 
@@ -152,6 +156,7 @@ class DataSyncLogAdmin(admin.ModelAdmin):
         'status',
         'records_count',
         'error_message',
+        'details',
         'started_at',
         'completed_at',
         'created_at'
@@ -171,6 +176,7 @@ class DataSyncLogAdmin(admin.ModelAdmin):
             'holiday': '#3498db',
             'lunar': '#f39c12',
             'fortune': '#9b59b6',
+            'fortune_notify': '#8e44ad',
         }
         color = colors.get(obj.data_type, '#95a5a6')
         return format_html(
@@ -249,18 +255,22 @@ class EventAdmin(admin.ModelAdmin):
     
     date_hierarchy = 'start_time'
     
-    readonly_fields = ['created_at', 'related_trip_slug', 'source_app', 'source_id']
+    readonly_fields = ['created_at', 'related_trip_slug', 'source_app', 'source_id', 'remind_at', 'recurrence_end']
     
     fieldsets = (
         ('基本信息', {
             'fields': ('user', 'title', 'description', 'start_time', 'end_time')
         }),
+        ('重复规则', {
+            'fields': ('recurrence_rule', 'recurrence_end'),
+            'classes': ('collapse',)
+        }),
         ('位置信息', {
             'fields': ('has_location', 'location', 'latitude', 'longitude', 'map_url'),
             'classes': ('collapse',)
         }),
         ('提醒设置', {
-            'fields': ('email_reminder', 'reminder_minutes', 'notification_sent')
+            'fields': ('email_reminder', 'reminder_minutes', 'notification_sent', 'remind_at')
         }),
         ('来源信息', {
             'fields': ('source_app', 'source_id', 'related_trip_slug'),
@@ -272,6 +282,8 @@ class EventAdmin(admin.ModelAdmin):
         }),
     )
     
+    list_select_related = ['user']
+    
     actions = ['enable_email_reminder', 'disable_email_reminder', 'reset_notification']
     
     def user_link(self, obj):
@@ -286,7 +298,6 @@ class EventAdmin(admin.ModelAdmin):
     
     def start_time_display(self, obj):
         """格式化开始时间"""
-        from django.utils import timezone
         local_time = timezone.localtime(obj.start_time)
         return local_time.strftime('%Y-%m-%d %H:%M')
     start_time_display.short_description = '开始时间'
@@ -320,19 +331,22 @@ class EventAdmin(admin.ModelAdmin):
     
     def enable_email_reminder(self, request, queryset):
         """批量启用邮件提醒"""
-        updated = queryset.update(email_reminder=True)
+        from .utils.reminder_scheduler import reschedule_reminders
+        updated = queryset.update(email_reminder=True, updated_at=timezone.now())
+        # update() 不经过 save()，需要重新计算提醒时间
+        reschedule_reminders(queryset)
         self.message_user(request, f'成功为 {updated} 个事件启用邮件提醒')
     enable_email_reminder.short_description = '启用邮件提醒'
     
     def disable_email_reminder(self, request, queryset):
         """批量禁用邮件提醒"""
-        updated = queryset.update(email_reminder=False)
+        updated = queryset.update(email_reminder=False, remind_at=None, updated_at=timezone.now())
         self.message_user(request, f'成功为 {updated} 个事件禁用邮件提醒')
     disable_email_reminder.short_description = '禁用邮件提醒'
     
     def reset_notification(self, request, queryset):
         """重置通知状态"""
-        updated = queryset.update(notification_sent=False)
+        updated = queryset.update(notification_sent=False, updated_at=timezone.now())
         self.message_user(request, f'成功重置 {updated} 个事件的通知状态')
     reset_notification.short_description = '重置通知状态'
 
@@ -416,20 +430,24 @@ class CustomUserAdmin(BaseUserAdmin):
         'date_joined_display'
     ]
     
+    def get_queryset(self, request):
+        """事件数用一次聚合查询统计，不再逐行 COUNT"""
+        return super().get_queryset(request).annotate(events_total=Count('events'))
+    
     def event_count(self, obj):
         """事件数量"""
-        try:
+        count = getattr(obj, 'events_total', None)
+        if count is None:
             count = obj.events.count()
-            if count > 0:
-                return format_html(
-                    '<a href="/admin/api/event/?user__id__exact={}">{} 个</a>',
-                    obj.id,
-                    count
-                )
-            return '0'
-        except Exception as e:
-            return '—'
+        if count > 0:
+            return format_html(
+                '<a href="/admin/api/event/?user__id__exact={}">{} 个</a>',
+                obj.id,
+                count
+            )
+        return '0'
     event_count.short_description = '事件数'
+    event_count.admin_order_field = 'events_total'
     
     def date_joined_display(self, obj):
         """注册时间"""
@@ -446,6 +464,14 @@ admin.site.register(User, CustomUserAdmin)
 # ============================================================
 # 其他模型（黄历、运势等）
 # ============================================================
+@admin.register(HolidaySourceState)
+class HolidaySourceStateAdmin(admin.ModelAdmin):
+    """节假日同步状态（清空哈希可强制下次同步重新导入）"""
+    list_display = ['year', 'etag', 'last_modified', 'content_hash', 'checked_at', 'changed_at']
+    ordering = ['-year']
+    readonly_fields = ['checked_at', 'changed_at']
+
+
 @admin.register(LunarCalendar)
 class LunarCalendarAdmin(admin.ModelAdmin):
     """农历管理"""
@@ -458,8 +484,8 @@ class LunarCalendarAdmin(admin.ModelAdmin):
 @admin.register(DailyFortune)
 class DailyFortuneAdmin(admin.ModelAdmin):
     """每日运势管理"""
-    list_display = ['date', 'lucky_color', 'lucky_number']
-    list_filter = [('date', admin.DateFieldListFilter)]
+    list_display = ['date', 'fortune_type', 'zodiac', 'constellation', 'overall_score', 'lucky_color', 'lucky_number']
+    list_filter = ['fortune_type', ('date', admin.DateFieldListFilter)]
     ordering = ['-date']
 
 
@@ -470,6 +496,23 @@ class UserFortuneAdmin(admin.ModelAdmin):
     search_fields = ['user__username', 'zodiac', 'constellation']
 
 
+@admin.register(ReminderPreference)
+class ReminderPreferenceAdmin(admin.ModelAdmin):
+    """提醒偏好（汇总模式）"""
+    list_display = ['user', 'digest_mode', 'updated_at']
+    list_filter = ['digest_mode']
+    search_fields = ['user__username', 'user__email']
+    list_select_related = ['user']
+
+
+@admin.register(CalendarFeedToken)
+class CalendarFeedTokenAdmin(admin.ModelAdmin):
+    """个人日历订阅令牌（版本号加一即吊销旧地址）"""
+    list_display = ['user', 'version', 'updated_at']
+    search_fields = ['user__username', 'user__email']
+    list_select_related = ['user']
+
+
 # ============================================================
 # 自定义 Admin 站点标题
 # ============================================================
@@ -0,0 +1,170 @@
+"""
+性能测试：上游服务变慢时同步接口与异步接口的并发能力
+在本地起一个固定延迟的高德天气模拟服务，同时发出一批天气查询（每个城市都不命中缓存）：
+- 同步 /weather/：固定数量的工作线程（相当于 uwsgi 的进程 × 线程），每个请求占住一个线程等待上游
+- 异步 /async/weather/：一个事件循环，等待上游时不占用线程，并发只受连接池上限限制
+
+使用方法:
+    python manage.py bench_async_upstream
+    python manage.py bench_async_upstream --requests 400 --workers 16 --delay 1
+"""
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import AsyncRequestFactory, RequestFactory, override_settings
+from api.utils import async_http, weather_client
+from api.views.external.weather import get_weather, get_weather_async
+
+
+class SlowUpstream(ThreadingHTTPServer):
+    """固定延迟的高德实时天气模拟服务（记录同时处理中的请求数峰值）"""
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+        super().__init__(('127.0.0.1', 0), SlowUpstreamHandler)
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}/v3/weather/weatherInfo'
+
+    def reset_peak(self):
+        with self.lock:
+            self.peak = 0
+
+
+class SlowUpstreamHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # 支持 keep-alive，连接池可以复用连接
+    disable_nagle_algorithm = True  # 响应头和响应体分两次写出，避免 keep-alive 连接上的 40ms 延迟确认
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.active += 1
+            server.peak = max(server.peak, server.active)
+        try:
+            time.sleep(server.delay)
+            city = parse_qs(urlparse(self.path).query).get('city', [''])[0]
+            body = json.dumps({
+                'status': '1',
+                'info': 'OK',
+                'lives': [{
+                    'city': city, 'adcode': '', 'weather': '晴', 'temperature': '20',
+                    'winddirection': '东', 'windpower': '≤3', 'humidity': '50',
+                    'reporttime': '2025-01-01 12:00:00',
+                }],
+            }, ensure_ascii=False).encode('utf-8')
+        finally:
+            with server.lock:
+                server.active -= 1
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = '对比上游变慢时同步天气接口（线程池）与异步天气接口（事件循环）的吞吐量'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=200,
+            help='每种方式同时发出的请求数'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=8,
+            help='同步接口的工作线程数（相当于 uwsgi 的进程 × 线程）'
+        )
+        parser.add_argument(
+            '--delay',
+            type=float,
+            default=0.5,
+            help='模拟上游每个请求的延迟（秒）'
+        )
+
+    def handle(self, *args, **options):
+        total = options['requests']
+        workers = options['workers']
+        delay = options['delay']
+
+        upstream = SlowUpstream(delay)
+        threading.Thread(target=upstream.serve_forever, daemon=True).start()
+        cities = []
+
+        def batch(name, factory=RequestFactory()):
+            # 每个请求一个不同的城市，保证都不命中缓存、都要请求上游
+            names = [f'bench-{name}-{i}' for i in range(total)]
+            cities.extend(names)
+            return [factory.get('/weather/', {'location': city}) for city in names]
+
+        def async_batch(name):
+            # ASGI 请求：所有请求共用事件循环上的连接池（与 uvicorn 部署时相同）
+            return batch(name, AsyncRequestFactory())
+
+        def run_sync(requests):
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                return [response.status_code for response in executor.map(get_weather, requests)]
+
+        async def run_async(requests):
+            responses = await asyncio.gather(*(get_weather_async(request) for request in requests))
+            await async_http.get_client().aclose()
+            return [response.status_code for response in responses]
+
+        original_url = weather_client.AMAP_WEATHER_URL
+        weather_client.AMAP_WEATHER_URL = upstream.url
+        try:
+            with override_settings(AMAP_API_KEY=settings.AMAP_API_KEY or 'bench', WEATHER_TIMEOUT=60):
+                # 预热（建立连接、加载模块）
+                run_sync(batch('warmup-sync')[:workers])
+                asyncio.run(run_async(async_batch('warmup-async')[:workers]))
+
+                results = []
+                for name, make_batch, runner in (
+                    (f'同步 {workers} 线程', batch, run_sync),
+                    ('异步 事件循环', async_batch, lambda requests: asyncio.run(run_async(requests))),
+                ):
+                    requests = make_batch(name)
+                    upstream.reset_peak()
+                    start = time.perf_counter()
+                    codes = runner(requests)
+                    seconds = time.perf_counter() - start
+                    failed = sum(1 for code in codes if code != 200)
+                    results.append((name, seconds, upstream.peak, failed))
+        finally:
+            weather_client.AMAP_WEATHER_URL = original_url
+            upstream.shutdown()
+            upstream.server_close()
+            cache.delete_many([weather_client._cache_key(city) for city in cities])
+
+        self.stdout.write(f"\n{'='*60}")
+        self.stdout.write(f"📊 {total} 个天气请求，上游延迟 {delay * 1000:.0f}ms")
+        self.stdout.write(f"{'='*60}")
+        for name, seconds, peak, failed in results:
+            self.stdout.write(
+                f"  {name:<16} 耗时 {seconds:7.2f}s  {total / seconds:8.1f} 请求/秒  "
+                f"上游并发峰值 {peak:4d}  失败 {failed}"
+            )
+
+        sync_seconds, async_seconds = results[0][1], results[1][1]
+        speedup = sync_seconds / async_seconds if async_seconds else 0
+        self.stdout.write(self.style.SUCCESS(f'\n✅ 异步接口吞吐量是同步接口的 {speedup:.1f}x\n'))
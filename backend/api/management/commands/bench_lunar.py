@@ -0,0 +1,106 @@
+"""
+性能测试：农历转换
+对比逐日请求 /lunar/ 与一次请求 /lunar/range/ 取整年数据的吞吐量（天/秒）
+
+使用方法:
+    python manage.py bench_lunar
+    python manage.py bench_lunar --year 2026 --iterations 5
+"""
+import time
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand
+from lunarcalendar import Converter, Solar
+from rest_framework.test import APIRequestFactory
+from api.utils import lunar_table
+from api.views.external.lunar import get_lunar_date, get_lunar_range
+
+
+def legacy_convert(target_date):
+    """旧实现：每次请求重新建对照表并完整换算一次（仅用于对比）"""
+    solar = Solar(target_date.year, target_date.month, target_date.day)
+    lunar = Converter.Solar2Lunar(solar)
+
+    zodiac_list = ['鼠', '牛', '虎', '兔', '龙', '蛇', '马', '羊', '猴', '鸡', '狗', '猪']
+    zodiac = zodiac_list[(lunar.year - 4) % 12]
+
+    month_cn = ['正', '二', '三', '四', '五', '六', '七', '八', '九', '十', '十一', '十二']
+    lunar_month = f"{month_cn[lunar.month - 1]}月"
+
+    day_cn = ['初一', '初二', '初三', '初四', '初五', '初六', '初七', '初八', '初九', '初十',
+              '十一', '十二', '十三', '十四', '十五', '十六', '十七', '十八', '十九', '二十',
+              '廿一', '廿二', '廿三', '廿四', '廿五', '廿六', '廿七', '廿八', '廿九', '三十']
+    lunar_day = day_cn[lunar.day - 1]
+
+    return {
+        'lunar_date': f"农历{lunar.year}年{lunar_month}{lunar_day}",
+        'zodiac': zodiac,
+    }
+
+
+class Command(BaseCommand):
+    help = '对比逐日农历转换与整年批量查询的吞吐量'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--year',
+            type=int,
+            default=date.today().year,
+            help='测试的年份（预生成农历表后测的是读表路径）'
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=3,
+            help='每种方式重复的轮数'
+        )
+
+    def handle(self, *args, **options):
+        year = options['year']
+        iterations = options['iterations']
+
+        start = date(year, 1, 1)
+        days = [start + timedelta(days=i) for i in range((date(year + 1, 1, 1) - start).days)]
+        factory = APIRequestFactory()
+
+        def single_requests():
+            for day in days:
+                get_lunar_date(factory.get('/lunar/', {'date': day.isoformat()}))
+
+        def bulk_request():
+            get_lunar_range(factory.get('/lunar/range/', {'year': year}))
+
+        def live_uncached():
+            lunar_table.compute_day.cache_clear()
+            for day in days:
+                lunar_table.compute_day(day)
+
+        # 预热（读入整年数组、计算节气）
+        bulk_request()
+
+        results = [
+            ('旧实现 逐日换算', self._bench(lambda: [legacy_convert(d) for d in days], iterations)),
+            ('现场换算 无缓存', self._bench(live_uncached, iterations)),
+            ('服务 逐日查询', self._bench(lambda: [lunar_table.get_day(d) for d in days], iterations)),
+            ('服务 整年批量', self._bench(lambda: lunar_table.get_days(days[0], days[-1]), iterations)),
+            ('/lunar/ 逐日请求', self._bench(single_requests, iterations)),
+            ('/lunar/range/ 整年一次', self._bench(bulk_request, iterations)),
+        ]
+
+        self.stdout.write(f"\n{'='*60}")
+        self.stdout.write(f"📊 农历转换 {year} 年 {len(days)} 天（{iterations} 轮）")
+        self.stdout.write(f"{'='*60}")
+        for name, seconds in results:
+            per_round = seconds / iterations
+            throughput = len(days) / per_round if per_round else 0
+            self.stdout.write(f"  {name:<20} 每轮 {per_round * 1000:8.2f}ms  {throughput:12,.0f} 天/秒")
+
+        single, bulk = results[-2][1], results[-1][1]
+        speedup = single / bulk if bulk else 0
+        self.stdout.write(self.style.SUCCESS(f'\n✅ 整年批量接口比逐日请求快 {speedup:.1f}x\n'))
+
+    @staticmethod
+    def _bench(func, iterations):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        return time.perf_counter() - start
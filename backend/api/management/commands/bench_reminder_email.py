@@ -0,0 +1,180 @@
+"""
+性能测试：提醒邮件渲染
+对比旧的逐封 f-string 拼接与预编译模板的渲染耗时
+
+使用方法:
+    python manage.py bench_reminder_email
+    python manage.py bench_reminder_email --iterations 5000 --digest-size 12
+"""
+import time
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from api.models import Event
+from api.utils.email_templates import render_reminder, render_digest
+
+
+def legacy_render(event):
+    """旧实现：每次发送都用 f-string 拼出完整 HTML 和纯文本（仅用于对比）"""
+    # 构建邮件内容
+    subject = f"📅 日程提醒：{event.title}"
+    
+    # 格式化时间
+    start_time = timezone.localtime(event.start_time).strftime('%Y年%m月%d日 %H:%M')
+    
+    # 构建位置信息
+    location_info = ""
+    if event.has_location:
+        location_info = f"\n📍 地点：{event.location or '已设置地理位置'}"
+        if event.map_url:
+            location_info += f"\n🗺️ 导航：{event.map_url}"
+    
+    # 构建消息内容（纯文本版本）
+    message = f"""
+您好 {event.user.username}，
+
+您有一个即将开始的日程：
+
+📋 标题：{event.title}
+⏰ 时间：{start_time}{location_info}
+
+{f'📝 备注：{event.description}' if event.description else ''}
+
+{'🔔 这是来自 Ralendar 旅行计划的提醒' if event.is_from_roamio else ''}
+
+---
+Ralendar 日历系统
+https://app7626.acapp.acwing.com.cn
+    """
+    
+    # HTML 版本（更美观）
+    html_message = f"""
+<!DOCTYPE html>
+<html>
+<head>
+<meta charset="UTF-8">
+<style>
+    body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
+    .container {{ max-width: 600px; margin: 0 auto; padding: 20px; background: white; }}
+    .header {{ background: linear-gradient(135deg, #667eea, #764ba2); color: white; padding: 30px 20px; border-radius: 12px; text-align: center; }}
+    .header-content {{ display: flex; align-items: center; justify-content: center; gap: 15px; }}
+    .header-logo {{ width: 50px; height: 50px; border-radius: 10px; background: white; padding: 5px; box-shadow: 0 2px 8px rgba(0,0,0,0.2); }}
+    .header h2 {{ margin: 0; font-size: 26px; font-weight: 600; }}
+    .content {{ background: #f9f9f9; padding: 20px; border-radius: 0 0 8px 8px; }}
+    .event-card {{ background: white; padding: 20px; border-radius: 8px; margin: 20px 0; box-shadow: 0 2px 8px rgba(0,0,0,0.1); }}
+    .event-title {{ font-size: 20px; font-weight: bold; color: #667eea; margin-bottom: 10px; }}
+    .event-info {{ margin: 10px 0; }}
+    .event-info strong {{ color: #667eea; }}
+    .footer {{ text-align: center; color: #999; font-size: 12px; margin-top: 20px; }}
+    .button {{ display: inline-block; background: #667eea; color: white; padding: 10px 20px; text-decoration: none; border-radius: 5px; margin-top: 15px; }}
+</style>
+</head>
+<body>
+<div class="container">
+    <div class="header">
+        <div class="header-content">
+            <img src="https://app7626.acapp.acwing.com.cn/logo.png" alt="Ralendar" class="header-logo">
+            <h2>日程提醒</h2>
+        </div>
+    </div>
+    <div class="content">
+        <p>您好 <strong>{event.user.username}</strong>，</p>
+        <p>您有一个即将开始的日程：</p>
+        
+        <div class="event-card">
+            <div class="event-title">📋 {event.title}</div>
+            <div class="event-info"><strong>⏰ 时间：</strong>{start_time}</div>
+            {f'<div class="event-info"><strong>📍 地点：</strong>{event.location or "已设置地理位置"}</div>' if event.has_location else ''}
+            {f'<div class="event-info"><strong>📝 备注：</strong>{event.description}</div>' if event.description else ''}
+            {f'<div class="event-info" style="color: #ff6b6b;">🔔 <strong>来自 Roamio 旅行计划</strong></div>' if event.is_from_roamio else ''}
+            
+            {f'<a href="{event.map_url}" class="button">🗺️ 查看地图导航</a>' if event.map_url else ''}
+        </div>
+        
+        <p>祝您生活愉快！</p>
+    </div>
+    <div class="footer">
+        <p><strong>Ralendar 智能日历系统</strong></p>
+        <p><a href="https://app7626.acapp.acwing.com.cn" style="color: #667eea;">https://app7626.acapp.acwing.com.cn</a></p>
+    </div>
+</div>
+</body>
+</html>
+    """
+    return subject, message, html_message
+
+
+def make_events(count):
+    """构造内存中的事件（不写数据库）"""
+    user = User(id=1, username='bench', email='bench@example.com')
+    start = timezone.now() + timedelta(hours=1)
+    events = []
+    for i in range(count):
+        event = Event(
+            id=i + 1,
+            user=user,
+            title=f'测试日程 {i}',
+            description='带上护照和充电宝',
+            start_time=start + timedelta(minutes=10 * i),
+            location='昆明长水国际机场',
+            latitude=25.1019,
+            longitude=102.9292,
+            source_app='roamio' if i % 2 else 'ralendar',
+        )
+        events.append(event)
+    return user, events
+
+
+class Command(BaseCommand):
+    help = '对比提醒邮件的 f-string 拼接与预编译模板渲染耗时'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=2000,
+            help='每种方式渲染的次数'
+        )
+        parser.add_argument(
+            '--digest-size',
+            type=int,
+            default=12,
+            help='汇总邮件中的事件数'
+        )
+    
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        digest_size = options['digest_size']
+        user, events = make_events(digest_size)
+        event = events[0]
+        
+        # 预热（模板编译只发生一次）
+        legacy_render(event)
+        render_reminder(event)
+        
+        results = [
+            ('f-string 单封', self._bench(lambda: legacy_render(event), iterations)),
+            ('预编译模板 单封', self._bench(lambda: render_reminder(event), iterations)),
+            (f'f-string 逐封 x{digest_size}',
+             self._bench(lambda: [legacy_render(e) for e in events], iterations)),
+            (f'预编译模板 汇总 x{digest_size}',
+             self._bench(lambda: render_digest(user, events), iterations)),
+        ]
+        
+        self.stdout.write(f"\n{'='*60}")
+        self.stdout.write(f"📊 提醒邮件渲染（{iterations} 次）")
+        self.stdout.write(f"{'='*60}")
+        for name, seconds in results:
+            per_call = seconds / iterations * 1_000_000
+            self.stdout.write(f"  {name:<24} 总计 {seconds:.3f}s  单次 {per_call:.1f}µs")
+        
+        speedup = results[0][1] / results[1][1] if results[1][1] else 0
+        self.stdout.write(self.style.SUCCESS(f'\n✅ 单封渲染加速 {speedup:.2f}x\n'))
+    
+    @staticmethod
+    def _bench(func, iterations):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        return time.perf_counter() - start
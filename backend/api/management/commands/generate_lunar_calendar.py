@@ -0,0 +1,64 @@
+"""
+Django 管理命令：生成农历数据表
+
+使用方法:
+    # 生成默认范围（去年到未来 LUNAR_CALENDAR_YEARS_AHEAD 年）
+    python manage.py generate_lunar_calendar
+    
+    # 生成指定年份
+    python manage.py generate_lunar_calendar --year 2026
+    
+    # 生成多个年份
+    python manage.py generate_lunar_calendar --start-year 2020 --end-year 2030
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from api.utils.lunar_table import generate_years
+
+
+class Command(BaseCommand):
+    help = '批量生成农历日期、干支、生肖、节气并写入农历数据表'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--year',
+            type=int,
+            help='指定要生成的年份'
+        )
+        parser.add_argument(
+            '--start-year',
+            type=int,
+            help='起始年份（与 --end-year 一起使用）'
+        )
+        parser.add_argument(
+            '--end-year',
+            type=int,
+            help='结束年份（与 --start-year 一起使用）'
+        )
+    
+    def handle(self, *args, **options):
+        year = options.get('year')
+        start_year = options.get('start_year')
+        end_year = options.get('end_year')
+        
+        if year:
+            start_year = end_year = year
+        elif not (start_year and end_year):
+            current_year = timezone.now().year
+            start_year = current_year - settings.LUNAR_CALENDAR_YEARS_BEHIND
+            end_year = current_year + settings.LUNAR_CALENDAR_YEARS_AHEAD
+        
+        if start_year > end_year:
+            self.stdout.write(self.style.ERROR('❌ 起始年份不能大于结束年份！'))
+            return
+        
+        self.stdout.write(f"\n{'='*60}")
+        self.stdout.write(f"🎯 生成农历数据: {start_year} - {end_year}")
+        self.stdout.write(f"{'='*60}\n")
+        
+        result = generate_years(start_year, end_year)
+        self.stdout.write(self.style.SUCCESS(
+            f"\n✅ 完成：新增 {result['inserted']} 条，更新 {result['updated']} 条，"
+            f"未变化 {result['unchanged']} 条\n"
+        ))
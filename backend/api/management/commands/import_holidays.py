@@ -13,6 +13,9 @@ Django 管理命令：导入节假日数据
     
     # 强制替换已存在的数据
     python manage.py import_holidays --replace
+    
+    # 忽略上次的校验值和内容哈希，重新下载并导入
+    python manage.py import_holidays --force
 """
 from django.core.management.base import BaseCommand
 from django.utils import timezone
@@ -43,12 +46,18 @@ class Command(BaseCommand):
             action='store_true',
             help='替换已存在的数据（默认跳过已存在的记录）'
         )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='忽略上次同步的校验值和内容哈希，重新下载并导入'
+        )
     
     def handle(self, *args, **options):
         year = options.get('year')
         start_year = options.get('start_year')
         end_year = options.get('end_year')
         replace = options.get('replace', False)
+        force = options.get('force', False)
         
         service = HolidaySyncService()
         
@@ -58,7 +67,7 @@ class Command(BaseCommand):
             self.stdout.write(f"🎯 导入 {year} 年节假日数据")
             self.stdout.write(f"{'='*60}\n")
             
-            success = service.sync_year_holidays(year, replace=replace)
+            success = service.sync_year_holidays(year, replace=replace, force=force)
             
             if success:
                 self.stdout.write(self.style.SUCCESS(f'\n✅ {year} 年数据导入成功！'))
@@ -71,7 +80,7 @@ class Command(BaseCommand):
                 self.stdout.write(self.style.ERROR('❌ 起始年份不能大于结束年份！'))
                 return
             
-            service.sync_multiple_years(start_year, end_year, replace=replace)
+            service.sync_multiple_years(start_year, end_year, replace=replace, force=force)
             self.stdout.write(self.style.SUCCESS(f'\n✅ 批量导入完成！'))
         
         # 情况3: 默认导入（去年、今年、未来2年）
@@ -81,7 +90,7 @@ class Command(BaseCommand):
             self.stdout.write(f"🎯 导入默认年份范围: {current_year - 1} - {current_year + 2}")
             self.stdout.write(f"{'='*60}\n")
             
-            service.sync_multiple_years(current_year - 1, current_year + 2, replace=replace)
+            service.sync_multiple_years(current_year - 1, current_year + 2, replace=replace, force=force)
             self.stdout.write(self.style.SUCCESS(f'\n✅ 默认范围导入完成！'))
         
         self.stdout.write('\n')
@@ -5,6 +5,7 @@
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User
 from api.models import PublicCalendar, Event, Holiday
+from api.utils.festivals import traditional_festivals
 from django.utils import timezone
 from datetime import datetime, timedelta
 
@@ -69,11 +70,12 @@ class Command(BaseCommand):
             self.stdout.write(self.style.WARNING('  ⚠️  "中国法定节假日"日历已存在'))
         
         # 3. 创建"农历节气"日历
+        this_year = timezone.localtime().year
         lunar_calendar, created = PublicCalendar.objects.get_or_create(
             url_slug='lunar-festivals',
             defaults={
                 'name': '农历传统节日',
-                'description': '2025年农历传统节日',
+                'description': f'{this_year}年农历传统节日',
                 'created_by': admin_user,
                 'is_public': True
             }
@@ -82,16 +84,10 @@ class Command(BaseCommand):
         if created:
             self.stdout.write(self.style.SUCCESS('  ✅ 创建"农历传统节日"日历'))
             
-            # 农历节日（2025年对应公历日期）
+            # 农历节日（按农历换算出今年的公历日期）
             lunar_festivals = [
-                ('除夕', '2025-01-28', '🏮'),
-                ('春节', '2025-01-29', '🧨'),
-                ('元宵节', '2025-02-12', '🏮'),
-                ('端午节', '2025-05-31', '🐉'),
-                ('七夕节', '2025-08-29', '💕'),
-                ('中秋节', '2025-10-06', '🥮'),
-                ('重阳节', '2025-10-29', '🍵'),
-                ('腊八节', '2026-01-07', '🍜'),
+                (festival['name'], f'{this_year}-{month_day}', festival['emoji'])
+                for month_day, festival in traditional_festivals(this_year).items()
             ]
             
             for name, date_str, emoji in lunar_festivals:
@@ -128,20 +124,21 @@ class Command(BaseCommand):
         if created:
             self.stdout.write(self.style.SUCCESS('  ✅ 创建"国际纪念日"日历'))
             
+            # 固定日期的纪念日每年重复，只需保存一条带 RRULE 的主记录
             international_days = [
-                ('情人节', '2025-02-14', '💕'),
-                ('妇女节', '2025-03-08', '👩'),
-                ('愚人节', '2025-04-01', '🤡'),
-                ('地球日', '2025-04-22', '🌍'),
-                ('儿童节', '2025-06-01', '🧒'),
-                ('教师节', '2025-09-10', '📚'),
-                ('万圣节', '2025-10-31', '🎃'),
-                ('感恩节', '2025-11-27', '🦃'),
-                ('平安夜', '2025-12-24', '🎄'),
-                ('圣诞节', '2025-12-25', '🎅'),
+                ('情人节', '2025-02-14', '💕', 'FREQ=YEARLY'),
+                ('妇女节', '2025-03-08', '👩', 'FREQ=YEARLY'),
+                ('愚人节', '2025-04-01', '🤡', 'FREQ=YEARLY'),
+                ('地球日', '2025-04-22', '🌍', 'FREQ=YEARLY'),
+                ('儿童节', '2025-06-01', '🧒', 'FREQ=YEARLY'),
+                ('教师节', '2025-09-10', '📚', 'FREQ=YEARLY'),
+                ('万圣节', '2025-10-31', '🎃', 'FREQ=YEARLY'),
+                ('感恩节', '2025-11-27', '🦃', 'FREQ=YEARLY;BYMONTH=11;BYDAY=+4TH'),  # 11月第四个星期四
+                ('平安夜', '2025-12-24', '🎄', 'FREQ=YEARLY'),
+                ('圣诞节', '2025-12-25', '🎅', 'FREQ=YEARLY'),
             ]
             
-            for name, date_str, emoji in international_days:
+            for name, date_str, emoji, rule in international_days:
                 start_time = timezone.make_aware(datetime.strptime(f"{date_str} 00:00", '%Y-%m-%d %H:%M'))
                 end_time = timezone.make_aware(datetime.strptime(f"{date_str} 23:59", '%Y-%m-%d %H:%M'))
                 
@@ -153,9 +150,10 @@ class Command(BaseCommand):
                     end_time=end_time,
                     location='',
                     source_app='ralendar',
+                    recurrence_rule=rule,
                 )
                 world_days.events.add(event)
-                self.stdout.write(f'    添加节日：{name}')
+                self.stdout.write(f'    添加节日：{name}（每年重复）')
             
             self.stdout.write(self.style.SUCCESS(f'  ✅ 添加了 {len(international_days)} 个国际纪念日'))
         else:
@@ -166,5 +164,5 @@ class Command(BaseCommand):
         self.stdout.write(self.style.SUCCESS(f'\n✅ 完成！共有 {total_calendars} 个公开日历'))
         self.stdout.write(self.style.SUCCESS('\n可用的订阅URL：'))
         for cal in PublicCalendar.objects.filter(is_public=True):
-            self.stdout.write(f'  - {cal.url_slug}: {cal.name} ({cal.events.count()}个事件)')
+            self.stdout.write(f'  - {cal.url_slug}: {cal.name} ({cal.event_count}个事件)')
 
@@ -0,0 +1,44 @@
+# Generated manually for the time-bucketed reminder scheduler
+# Date: 2026-10-18
+
+from datetime import timedelta
+
+from django.db import migrations, models
+
+
+def backfill_remind_at(apps, schema_editor):
+    """为已启用邮件提醒的事件计算提醒触发时间"""
+    Event = apps.get_model('api', 'Event')
+
+    events = []
+    queryset = Event.objects.filter(email_reminder=True).only('id', 'start_time', 'reminder_minutes')
+    for event in queryset.iterator(chunk_size=1000):
+        event.remind_at = event.start_time - timedelta(minutes=event.reminder_minutes or 0)
+        events.append(event)
+
+    Event.objects.bulk_update(events, ['remind_at'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_oauth_models'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='remind_at',
+            field=models.DateTimeField(
+                blank=True,
+                help_text='保存时按 start_time - reminder_minutes 计算，定时任务按分钟读取',
+                null=True,
+                verbose_name='提醒触发时间'
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['remind_at'], name='event_remind_at_idx'),
+        ),
+        migrations.RunPython(backfill_remind_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated manually for the reminder digest mode
+# Date: 2026-10-18
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('api', '0010_event_remind_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReminderPreference',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest_mode', models.CharField(
+                    choices=[('off', '逐条提醒'), ('hourly', '每小时汇总'), ('daily', '每日汇总')],
+                    db_index=True,
+                    default='off',
+                    help_text='每小时汇总：整点发送未来一小时的提醒；每日汇总：每天固定时间发送未来 24 小时的提醒',
+                    max_length=10,
+                    verbose_name='汇总模式'
+                )),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+                ('user', models.OneToOneField(
+                    on_delete=django.db.models.deletion.CASCADE,
+                    related_name='reminder_preference',
+                    to=settings.AUTH_USER_MODEL,
+                    verbose_name='关联用户'
+                )),
+            ],
+            options={
+                'verbose_name': '提醒偏好',
+                'verbose_name_plural': '提醒偏好',
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated manually for recurring events
+# Date: 2026-10-18
+
+from django.db import migrations, models
+
+
+def backfill_recurrence_end(apps, schema_editor):
+    """已有事件都不重复，最后一次发生时间即开始时间"""
+    Event = apps.get_model('api', 'Event')
+    Event.objects.update(recurrence_end=models.F('start_time'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_reminderpreference'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='recurrence_rule',
+            field=models.CharField(
+                blank=True,
+                help_text='RFC 5545 RRULE，如 FREQ=WEEKLY;BYDAY=MO；为空表示不重复',
+                max_length=255,
+                verbose_name='重复规则'
+            ),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='recurrence_end',
+            field=models.DateTimeField(
+                blank=True,
+                help_text='保存时按规则的 COUNT/UNTIL 计算；为空表示无限重复',
+                null=True,
+                verbose_name='最后一次发生时间'
+            ),
+        ),
+        migrations.RunPython(backfill_recurrence_end, migrations.RunPython.noop),
+    ]
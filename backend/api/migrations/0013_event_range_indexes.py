@@ -0,0 +1,22 @@
+# Generated manually for the event time-range query
+# Date: 2026-10-18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_event_recurrence'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['user', 'end_time'], name='event_user_end_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['user', 'recurrence_rule'], name='event_user_rrule_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated manually for per-user private calendar feeds
+# Date: 2026-10-18
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('api', '0014_event_delta_sync'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CalendarFeedToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField(
+                    default=1,
+                    help_text='重置订阅地址时递增，签名中的版本号与此不一致的令牌视为已吊销',
+                    verbose_name='令牌版本'
+                )),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+                ('user', models.OneToOneField(
+                    on_delete=django.db.models.deletion.CASCADE,
+                    related_name='calendar_feed_token',
+                    to=settings.AUTH_USER_MODEL,
+                    verbose_name='关联用户'
+                )),
+            ],
+            options={
+                'verbose_name': '日历订阅令牌',
+                'verbose_name_plural': '日历订阅令牌',
+            },
+        ),
+    ]
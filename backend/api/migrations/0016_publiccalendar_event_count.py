@@ -0,0 +1,27 @@
+# Generated manually for denormalized calendar event counts
+# Date: 2026-10-18
+
+from django.db import migrations, models
+
+
+def backfill_event_count(apps, schema_editor):
+    """按关联表统计已有日历的事件数"""
+    PublicCalendar = apps.get_model('api', 'PublicCalendar')
+    for calendar in PublicCalendar.objects.annotate(total=models.Count('events')):
+        PublicCalendar.objects.filter(pk=calendar.pk).update(event_count=calendar.total)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_calendarfeedtoken'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='publiccalendar',
+            name='event_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='事件数'),
+        ),
+        migrations.RunPython(backfill_event_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated manually for conditional holiday sync
+# Date: 2026-10-18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_publiccalendar_event_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HolidaySourceState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.IntegerField(help_text='年份', unique=True)),
+                ('etag', models.CharField(blank=True, default='', help_text='上游返回的 ETag', max_length=255)),
+                ('last_modified', models.CharField(blank=True, default='', help_text='上游返回的 Last-Modified', max_length=64)),
+                ('content_hash', models.CharField(blank=True, default='', help_text='上次导入数据的 SHA-256', max_length=64)),
+                ('checked_at', models.DateTimeField(blank=True, help_text='最后检查时间', null=True)),
+                ('changed_at', models.DateTimeField(blank=True, help_text='最后一次导入新数据的时间', null=True)),
+            ],
+            options={
+                'verbose_name': '节假日同步状态',
+                'verbose_name_plural': '节假日同步状态',
+                'db_table': 'calendar_holiday_source_states',
+                'ordering': ['-year'],
+            },
+        ),
+    ]
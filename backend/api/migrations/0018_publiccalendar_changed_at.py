@@ -0,0 +1,19 @@
+# Generated manually for public calendar Last-Modified
+# Date: 2026-10-18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_holidaysourcestate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='publiccalendar',
+            name='changed_at',
+            field=models.DateTimeField(auto_now=True, null=True, verbose_name='最后变化时间'),
+        ),
+    ]
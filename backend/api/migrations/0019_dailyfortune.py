@@ -0,0 +1,75 @@
+# Generated manually for precomputed daily fortunes
+# Date: 2026-10-18
+
+from django.db import migrations, models
+
+
+def create_fortune_table(apps, schema_editor):
+    """建表；已有在迁移之外创建的旧表时只补上 details 字段"""
+    DailyFortune = apps.get_model('api', 'DailyFortune')
+    connection = schema_editor.connection
+    table = DailyFortune._meta.db_table
+    if table not in connection.introspection.table_names():
+        schema_editor.create_model(DailyFortune)
+        return
+
+    with connection.cursor() as cursor:
+        columns = {column.name for column in connection.introspection.get_table_description(cursor, table)}
+    if 'details' not in columns:
+        schema_editor.add_field(DailyFortune, DailyFortune._meta.get_field('details'))
+
+
+def drop_fortune_table(apps, schema_editor):
+    schema_editor.delete_model(apps.get_model('api', 'DailyFortune'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_publiccalendar_changed_at'),
+    ]
+
+    operations = [
+        # 表可能已经存在（运势模型之前没有迁移），建表交给下面的 RunPython 判断
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='DailyFortune',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('date', models.DateField(db_index=True, help_text='日期')),
+                        ('fortune_type', models.CharField(choices=[('daily', '每日运势'), ('zodiac', '生肖运势'), ('constellation', '星座运势')], help_text='运势类型', max_length=20)),
+                        ('zodiac', models.CharField(blank=True, help_text="生肖，如'龙'", max_length=2, null=True)),
+                        ('constellation', models.CharField(blank=True, help_text="星座，如'天蝎座'", max_length=20, null=True)),
+                        ('overall_score', models.IntegerField(default=50, help_text='综合运势评分（0-100）')),
+                        ('summary', models.TextField(help_text='运势总结')),
+                        ('love_score', models.IntegerField(default=50, help_text='爱情运势（0-100）')),
+                        ('career_score', models.IntegerField(default=50, help_text='事业运势（0-100）')),
+                        ('wealth_score', models.IntegerField(default=50, help_text='财运（0-100）')),
+                        ('health_score', models.IntegerField(default=50, help_text='健康运势（0-100）')),
+                        ('lucky_color', models.CharField(blank=True, help_text='幸运颜色', max_length=20, null=True)),
+                        ('lucky_number', models.CharField(blank=True, help_text='幸运数字', max_length=20, null=True)),
+                        ('lucky_direction', models.CharField(blank=True, help_text='幸运方位', max_length=20, null=True)),
+                        ('advice', models.TextField(blank=True, help_text='今日建议', null=True)),
+                        ('details', models.JSONField(default=dict, help_text='运势明细（按天气组合）')),
+                        ('data_source', models.CharField(default='auto', help_text='数据来源：auto/api/user_input', max_length=50)),
+                        ('created_at', models.DateTimeField(auto_now_add=True)),
+                        ('updated_at', models.DateTimeField(auto_now=True)),
+                    ],
+                    options={
+                        'verbose_name': '运势',
+                        'verbose_name_plural': '运势列表',
+                        'db_table': 'calendar_fortunes',
+                        'ordering': ['-date'],
+                        'indexes': [
+                            models.Index(fields=['date', 'fortune_type'], name='calendar_fo_date_3d9dc2_idx'),
+                            models.Index(fields=['zodiac'], name='calendar_fo_zodiac_98dff6_idx'),
+                            models.Index(fields=['constellation'], name='calendar_fo_constel_e69062_idx'),
+                        ],
+                        'unique_together': {('date', 'fortune_type', 'zodiac', 'constellation')},
+                    },
+                ),
+            ],
+        ),
+        migrations.RunPython(create_fortune_table, drop_fortune_table),
+    ]
@@ -0,0 +1,98 @@
+# Generated manually for generated lunar calendar data and sync logs
+# Date: 2026-10-18
+
+from django.db import migrations, models
+
+MODELS = ['LunarCalendar', 'DataSyncLog']
+
+
+def create_tables(apps, schema_editor):
+    """建表；在迁移之外创建过的表（字段与模型一致）保持不动"""
+    existing = set(schema_editor.connection.introspection.table_names())
+    for name in MODELS:
+        model = apps.get_model('api', name)
+        if model._meta.db_table not in existing:
+            schema_editor.create_model(model)
+
+
+def drop_tables(apps, schema_editor):
+    for name in reversed(MODELS):
+        schema_editor.delete_model(apps.get_model('api', name))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0019_dailyfortune'),
+    ]
+
+    operations = [
+        # 表可能已经存在（这两个模型之前没有迁移），建表交给下面的 RunPython 判断
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='LunarCalendar',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('date', models.DateField(db_index=True, help_text='公历日期', unique=True)),
+                        ('lunar_year', models.IntegerField(help_text='农历年份')),
+                        ('lunar_month', models.CharField(help_text="农历月份，如'正月'", max_length=10)),
+                        ('lunar_day', models.CharField(help_text="农历日期，如'初一'", max_length=10)),
+                        ('lunar_date_cn', models.CharField(help_text="农历日期中文，如'甲辰年正月初一'", max_length=50)),
+                        ('zodiac', models.CharField(help_text="生肖，如'龙'", max_length=2)),
+                        ('ganzhi_year', models.CharField(help_text="年干支，如'甲辰'", max_length=4)),
+                        ('ganzhi_month', models.CharField(help_text='月干支', max_length=4)),
+                        ('ganzhi_day', models.CharField(help_text='日干支', max_length=4)),
+                        ('solar_term', models.CharField(blank=True, help_text="节气，如'立春'", max_length=10, null=True)),
+                        ('yi', models.JSONField(default=list, help_text='宜（适合做的事）')),
+                        ('ji', models.JSONField(default=list, help_text='忌（不宜做的事）')),
+                        ('chong', models.CharField(blank=True, help_text="相冲生肖，如'冲鼠'", max_length=20, null=True)),
+                        ('sha', models.CharField(blank=True, help_text="煞方位，如'煞北'", max_length=20, null=True)),
+                        ('ji_shen', models.JSONField(default=list, help_text='吉神')),
+                        ('xiong_shen', models.JSONField(default=list, help_text='凶神')),
+                        ('wu_xing', models.CharField(blank=True, help_text="五行，如'金'", max_length=20, null=True)),
+                        ('auspicious_level', models.IntegerField(default=3, help_text='吉凶等级：1=大凶, 3=平, 5=大吉')),
+                        ('data_version', models.CharField(default='1.0', max_length=20)),
+                        ('last_updated', models.DateTimeField(auto_now=True)),
+                    ],
+                    options={
+                        'verbose_name': '黄历',
+                        'verbose_name_plural': '黄历列表',
+                        'db_table': 'calendar_lunar_calendars',
+                        'ordering': ['date'],
+                        'indexes': [
+                            models.Index(fields=['date'], name='calendar_lu_date_14921b_idx'),
+                            models.Index(fields=['lunar_year', 'lunar_month'], name='calendar_lu_lunar_y_28e153_idx'),
+                            models.Index(fields=['auspicious_level'], name='calendar_lu_auspici_b6ae1a_idx'),
+                        ],
+                    },
+                ),
+                migrations.CreateModel(
+                    name='DataSyncLog',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('data_type', models.CharField(choices=[('holiday', '节假日'), ('lunar', '黄历'), ('fortune', '运势'), ('fortune_notify', '运势推送')], help_text='数据类型', max_length=20)),
+                        ('sync_date', models.DateField(help_text='同步日期范围开始')),
+                        ('sync_date_end', models.DateField(blank=True, help_text='同步日期范围结束', null=True)),
+                        ('status', models.CharField(choices=[('pending', '待同步'), ('syncing', '同步中'), ('success', '成功'), ('failed', '失败')], default='pending', help_text='同步状态', max_length=20)),
+                        ('records_count', models.IntegerField(default=0, help_text='同步记录数')),
+                        ('error_message', models.TextField(blank=True, help_text='错误信息', null=True)),
+                        ('started_at', models.DateTimeField(blank=True, help_text='开始时间', null=True)),
+                        ('completed_at', models.DateTimeField(blank=True, help_text='完成时间', null=True)),
+                        ('created_at', models.DateTimeField(auto_now_add=True)),
+                    ],
+                    options={
+                        'verbose_name': '数据同步日志',
+                        'verbose_name_plural': '数据同步日志列表',
+                        'db_table': 'calendar_data_sync_logs',
+                        'ordering': ['-created_at'],
+                        'indexes': [
+                            models.Index(fields=['data_type', 'status'], name='calendar_da_data_ty_25087e_idx'),
+                            models.Index(fields=['sync_date'], name='calendar_da_sync_da_d52882_idx'),
+                        ],
+                    },
+                ),
+            ],
+        ),
+        migrations.RunPython(create_tables, drop_tables),
+    ]
@@ -0,0 +1,19 @@
+# Generated manually for DataSyncLog success details
+# Date: 2026-10-18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0020_lunarcalendar_datasynclog'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datasynclog',
+            name='details',
+            field=models.JSONField(blank=True, default=dict, help_text='同步明细（新增/更新/未变化条数、耗时等）'),
+        ),
+    ]
@@ -1,23 +1,27 @@
 """
 Models - 数据模型模块
 """
-from .user import AcWingUser, QQUser, UserMapping
-from .event import Event
+from .user import AcWingUser, QQUser, UserMapping, ReminderPreference, CalendarFeedToken
+from .event import Event, EventTombstone
 from .calendar import PublicCalendar
-from .calendar_data import Holiday, LunarCalendar, DailyFortune, UserFortune, DataSyncLog
+from .calendar_data import Holiday, LunarCalendar, DailyFortune, UserFortune, DataSyncLog, HolidaySourceState
 from .oauth import OAuthClient, AuthorizationCode, OAuthAccessToken, OAUTH_SCOPES, get_scope_description
 
 __all__ = [
     'AcWingUser',
     'QQUser',
     'UserMapping',
+    'ReminderPreference',
+    'CalendarFeedToken',
     'Event',
+    'EventTombstone',
     'PublicCalendar',
     'Holiday',
     'LunarCalendar',
     'DailyFortune',
     'UserFortune',
     'DataSyncLog',
+    'HolidaySourceState',
     'OAuthClient',
     'AuthorizationCode',
     'OAuthAccessToken',
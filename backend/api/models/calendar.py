@@ -2,7 +2,10 @@
 日历相关模型
 """
 from django.db import models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
+from django.utils import timezone
 from .event import Event
 
 
@@ -23,7 +26,16 @@ class PublicCalendar(models.Model):
         related_name='calendars',
         verbose_name='日程列表'
     )
+    # 冗余计数，由 api/signals.py 在成员变化、事件删除时维护，列表页不必逐个 COUNT
+    event_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='事件数'
+    )
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
+    # 日历信息或成员（增删事件、事件被删除）最后变化的时间，
+    # 成员变化时由 refresh_event_counts 一并更新，计入 events-json 的 Last-Modified
+    changed_at = models.DateTimeField(auto_now=True, null=True, verbose_name='最后变化时间')
     
     class Meta:
         verbose_name = '公开日历'
@@ -31,4 +43,27 @@ class PublicCalendar(models.Model):
     
     def __str__(self):
         return self.name
-
+    
+    @classmethod
+    def refresh_event_counts(cls, calendar_ids):
+        """
+        按关联表重新统计若干日历的事件数（一条 UPDATE），同时记下成员变化时间
+        
+        直接重算而不是加减，并发修改或漏掉的信号都不会让计数越错越多
+        """
+        calendar_ids = set(calendar_ids)
+        if not calendar_ids:
+            return
+        Through = cls.events.through
+        counts = (
+            Through.objects
+            .filter(publiccalendar_id=OuterRef('pk'))
+            .order_by()
+            .values('publiccalendar_id')
+            .annotate(total=Count('id'))
+            .values('total')
+        )
+        cls.objects.filter(pk__in=calendar_ids).update(
+            event_count=Coalesce(Subquery(counts), 0),
+            changed_at=timezone.now(),
+        )
@@ -60,8 +60,8 @@ class LunarCalendar(models.Model):
     """
     黄历数据（宜忌、冲煞、吉神凶煞等）
     
-    数据范围：当前年 + 未来 1 年（共 2 年，约 730 条）
-    更新频率：每年 12 月自动更新下一年数据
+    数据范围：去年到未来 2 年（LUNAR_CALENDAR_YEARS_BEHIND / AHEAD）
+    更新频率：每月 1 号由定时任务补齐（generate_lunar_calendar），农历、干支、节气由程序生成
     """
     date = models.DateField(unique=True, db_index=True, help_text="公历日期")
     
@@ -134,13 +134,14 @@ class LunarCalendar(models.Model):
 
 class DailyFortune(models.Model):
     """
-    每日运势（星座 + 生肖）
+    每日运势（通用 + 星座 + 生肖）
     
-    数据范围：当天 + 未来 7 天
-    更新频率：每天凌晨自动更新
+    数据范围：当天 + 未来 7 天（FORTUNE_PRECOMPUTE_DAYS）
+    更新频率：每天凌晨自动更新（precompute_daily_fortunes）
     """
     date = models.DateField(db_index=True, help_text="日期")
     fortune_type = models.CharField(max_length=20, choices=[
+        ('daily', '每日运势'),
         ('zodiac', '生肖运势'),
         ('constellation', '星座运势'),
     ], help_text="运势类型")
@@ -172,6 +173,9 @@ class DailyFortune(models.Model):
     # 建议
     advice = models.TextField(null=True, blank=True, help_text="今日建议")
     
+    # 各天气组合下的宜忌、幸运元素、基础分数（接口叠加实时天气时使用）
+    details = models.JSONField(default=dict, help_text="运势明细（按天气组合）")
+    
     # 数据来源
     data_source = models.CharField(max_length=50, default='auto', 
                                    help_text="数据来源：auto/api/user_input")
@@ -195,8 +199,10 @@ class DailyFortune(models.Model):
     def __str__(self):
         if self.zodiac:
             return f"{self.date} - {self.zodiac}运势"
-        else:
+        elif self.constellation:
             return f"{self.date} - {self.constellation}运势"
+        else:
+            return f"{self.date} - 每日运势"
 
 
 class UserFortune(models.Model):
@@ -242,6 +248,7 @@ class DataSyncLog(models.Model):
         ('holiday', '节假日'),
         ('lunar', '黄历'),
         ('fortune', '运势'),
+        ('fortune_notify', '运势推送'),
     ], help_text="数据类型")
     
     sync_date = models.DateField(help_text="同步日期范围开始")
@@ -256,6 +263,7 @@ class DataSyncLog(models.Model):
     
     records_count = models.IntegerField(default=0, help_text="同步记录数")
     error_message = models.TextField(null=True, blank=True, help_text="错误信息")
+    details = models.JSONField(default=dict, blank=True, help_text="同步明细（新增/更新/未变化条数、耗时等）")
     
     # 时间戳
     started_at = models.DateTimeField(null=True, blank=True, help_text="开始时间")
@@ -275,3 +283,28 @@ class DataSyncLog(models.Model):
     def __str__(self):
         return f"{self.data_type} - {self.sync_date} - {self.status}"
 
+
+
+class HolidaySourceState(models.Model):
+    """
+    节假日数据源的同步状态（每年一条）
+    
+    记录上游的校验值和上次导入内容的哈希：
+    - 上游支持条件请求时带 If-None-Match / If-Modified-Since，返回 304 就不再下载
+    - 下载到的内容哈希与上次相同时不再写数据库
+    """
+    year = models.IntegerField(unique=True, help_text="年份")
+    etag = models.CharField(max_length=255, blank=True, default='', help_text="上游返回的 ETag")
+    last_modified = models.CharField(max_length=64, blank=True, default='', help_text="上游返回的 Last-Modified")
+    content_hash = models.CharField(max_length=64, blank=True, default='', help_text="上次导入数据的 SHA-256")
+    checked_at = models.DateTimeField(null=True, blank=True, help_text="最后检查时间")
+    changed_at = models.DateTimeField(null=True, blank=True, help_text="最后一次导入新数据的时间")
+    
+    class Meta:
+        db_table = 'calendar_holiday_source_states'
+        ordering = ['-year']
+        verbose_name = '节假日同步状态'
+        verbose_name_plural = '节假日同步状态'
+    
+    def __str__(self):
+        return f"{self.year} - {self.content_hash[:8] or '未同步'}"
@@ -3,6 +3,7 @@
 """
 from django.db import models
 from django.contrib.auth.models import User
+from datetime import timedelta
 from urllib.parse import quote
 
 
@@ -82,6 +83,32 @@ class Event(models.Model):
         verbose_name='提醒已发送',
         help_text='标记提醒是否已发送'
     )
+    remind_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='提醒触发时间',
+        help_text='保存时按 start_time - reminder_minutes 计算，定时任务按分钟读取'
+    )
+    
+    
+    # === 重复规则字段 ===
+    recurrence_rule = models.CharField(
+        max_length=255,
+        blank=True,
+        verbose_name='重复规则',
+        help_text='RFC 5545 RRULE，如 FREQ=WEEKLY;BYDAY=MO；为空表示不重复'
+    )
+    recurrence_end = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='最后一次发生时间',
+        help_text='保存时按规则的 COUNT/UNTIL 计算；为空表示无限重复'
+    )
+    
+    # 影响提醒触发时间的字段
+    REMINDER_FIELDS = ('start_time', 'reminder_minutes', 'email_reminder', 'recurrence_rule')
+    # 影响最后一次发生时间的字段
+    RECURRENCE_FIELDS = ('start_time', 'recurrence_rule')
     
     class Meta:
         ordering = ['start_time']
@@ -89,13 +116,81 @@ class Event(models.Model):
         verbose_name_plural = '日程列表'
         indexes = [
             models.Index(fields=['user', 'start_time'], name='event_user_start_idx'),
+            models.Index(fields=['user', 'end_time'], name='event_user_end_idx'),
+            models.Index(fields=['user', 'recurrence_rule'], name='event_user_rrule_idx'),
+            models.Index(fields=['user', 'updated_at'], name='event_user_updated_idx'),
             models.Index(fields=['source_app', 'source_id'], name='event_source_idx'),
             models.Index(fields=['related_trip_slug'], name='event_trip_idx'),
+            models.Index(fields=['remind_at'], name='event_remind_at_idx'),
         ]
     
     def __str__(self):
         return f"{self.title} - {self.start_time.strftime('%Y-%m-%d %H:%M')}"
     
+    def save(self, *args, **kwargs):
+        """保存时同步计算提醒触发时间和重复结束时间"""
+        self.recurrence_end = self.compute_recurrence_end()
+        self.remind_at = self.compute_remind_at()
+        
+        # 只更新部分字段时，如果涉及相关字段，需要一起写入计算结果
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if update_fields & set(self.REMINDER_FIELDS):
+                update_fields.add('remind_at')
+            if update_fields & set(self.RECURRENCE_FIELDS):
+                update_fields.add('recurrence_end')
+            kwargs['update_fields'] = update_fields
+        
+        super().save(*args, **kwargs)
+    
+    @property
+    def is_recurring(self):
+        """是否为重复事件"""
+        return bool(self.recurrence_rule)
+    
+    def compute_remind_at(self):
+        """
+        计算提醒触发时间
+        
+        重复事件指向下一次（尚未开始的）发生
+        
+        Returns:
+            datetime: 未启用邮件提醒或没有后续发生时返回 None
+        """
+        if not self.email_reminder or self.start_time is None:
+            return None
+        
+        start = self.start_time
+        if self.is_recurring:
+            from ..utils.recurrence import next_occurrence_start
+            start = next_occurrence_start(self)
+            if start is None:
+                return None
+        return start - timedelta(minutes=self.reminder_minutes or 0)
+    
+    def compute_recurrence_end(self):
+        """
+        计算最后一次发生的开始时间
+        
+        Returns:
+            datetime: 不重复时为 start_time，无限重复时返回 None
+        """
+        if not self.is_recurring:
+            return self.start_time
+        from ..utils.recurrence import last_occurrence_start
+        return last_occurrence_start(self.recurrence_rule, self.start_time)
+    
+    def occurrences(self, window_start, window_end):
+        """
+        事件在时间窗口内的每一次发生
+        
+        Returns:
+            list: 不重复的事件返回 [self]（或空列表）
+        """
+        from ..utils.recurrence import expand_events
+        return expand_events([self], window_start, window_end)
+    
     @property
     def map_url(self):
         """
@@ -147,3 +242,32 @@ class Event(models.Model):
         """是否来自 Roamio"""
         return self.source_app == 'roamio'
 
+
+class EventTombstone(models.Model):
+    """
+    已删除事件的记录（增量同步使用）
+    
+    事件删除时由信号写入，客户端增量同步时据此删除本地缓存；
+    超过保留期的记录由定时任务清理
+    """
+    event_id = models.BigIntegerField(verbose_name='事件ID')
+    # 不建外键约束：删除用户时级联删除事件也会写入墓碑，不能反过来阻止用户删除
+    user = models.ForeignKey(
+        User,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+',
+        verbose_name='用户'
+    )
+    deleted_at = models.DateTimeField(auto_now_add=True, verbose_name='删除时间')
+    
+    class Meta:
+        verbose_name = '已删除日程'
+        verbose_name_plural = '已删除日程'
+        indexes = [
+            models.Index(fields=['user', 'deleted_at'], name='tombstone_user_deleted_idx'),
+            models.Index(fields=['deleted_at'], name='tombstone_deleted_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Event({self.event_id}) deleted at {self.deleted_at}"
@@ -119,3 +119,69 @@ class UserMapping(models.Model):
     
     def __str__(self):
         return f"Ralendar({self.ralendar_user.id}) <-> Roamio({self.roamio_user_id})"
+
+
+class ReminderPreference(models.Model):
+    """
+    用户提醒偏好
+    开启汇总模式后，同一时间窗口内的多个提醒合并成一封邮件发送
+    """
+    DIGEST_OFF = 'off'
+    DIGEST_HOURLY = 'hourly'
+    DIGEST_DAILY = 'daily'
+    DIGEST_MODE_CHOICES = [
+        (DIGEST_OFF, '逐条提醒'),
+        (DIGEST_HOURLY, '每小时汇总'),
+        (DIGEST_DAILY, '每日汇总'),
+    ]
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='reminder_preference',
+        verbose_name='关联用户'
+    )
+    digest_mode = models.CharField(
+        max_length=10,
+        choices=DIGEST_MODE_CHOICES,
+        default=DIGEST_OFF,
+        db_index=True,
+        verbose_name='汇总模式',
+        help_text='每小时汇总：整点发送未来一小时的提醒；每日汇总：每天固定时间发送未来 24 小时的提醒'
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
+
+    class Meta:
+        verbose_name = '提醒偏好'
+        verbose_name_plural = '提醒偏好'
+
+    def __str__(self):
+        return f"{self.user.username} - {self.get_digest_mode_display()}"
+
+
+class CalendarFeedToken(models.Model):
+    """
+    个人日历订阅令牌
+    订阅地址中带签名令牌（用户 ID + 版本号），重置时版本号加一，旧地址立即失效
+    """
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='calendar_feed_token',
+        verbose_name='关联用户'
+    )
+    version = models.PositiveIntegerField(
+        default=1,
+        verbose_name='令牌版本',
+        help_text='重置订阅地址时递增，签名中的版本号与此不一致的令牌视为已吊销'
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
+
+    class Meta:
+        verbose_name = '日历订阅令牌'
+        verbose_name_plural = '日历订阅令牌'
+
+    def __str__(self):
+        return f"{self.user.username} - v{self.version}"
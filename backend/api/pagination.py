@@ -0,0 +1,147 @@
+"""
+自定义分页类
+事件列表的游标（keyset）分页：按 (start_time, id) 定位，每页开销固定
+"""
+import base64
+import json
+from collections import OrderedDict
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class EventKeysetPagination(BasePagination):
+    """
+    事件游标分页
+
+    - 按 (start_time, id) 排序，id 作为同一时间的事件之间的唯一决胜字段
+    - 下一页条件：(start_time, id) > 上一页最后一条，直接走 (user, start_time) 索引，
+      不需要 OFFSET，深分页和第一页开销相同
+    - 翻页期间插入/删除事件不会造成重复或漏读（只影响尚未读到的位置）
+
+    使用方法：
+        GET /api/events/?cursor=            第一页
+        GET /api/events/?cursor=<next>      下一页
+        可选：page_size=（最大 500）、order=desc（倒序）
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    order_query_param = 'order'
+    page_size = settings.REST_FRAMEWORK.get('PAGE_SIZE', 100)
+    max_page_size = 500
+
+    def __init__(self, descending=False):
+        self.default_descending = descending
+
+    @classmethod
+    def is_requested(cls, request):
+        """请求是否使用游标分页（带 cursor 参数，第一页可为空值）"""
+        return cls.cursor_query_param in request.query_params
+
+    # ---------- 游标编解码 ----------
+
+    @staticmethod
+    def encode_cursor(start_time, pk):
+        payload = json.dumps({'t': start_time.isoformat(), 'i': pk}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """
+        解析游标
+
+        Returns:
+            (start_time, id)，空游标返回 None
+        """
+        if not cursor:
+            return None
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+            start_time = parse_datetime(payload['t'])
+            pk = int(payload['i'])
+        except (ValueError, KeyError, TypeError):
+            start_time = None
+        if start_time is None:
+            raise ValidationError({'cursor': '无效的游标'})
+        return start_time, pk
+
+    # ---------- 分页 ----------
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            size = self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def is_descending(self, request):
+        order = request.query_params.get(self.order_query_param)
+        if order in ('asc', 'desc'):
+            return order == 'desc'
+        return self.default_descending
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.descending = self.is_descending(request)
+        page_size = self.get_page_size(request)
+        position = self.decode_cursor(request.query_params.get(self.cursor_query_param))
+
+        if self.descending:
+            queryset = queryset.order_by('-start_time', '-id')
+        else:
+            queryset = queryset.order_by('start_time', 'id')
+
+        if position is not None:
+            start_time, pk = position
+            if self.descending:
+                queryset = queryset.filter(
+                    Q(start_time__lt=start_time) | Q(start_time=start_time, id__lt=pk)
+                )
+            else:
+                queryset = queryset.filter(
+                    Q(start_time__gt=start_time) | Q(start_time=start_time, id__gt=pk)
+                )
+
+        # 多取一条判断是否还有下一页
+        rows = list(queryset[:page_size + 1])
+        self.has_next = len(rows) > page_size
+        page = rows[:page_size]
+
+        self.next_cursor = None
+        if self.has_next:
+            last = page[-1]
+            self.next_cursor = self.encode_cursor(last.start_time, last.pk)
+        return page
+
+    def get_next_link(self):
+        if not self.next_cursor:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_data(self, data):
+        return OrderedDict([
+            ('next', self.get_next_link()),
+            ('next_cursor', self.next_cursor),
+            ('has_more', self.has_next),
+            ('results', data),
+        ])
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'next_cursor': {'type': 'string', 'nullable': True},
+                'has_more': {'type': 'boolean'},
+                'results': schema,
+            },
+        }
@@ -1,8 +1,36 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from django.db.models import prefetch_related_objects
+from django.db.models.manager import BaseManager
 from .models import Event, PublicCalendar
 
 
+def attach_event_derived_fields(events):
+    """
+    批量计算事件列表的派生字段（整页固定 2 条查询，与事件数量无关）
+    
+    - user：一次性加载（已 select_related 的跳过）
+    - in_public_calendar：一次查询中间表，得到属于公开日历的事件 ID
+    
+    Args:
+        events: 事件实例列表（重复事件展开出的多次发生共用主记录 id）
+    """
+    pending = [event for event in events if not hasattr(event, 'in_public_calendar')]
+    if not pending:
+        return
+    
+    prefetch_related_objects(pending, 'user')
+    
+    event_ids = {event.id for event in pending}
+    in_calendar = set(
+        PublicCalendar.events.through.objects
+        .filter(event_id__in=event_ids)
+        .values_list('event_id', flat=True)
+    )
+    for event in pending:
+        event.in_public_calendar = event.id in in_calendar
+
+
 # ==================== 用户相关 ====================
 class UserSerializer(serializers.ModelSerializer):
     """用户信息序列化器"""
@@ -55,6 +83,15 @@ class UserSerializer(serializers.ModelSerializer):
 
 
 # ==================== 事件相关 ====================
+class EventListSerializer(serializers.ListSerializer):
+    """事件列表序列化：先批量计算派生字段，避免每行各查一次"""
+    
+    def to_representation(self, data):
+        events = list(data.all() if isinstance(data, BaseManager) else data)
+        attach_event_derived_fields(events)
+        return super().to_representation(events)
+
+
 class EventSerializer(serializers.ModelSerializer):
     """事件序列化器（融合版）"""
     username = serializers.CharField(source='user.username', read_only=True)
@@ -62,6 +99,7 @@ class EventSerializer(serializers.ModelSerializer):
     has_location = serializers.BooleanField(read_only=True)
     is_from_roamio = serializers.BooleanField(read_only=True)
     is_public_calendar = serializers.SerializerMethodField(read_only=True)
+    is_recurring = serializers.BooleanField(read_only=True)
     
     class Meta:
         model = Event
@@ -74,14 +112,22 @@ class EventSerializer(serializers.ModelSerializer):
             'latitude', 'longitude', 'map_provider', 'map_url', 'has_location',
             # 提醒配置字段
             'email_reminder', 'notification_sent',
+            # 重复规则字段
+            'recurrence_rule', 'recurrence_end', 'is_recurring',
             # 派生字段
             'is_from_roamio', 'is_public_calendar'
         ]
         read_only_fields = ['id', 'username', 'created_at', 'updated_at', 
-                            'map_url', 'has_location', 'is_from_roamio', 'is_public_calendar']
+                            'map_url', 'has_location', 'is_from_roamio', 'is_public_calendar',
+                            'recurrence_end', 'is_recurring']
+        list_serializer_class = EventListSerializer
     
     def get_is_public_calendar(self, obj):
         """判断是否是公开日历事件（节日）"""
+        # 列表序列化时已批量计算；单个事件才单独查询
+        in_public_calendar = getattr(obj, 'in_public_calendar', None)
+        if in_public_calendar is not None:
+            return in_public_calendar
         return obj.calendars.exists()
     
     def validate(self, data):
@@ -100,11 +146,30 @@ class EventSerializer(serializers.ModelSerializer):
             if not (-180 <= longitude <= 180):
                 raise serializers.ValidationError("经度必须在 -180 到 180 之间")
         
+        # 验证重复规则
+        if data.get('recurrence_rule'):
+            from .utils.recurrence import validate_rule
+            start_time = data.get('start_time') or getattr(self.instance, 'start_time', None)
+            try:
+                data['recurrence_rule'] = validate_rule(data['recurrence_rule'], start_time)
+            except ValueError as e:
+                raise serializers.ValidationError({'recurrence_rule': str(e)})
+        
         return data
 
 
+class EventCompactSerializer(serializers.ModelSerializer):
+    """事件精简序列化器（月视图/日历网格使用，不含需要额外查询的派生字段）"""
+    is_recurring = serializers.BooleanField(read_only=True)
+    
+    class Meta:
+        model = Event
+        fields = ['id', 'title', 'start_time', 'end_time', 'location', 'source_app', 'is_recurring']
+        read_only_fields = fields
+
+
 class PublicCalendarSerializer(serializers.ModelSerializer):
-    events_count = serializers.IntegerField(source='events.count', read_only=True)
+    events_count = serializers.IntegerField(source='event_count', read_only=True)
     
     class Meta:
         model = PublicCalendar
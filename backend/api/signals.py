@@ -0,0 +1,79 @@
+"""
+模型信号
+"""
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .models import Event, EventTombstone, Holiday, PublicCalendar
+from .utils import holiday_index
+from .utils.ics import invalidate_feeds
+
+
+@receiver(post_delete, sender=Event)
+def record_event_tombstone(sender, instance, **kwargs):
+    """事件删除时写入墓碑记录，供客户端增量同步"""
+    EventTombstone.objects.create(event_id=instance.id, user_id=instance.user_id)
+
+
+# ---------- 公开日历：订阅缓存失效、事件计数 ----------
+
+def _calendars_changed(calendar_ids):
+    calendar_ids = set(calendar_ids)
+    invalidate_feeds(calendar_ids)
+    PublicCalendar.refresh_event_counts(calendar_ids)
+
+
+@receiver(m2m_changed, sender=PublicCalendar.events.through)
+def on_calendar_membership_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """日历增删事件时使订阅缓存失效并重新计数"""
+    if action == 'pre_clear' and reverse:
+        # event.calendars.clear()：清空后就查不到涉及哪些日历了，先记下
+        instance._public_calendar_ids = list(instance.calendars.values_list('id', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    
+    if not reverse:
+        # calendar.events.add(...) / remove / clear
+        _calendars_changed([instance.pk])
+    elif action == 'post_clear':
+        _calendars_changed(getattr(instance, '_public_calendar_ids', []))
+    else:
+        # event.calendars.add(...) / remove
+        _calendars_changed(pk_set or [])
+
+
+@receiver(post_save, sender=Event)
+def invalidate_feed_on_event_save(sender, instance, created, **kwargs):
+    """日历中的事件被修改时使订阅缓存失效（新建的事件还不属于任何日历）"""
+    if created:
+        return
+    invalidate_feeds(instance.calendars.values_list('id', flat=True))
+
+
+@receiver(pre_delete, sender=Event)
+def remember_event_calendars(sender, instance, **kwargs):
+    """删除事件前记下所属日历（删除时关联记录随之删除，且不触发 m2m_changed）"""
+    instance._public_calendar_ids = list(instance.calendars.values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=Event)
+def update_calendars_on_event_delete(sender, instance, **kwargs):
+    """事件删除后使所属日历的订阅缓存失效并重新计数"""
+    _calendars_changed(getattr(instance, '_public_calendar_ids', []))
+
+
+@receiver(post_save, sender=PublicCalendar)
+@receiver(post_delete, sender=PublicCalendar)
+def invalidate_feed_on_calendar_change(sender, instance, **kwargs):
+    """日历名称、描述等变化时使订阅缓存失效"""
+    invalidate_feeds([instance.pk])
+
+
+# ---------- 节假日索引失效 ----------
+
+@receiver(post_save, sender=Holiday)
+@receiver(post_delete, sender=Holiday)
+def invalidate_holiday_index(sender, instance, **kwargs):
+    """后台修改节假日后重建该年的索引"""
+    holiday_index.invalidate_year(instance.date.year)
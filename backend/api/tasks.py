@@ -2,17 +2,70 @@
 Celery 异步任务
 用于发送邮件提醒和同步节假日数据
 """
+from datetime import timedelta
 from celery import shared_task
-from django.core.mail import send_mail
+from django.core.mail import EmailMultiAlternatives
 from django.conf import settings
 from django.utils import timezone
-from datetime import timedelta
 from .models import Event
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def build_reminder_email(event):
+    """
+    构建事件提醒邮件（纯文本 + HTML）
+    
+    Args:
+        event: 事件（需已关联 user）
+    
+    Returns:
+        EmailMultiAlternatives: 待发送的邮件
+    """
+    from .utils.email_templates import render_reminder
+    from .utils.recurrence import reminder_occurrence
+    
+    # 重复事件显示本次提醒对应的那一次发生
+    subject, message, html_message = render_reminder(reminder_occurrence(event))
+    
+    email = EmailMultiAlternatives(
+        subject=subject,
+        body=message,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[event.user.email],
+    )
+    email.attach_alternative(html_message, 'text/html')
+    return email
+
+
+def build_digest_email(user, events):
+    """
+    构建汇总提醒邮件（一封邮件包含多个事件）
+    
+    Args:
+        user: 收件用户
+        events: 该用户的事件列表
+    
+    Returns:
+        EmailMultiAlternatives: 待发送的邮件
+    """
+    from .utils.email_templates import render_digest
+    from .utils.recurrence import reminder_occurrence
+    
+    occurrences = sorted((reminder_occurrence(event) for event in events), key=lambda e: e.start_time)
+    subject, message, html_message = render_digest(user, occurrences)
+    
+    email = EmailMultiAlternatives(
+        subject=subject,
+        body=message,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[user.email],
+    )
+    email.attach_alternative(html_message, 'text/html')
+    return email
+
+
 @shared_task
 def send_event_reminder_email(event_id):
     """
@@ -24,8 +77,10 @@ def send_event_reminder_email(event_id):
     Returns:
         bool: 发送成功返回 True，否则返回 False
     """
+    from .utils.reminder_scheduler import mark_reminders_sent
+    
     try:
-        event = Event.objects.get(id=event_id)
+        event = Event.objects.select_related('user').get(id=event_id)
         
         # 检查是否已发送
         if event.notification_sent:
@@ -36,105 +91,11 @@ def send_event_reminder_email(event_id):
             print(f"用户 {event.user.username} 没有设置邮箱，跳过提醒")
             return False
         
-        # 构建邮件内容
-        subject = f"📅 日程提醒：{event.title}"
-        
-        # 格式化时间
-        start_time = timezone.localtime(event.start_time).strftime('%Y年%m月%d日 %H:%M')
-        
-        # 构建位置信息
-        location_info = ""
-        if event.has_location:
-            location_info = f"\n📍 地点：{event.location or '已设置地理位置'}"
-            if event.map_url:
-                location_info += f"\n🗺️ 导航：{event.map_url}"
-        
-        # 构建消息内容（纯文本版本）
-        message = f"""
-您好 {event.user.username}，
-
-您有一个即将开始的日程：
-
-📋 标题：{event.title}
-⏰ 时间：{start_time}{location_info}
-
-{f'📝 备注：{event.description}' if event.description else ''}
-
-{'🔔 这是来自 Ralendar 旅行计划的提醒' if event.is_from_roamio else ''}
-
----
-Ralendar 日历系统
-https://app7626.acapp.acwing.com.cn
-        """
-        
-        # HTML 版本（更美观）
-        html_message = f"""
-<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <style>
-        body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-        .container {{ max-width: 600px; margin: 0 auto; padding: 20px; background: white; }}
-        .header {{ background: linear-gradient(135deg, #667eea, #764ba2); color: white; padding: 30px 20px; border-radius: 12px; text-align: center; }}
-        .header-content {{ display: flex; align-items: center; justify-content: center; gap: 15px; }}
-        .header-logo {{ width: 50px; height: 50px; border-radius: 10px; background: white; padding: 5px; box-shadow: 0 2px 8px rgba(0,0,0,0.2); }}
-        .header h2 {{ margin: 0; font-size: 26px; font-weight: 600; }}
-        .content {{ background: #f9f9f9; padding: 20px; border-radius: 0 0 8px 8px; }}
-        .event-card {{ background: white; padding: 20px; border-radius: 8px; margin: 20px 0; box-shadow: 0 2px 8px rgba(0,0,0,0.1); }}
-        .event-title {{ font-size: 20px; font-weight: bold; color: #667eea; margin-bottom: 10px; }}
-        .event-info {{ margin: 10px 0; }}
-        .event-info strong {{ color: #667eea; }}
-        .footer {{ text-align: center; color: #999; font-size: 12px; margin-top: 20px; }}
-        .button {{ display: inline-block; background: #667eea; color: white; padding: 10px 20px; text-decoration: none; border-radius: 5px; margin-top: 15px; }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <div class="header-content">
-                <img src="https://app7626.acapp.acwing.com.cn/logo.png" alt="Ralendar" class="header-logo">
-                <h2>日程提醒</h2>
-            </div>
-        </div>
-        <div class="content">
-            <p>您好 <strong>{event.user.username}</strong>，</p>
-            <p>您有一个即将开始的日程：</p>
-            
-            <div class="event-card">
-                <div class="event-title">📋 {event.title}</div>
-                <div class="event-info"><strong>⏰ 时间：</strong>{start_time}</div>
-                {f'<div class="event-info"><strong>📍 地点：</strong>{event.location or "已设置地理位置"}</div>' if event.has_location else ''}
-                {f'<div class="event-info"><strong>📝 备注：</strong>{event.description}</div>' if event.description else ''}
-                {f'<div class="event-info" style="color: #ff6b6b;">🔔 <strong>来自 Roamio 旅行计划</strong></div>' if event.is_from_roamio else ''}
-                
-                {f'<a href="{event.map_url}" class="button">🗺️ 查看地图导航</a>' if event.map_url else ''}
-            </div>
-            
-            <p>祝您生活愉快！</p>
-        </div>
-        <div class="footer">
-            <p><strong>Ralendar 智能日历系统</strong></p>
-            <p><a href="https://app7626.acapp.acwing.com.cn" style="color: #667eea;">https://app7626.acapp.acwing.com.cn</a></p>
-        </div>
-    </div>
-</body>
-</html>
-        """
-        
         # 发送邮件
-        send_mail(
-            subject=subject,
-            message=message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[event.user.email],
-            html_message=html_message,
-            fail_silently=False,
-        )
+        build_reminder_email(event).send(fail_silently=False)
         
-        # 标记为已发送
-        event.notification_sent = True
-        event.save(update_fields=['notification_sent'])
+        # 标记为已发送（重复事件推进到下一次发生）
+        mark_reminders_sent([event.id])
         
         print(f"✅ 成功发送提醒邮件：{event.title} -> {event.user.email}")
         return True
@@ -147,6 +108,54 @@ https://app7626.acapp.acwing.com.cn
         return False
 
 
+@shared_task
+def send_reminder_batch(event_ids):
+    """
+    批量发送一组事件的提醒邮件
+    
+    整批复用一个 SMTP 连接；发送成功的事件用一条 UPDATE 标记为已发送，
+    单个地址失败只记入失败统计，不影响同批其他邮件
+
+    只发送仍在到期窗口内的事件：重复事件可能被相邻两分钟的调度各排入一批，
+    先执行的一批发送后 remind_at 已推进到下一次发生，后一批不能再发
+    
+    Args:
+        event_ids: 事件 ID 列表
+    
+    Returns:
+        dict: {'sent': 成功数, 'failed': 失败数, 'failures': [...]}
+    """
+    from .utils.mail_delivery import send_batch
+    from .utils.reminder_scheduler import REMINDER_GRACE_MINUTES, mark_reminders_sent
+    
+    # 一次查询取出整批仍然到期的事件和用户
+    now = timezone.now()
+    events = Event.objects.filter(
+        id__in=event_ids,
+        notification_sent=False,
+        remind_at__gt=now - timedelta(minutes=REMINDER_GRACE_MINUTES),
+        remind_at__lte=now,
+    ).select_related('user')
+    
+    messages = []
+    for event in events:
+        if not event.user.email:
+            continue
+        try:
+            messages.append((event.id, build_reminder_email(event)))
+        except Exception as e:
+            logger.error(f"构建提醒邮件失败（事件 {event.id}）：{str(e)}")
+    
+    result = send_batch(messages)
+    mark_reminders_sent(result.sent)
+    
+    for event_id, error in result.failed:
+        logger.warning(f"❌ 提醒邮件发送失败（事件 {event_id}）：{error}")
+    print(f"📨 批量提醒：成功 {result.sent_count} 封，失败 {result.failed_count} 封")
+    
+    return result.as_dict()
+
+
 @shared_task
 def check_and_send_reminders():
     """
@@ -154,47 +163,33 @@ def check_and_send_reminders():
     每分钟执行一次
     
     逻辑：
-    1. 查找所有启用邮件提醒且尚未发送的事件
-    2. 计算每个事件的实际提醒时间（start_time - reminder_minutes）
-    3. 只发送那些提醒时间在当前分钟内的事件
+    1. 事件保存时已计算好提醒时间（Event.remind_at = start_time - reminder_minutes）
+    2. 按 remind_at 索引只读取当前分钟到期、尚未发送的事件
+    3. 每次执行的开销只与到期提醒数量有关，与时间窗口内的事件总数无关
+    4. 到期事件按 REMINDER_BATCH_SIZE 分批，交给 send_reminder_batch 批量发送
+    5. 重复事件的 remind_at 指向下一次发生，发送后推进到再下一次
     """
-    now = timezone.now()
+    from .utils.mail_delivery import chunked
+    from .utils.recurrence import reminder_occurrence
+    from .utils.reminder_scheduler import advance_stale_recurring_reminders, due_reminders
     
-    # 查找未来最多 60 分钟内的所有待提醒事件
-    # （支持用户设置的最大提前提醒时间，如提前1天=1440分钟）
-    max_advance = timedelta(minutes=1440)  # 最大支持提前1天
-    reminder_end = now + max_advance
-    
-    # 查找所有可能需要提醒的事件
-    candidate_events = Event.objects.filter(
-        start_time__gte=now,  # 事件还没开始
-        start_time__lte=reminder_end,  # 事件在时间窗口内
-        email_reminder=True,  # 启用了邮件提醒
-        notification_sent=False,  # 尚未发送
-        user__email__isnull=False,  # 有邮箱
-        user__email__gt='',
-    ).select_related('user')
+    # 错过窗口的重复事件推进到下一次发生
+    advance_stale_recurring_reminders()
     
-    sent_count = 0
+    event_ids = []
     
-    for event in candidate_events:
-        # 计算实际的提醒时间
-        reminder_time = event.start_time - timedelta(minutes=event.reminder_minutes)
-        
-        # 检查是否应该在当前时刻发送提醒
-        # 容差范围：提醒时间 <= 当前时间 < 提醒时间 + 2分钟
-        # （考虑到 Celery Beat 可能有1-2分钟的延迟）
-        time_diff = (now - reminder_time).total_seconds() / 60
-        
-        if 0 <= time_diff < 2:
-            # 应该发送提醒
-            send_event_reminder_email.delay(event.id)
-            sent_count += 1
-            print(f"🔔 发送提醒：{event.title}")
-            print(f"   事件时间：{timezone.localtime(event.start_time)}")
-            print(f"   提前：{event.reminder_minutes}分钟")
-            print(f"   用户：{event.user.email}")
+    for event in due_reminders():
+        event_ids.append(event.id)
+        print(f"🔔 发送提醒：{event.title}")
+        print(f"   事件时间：{timezone.localtime(reminder_occurrence(event).start_time)}")
+        print(f"   提前：{event.reminder_minutes}分钟")
+        print(f"   用户：{event.user.email}")
     
+    # 按批分发，每批一个任务、一个 SMTP 连接
+    for batch in chunked(event_ids, settings.REMINDER_BATCH_SIZE):
+        send_reminder_batch.delay(batch)
+    
+    sent_count = len(event_ids)
     if sent_count > 0:
         print(f"✅ 本次发送了 {sent_count} 个提醒")
     else:
@@ -203,6 +198,91 @@ def check_and_send_reminders():
     return sent_count
 
 
+@shared_task
+def send_reminder_digests(modes=None):
+    """
+    定时任务：发送汇总提醒
+    每小时整点执行一次
+    
+    逻辑：
+    1. 每小时汇总的用户：每次都发送，覆盖未来 1 小时内将要触发的提醒
+    2. 每日汇总的用户：仅在 REMINDER_DIGEST_HOUR 点发送，覆盖未来 24 小时
+    3. 每个窗口只查询一次，按用户分组，每个用户一封邮件
+    4. 发送成功的事件标记为已发送，逐分钟任务不会再单独提醒
+    
+    Args:
+        modes: 指定要发送的汇总模式列表（默认按当前时间自动判断）
+    
+    Returns:
+        dict: {模式: {'users': 用户数, 'events': 事件数, 'sent': 成功邮件数, 'failed': 失败邮件数}}
+    """
+    from .models import ReminderPreference
+    from .utils.mail_delivery import chunked, send_batch
+    from .utils.reminder_scheduler import digest_reminders, group_by_user, mark_reminders_sent
+    
+    now = timezone.now()
+    if modes is None:
+        modes = [ReminderPreference.DIGEST_HOURLY]
+        if timezone.localtime(now).hour == settings.REMINDER_DIGEST_HOUR:
+            modes.append(ReminderPreference.DIGEST_DAILY)
+    
+    stats = {}
+    for mode in modes:
+        messages = []
+        event_ids_by_user = {}
+        
+        grouped = group_by_user(digest_reminders(mode, now))
+        for user, events in grouped:
+            event_ids_by_user[user.id] = [event.id for event in events]
+            try:
+                if len(events) == 1:
+                    email = build_reminder_email(events[0])
+                else:
+                    email = build_digest_email(user, events)
+                messages.append((user.id, email))
+            except Exception as e:
+                logger.error(f"构建汇总提醒邮件失败（用户 {user.id}）：{str(e)}")
+        
+        mode_stats = {
+            'users': len(grouped),
+            'events': sum(len(ids) for ids in event_ids_by_user.values()),
+            'sent': 0,
+            'failed': 0,
+        }
+        
+        for batch in chunked(messages, settings.REMINDER_BATCH_SIZE):
+            result = send_batch(batch)
+            mark_reminders_sent(
+                event_id for user_id in result.sent for event_id in event_ids_by_user[user_id]
+            )
+            for user_id, error in result.failed:
+                logger.warning(f"❌ 汇总提醒发送失败（用户 {user_id}）：{error}")
+            mode_stats['sent'] += result.sent_count
+            mode_stats['failed'] += result.failed_count
+        
+        print(f"📬 {mode} 汇总提醒：{mode_stats['users']} 位用户，{mode_stats['events']} 个事件，"
+              f"成功 {mode_stats['sent']} 封，失败 {mode_stats['failed']} 封")
+        stats[mode] = mode_stats
+    
+    return stats
+
+
+@shared_task
+def purge_event_tombstones():
+    """
+    定时任务：清理过期的事件删除记录
+    每天凌晨执行
+    
+    超过 EVENT_TOMBSTONE_RETENTION_DAYS 的记录不再需要：
+    持有更早同步令牌的客户端会被要求全量同步
+    """
+    from .utils.delta_sync import purge_tombstones
+    
+    deleted = purge_tombstones()
+    print(f"🧹 清理了 {deleted} 条过期的事件删除记录")
+    return deleted
+
+
 @shared_task
 def sync_holiday_data():
     """
@@ -251,3 +331,226 @@ def sync_holiday_data():
             'error': error_msg
         }
 
+
+
+@shared_task
+def generate_lunar_calendar():
+    """
+    定时任务：生成农历数据表
+    每月1号凌晨执行，保证表中始终有去年到未来几年的数据
+    
+    数据是确定的：已生成且没有变化的日期不会重复写入
+    """
+    try:
+        from .utils.lunar_table import generate_years
+        
+        current_year = timezone.now().year
+        start_year = current_year - settings.LUNAR_CALENDAR_YEARS_BEHIND
+        end_year = current_year + settings.LUNAR_CALENDAR_YEARS_AHEAD
+        
+        logger.info(f"🔄 生成农历数据: {start_year} - {end_year}")
+        result = generate_years(start_year, end_year)
+        
+        return {
+            'success': True,
+            'years': f'{start_year}-{end_year}',
+            **result
+        }
+        
+    except Exception as e:
+        error_msg = f'农历数据生成失败: {str(e)}'
+        logger.error(f"❌ {error_msg}")
+        print(f"❌ {error_msg}")
+        
+        return {
+            'success': False,
+            'error': error_msg
+        }
+
+
+@shared_task
+def precompute_daily_fortunes():
+    """
+    定时任务：预生成运势
+    每天凌晨执行，生成今天和未来 FORTUNE_PRECOMPUTE_DAYS 天的通用、生肖、星座运势
+    
+    接口读取预生成的记录，只叠加实时天气
+    """
+    try:
+        from .utils.fortune import precompute
+        
+        logger.info("🔄 开始预生成运势...")
+        result = precompute()
+        
+        return {
+            'success': True,
+            **result
+        }
+        
+    except Exception as e:
+        error_msg = f'运势预生成失败: {str(e)}'
+        logger.error(f"❌ {error_msg}")
+        print(f"❌ {error_msg}")
+        
+        return {
+            'success': False,
+            'error': error_msg
+        }
+
+
+@shared_task
+def send_daily_fortunes(force=False):
+    """
+    定时任务：每日运势推送
+    每天早上执行，给打开了每日推送的用户发送当天的生肖 / 星座运势
+    
+    逻辑：
+    1. 订阅用户按 ID 流式读取，每 FORTUNE_NOTIFY_BATCH_SIZE 人一批，读到一批就分发一批
+       给 send_fortune_batch（每批一次查询、一个 SMTP 连接），不在内存中攒下全部批次
+    2. 各批把结果累加到共享缓存中的进度计数，最后完成的一批（或分发结束时已全部完成）
+       调用 finish_daily_fortunes 汇总吞吐量，写入 DataSyncLog
+    3. 当天已经推送过（或正在推送）时跳过，避免重复发送；
+       停在“推送中”超过 FORTUNE_NOTIFY_TIMEOUT_MINUTES 的记录（worker 崩溃、批次丢失）记为失败
+    
+    Args:
+        force: 忽略当天的推送记录，重新推送
+    """
+    from .models import DataSyncLog
+    from .utils.fortune_notify import claim_finish, set_total_batches, subscriber_batches
+    
+    today = timezone.localdate()
+    now = timezone.now()
+    DataSyncLog.objects.filter(
+        data_type='fortune_notify',
+        status='syncing',
+        started_at__lt=now - timedelta(minutes=settings.FORTUNE_NOTIFY_TIMEOUT_MINUTES),
+    ).update(status='failed', error_message='推送超时：没有收到全部批次的结果', completed_at=now)
+    
+    already_sent = DataSyncLog.objects.filter(
+        data_type='fortune_notify',
+        sync_date=today,
+        status__in=['syncing', 'success'],
+    ).exists()
+    if already_sent and not force:
+        print(f"✓ {today} 的运势已推送，跳过")
+        return {'skipped': True}
+    
+    log = DataSyncLog.objects.create(
+        data_type='fortune_notify',
+        status='syncing',
+        sync_date=today,
+        started_at=now,
+    )
+    
+    total = 0
+    try:
+        for user_ids in subscriber_batches():
+            send_fortune_batch.delay(today.isoformat(), user_ids, log.id)
+            total += 1
+    except Exception as e:
+        # 已分发的批次照常发送，但总批数未知、不会汇总，直接记为失败
+        log.status = 'failed'
+        log.error_message = f"分发到第 {total + 1} 批时出错：{e}"
+        log.completed_at = timezone.now()
+        log.save(update_fields=['status', 'error_message', 'completed_at'])
+        raise
+    
+    set_total_batches(log.id, total)
+    if claim_finish(log.id):
+        # 没有订阅用户，或者各批在分发结束前就已全部完成
+        finish_daily_fortunes(log.id)
+    print(f"📨 每日运势：分发 {total} 批")
+    return {'batches': total}
+
+
+@shared_task
+def send_fortune_batch(day, user_ids, log_id=None):
+    """
+    给一批用户发送运势邮件
+    
+    整批出错（如连不上 SMTP）时整批记为失败，同样计入进度，
+    推送记录不会因为一批出错而一直停在“推送中”
+    
+    Args:
+        day: 运势日期（YYYY-MM-DD）
+        user_ids: 用户 ID 列表
+        log_id: 所属推送的 DataSyncLog ID（结果累加到该次推送的进度）
+    
+    Returns:
+        dict: {'users', 'sent', 'failed', 'skipped', 'seconds'}
+    """
+    import time
+    from datetime import date
+    from .utils.fortune_notify import add_progress, claim_finish, deliver_fortune_batch
+    
+    started = time.monotonic()
+    try:
+        result, skipped = deliver_fortune_batch(date.fromisoformat(day), user_ids)
+    except Exception as e:
+        logger.error(f"❌ 运势邮件整批发送失败（{len(user_ids)} 人）：{e}")
+        sent, failed, skipped = 0, len(user_ids), 0
+    else:
+        for user_id, error in result.failed:
+            logger.warning(f"❌ 运势邮件发送失败（用户 {user_id}）：{error}")
+        sent, failed = result.sent_count, result.failed_count
+    seconds = time.monotonic() - started
+    
+    if log_id is not None:
+        add_progress(
+            log_id, users=len(user_ids), sent=sent, failed=failed, skipped=skipped,
+            milliseconds=int(seconds * 1000),
+        )
+        if claim_finish(log_id):
+            finish_daily_fortunes.delay(log_id)
+    
+    return {
+        'users': len(user_ids),
+        'sent': sent,
+        'failed': failed,
+        'skipped': skipped,
+        'seconds': seconds,
+    }
+
+
+@shared_task
+def finish_daily_fortunes(log_id):
+    """
+    汇总每日运势推送的各批结果（共享缓存中的进度计数），记录吞吐量
+    
+    Args:
+        log_id: 本次推送的 DataSyncLog ID
+    """
+    from .models import DataSyncLog
+    from .utils.fortune_notify import get_progress
+    
+    progress = get_progress(log_id)
+    totals = {key: progress[key] for key in ('users', 'sent', 'failed', 'skipped')}
+    batches = progress['batches']
+    batch_seconds = progress['milliseconds'] / 1000
+    
+    log = DataSyncLog.objects.get(id=log_id)
+    completed_at = timezone.now()
+    elapsed = max((completed_at - log.started_at).total_seconds(), 0.001)
+    rate = totals['sent'] / elapsed
+    
+    detail = (
+        f"用户 {totals['users']}，成功 {totals['sent']}，失败 {totals['failed']}，"
+        f"跳过 {totals['skipped']}，{batches} 批，耗时 {elapsed:.1f} 秒，"
+        f"{rate:.1f} 封/秒，批次累计 {batch_seconds:.1f} 秒"
+    )
+    log.status = 'failed' if totals['failed'] and not totals['sent'] else 'success'
+    log.records_count = totals['sent']
+    if log.status == 'failed':
+        log.error_message = f"全部 {totals['failed']} 封运势邮件发送失败"
+    log.details = {
+        **totals,
+        'batches': batches,
+        'seconds': round(elapsed, 3),
+        'per_second': round(rate, 1),
+        'batch_seconds': round(batch_seconds, 3),
+    }
+    log.completed_at = completed_at
+    log.save(update_fields=['status', 'records_count', 'error_message', 'details', 'completed_at'])
+    
+    print(f"📬 每日运势推送：{detail}")
+    return {**totals, 'batches': batches, 'seconds': elapsed, 'per_second': rate}
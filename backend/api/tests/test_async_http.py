@@ -0,0 +1,48 @@
+"""
+异步接口 httpx 客户端的生命周期测试
+
+- ASGI 请求：同一事件循环上的请求共用一个客户端（连接池）
+- WSGI 请求：Django 每个请求新建事件循环，使用请求专用的客户端并在返回前关闭
+"""
+import asyncio
+from asgiref.sync import async_to_sync
+from django.test import AsyncRequestFactory, RequestFactory, SimpleTestCase
+from api.utils import async_http
+
+
+@async_http.async_view(['GET'])
+async def client_view(request):
+    client = async_http.get_client()
+    client_view.clients.append(client)
+    return async_http.json_response({'closed': client.is_closed})
+
+
+class AsyncClientLifetimeTests(SimpleTestCase):
+
+    def setUp(self):
+        client_view.clients = []
+
+    def test_asgi_requests_share_loop_client(self):
+        async def run():
+            factory = AsyncRequestFactory()
+            await client_view(factory.get('/'))
+            await client_view(factory.get('/'))
+            await async_http.get_client().aclose()
+
+        asyncio.run(run())
+        first, second = client_view.clients
+        self.assertIs(first, second)
+
+    def test_wsgi_request_client_is_closed(self):
+        view = async_to_sync(client_view)
+        response = view(RequestFactory().get('/'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertJSONEqual(response.content, {'closed': False})
+        (client,) = client_view.clients
+        self.assertTrue(client.is_closed)
+        self.assertNotIn(client, async_http._clients.values())
+
+    def test_method_not_allowed(self):
+        response = async_to_sync(client_view)(RequestFactory().post('/'))
+        self.assertEqual(response.status_code, 405)
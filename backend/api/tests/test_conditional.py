@@ -0,0 +1,56 @@
+"""
+公开日历 events-json 的条件请求测试
+
+移出、删除事件不会改变剩余事件的 updated_at，
+只带 If-Modified-Since 的客户端也必须拿到新内容，而不是 304
+"""
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from api.models import Event, PublicCalendar
+
+
+class PublicCalendarLastModifiedTests(TestCase):
+
+    def setUp(self):
+        owner = User.objects.create_user(username='holidays')
+        self.calendar = PublicCalendar.objects.create(
+            name='节假日', url_slug='holidays', created_by=owner
+        )
+        start = timezone.now() + timedelta(days=1)
+        self.events = [
+            Event.objects.create(
+                user=owner, title=f'事件 {i}',
+                start_time=start + timedelta(hours=i), end_time=start + timedelta(hours=i, minutes=30),
+            )
+            for i in range(3)
+        ]
+        self.calendar.events.add(*self.events)
+        # 把现有数据的时间都移到一天前，之后的变化一定晚于客户端拿到的 Last-Modified
+        yesterday = timezone.now() - timedelta(days=1)
+        Event.objects.update(updated_at=yesterday)
+        PublicCalendar.objects.update(changed_at=yesterday)
+        self.client = APIClient()
+        self.url = f'/api/v1/calendars/{self.calendar.url_slug}/events-json/'
+
+    def fetch(self, **headers):
+        return self.client.get(self.url, **headers)
+
+    def assert_modified_since_first_fetch(self, change):
+        first = self.fetch()
+        self.assertEqual(first.status_code, 200)
+        last_modified = first['Last-Modified']
+        self.assertEqual(self.fetch(HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+        change()
+        response = self.fetch(HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['events_count'], 2)
+
+    def test_removed_event_invalidates_last_modified(self):
+        self.assert_modified_since_first_fetch(lambda: self.calendar.events.remove(self.events[0]))
+
+    def test_deleted_event_invalidates_last_modified(self):
+        self.assert_modified_since_first_fetch(lambda: self.events[0].delete())
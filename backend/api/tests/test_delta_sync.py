@@ -0,0 +1,67 @@
+"""
+增量同步（changes_since）的分页与令牌测试
+"""
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+from api.models import Event
+from api.utils.delta_sync import changes_since
+
+
+class ChangesSinceTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='sync')
+        start = timezone.now() + timedelta(days=1)
+        self.events = [
+            Event.objects.create(
+                user=self.user, title=f'事件 {i}',
+                start_time=start + timedelta(hours=i), end_time=start + timedelta(hours=i, minutes=30),
+            )
+            for i in range(7)
+        ]
+
+    def age_events(self, days):
+        """把事件的 updated_at 改到 days 天前（早于墓碑保留期）"""
+        Event.objects.filter(user=self.user).update(updated_at=timezone.now() - timedelta(days=days))
+
+    def sync_all(self, token=None, limit=3, max_pages=10):
+        """按 has_more 连续拉取，返回每一页的结果"""
+        pages = []
+        while len(pages) < max_pages:
+            changes = changes_since(self.user, token, limit=limit)
+            pages.append(changes)
+            token = changes['sync_token']
+            if not changes['has_more']:
+                break
+        return pages
+
+    def test_full_sync_of_old_events_terminates(self):
+        self.age_events(100)
+        pages = self.sync_all()
+
+        self.assertEqual(len(pages), 3)
+        self.assertFalse(pages[-1]['has_more'])
+        ids = [event.id for page in pages for event in page['events']]
+        self.assertEqual(sorted(ids), sorted(event.id for event in self.events))
+        # 只有第一页要求客户端清空本地数据
+        self.assertEqual([page['reset'] for page in pages], [True, False, False])
+
+    def test_delete_during_full_sync_is_reported(self):
+        self.age_events(100)
+        first = changes_since(self.user, limit=3)
+        deleted_id = first['events'][0].id
+        Event.objects.get(id=deleted_id).delete()
+
+        pages = [first] + self.sync_all(first['sync_token'])
+        self.assertIn(deleted_id, [pk for page in pages[1:] for pk in page['deleted']])
+
+    def test_expired_catch_up_token_resets(self):
+        pages = self.sync_all(limit=10)
+        token = pages[-1]['sync_token']
+
+        with self.settings(EVENT_TOMBSTONE_RETENTION_DAYS=0):
+            changes = changes_since(self.user, token, limit=10)
+        self.assertTrue(changes['reset'])
+        self.assertEqual(len(changes['events']), 7)
@@ -0,0 +1,155 @@
+"""
+事件列表接口的查询次数回归测试
+
+每个返回事件的接口分别在小页（5 条）和大页（40 条）下请求一次，
+查询次数必须相同：派生字段（username、is_public_calendar ...）按页批量计算，
+不能随事件数增加而增加（N+1）
+"""
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from api.models import Event, PublicCalendar
+
+SMALL_PAGE = 5
+LARGE_PAGE = 40
+
+# 两种页大小下都应该相同的查询次数
+EXPECTED_QUERIES = {
+    'list': 5,  # 校验值 2 + COUNT + 事件（JOIN user）+ 公开日历
+    'window': 4,  # 校验值 2 + 窗口 UNION ALL + 公开日历
+    'cursor': 4,
+    'occurrences': 4,
+    'sync': 2,  # 变更（JOIN user）+ 公开日历
+    'fusion_events': 6,  # 用户匹配 + 校验值 2 + 事件 + user + 公开日历
+    'fusion_with_location': 4,
+    'fusion_from_roamio': 4,
+    'calendar_events_json': 4,  # 日历 + 校验值 + 普通事件 + 重复事件
+    'calendar_events_json_window': 3,  # 日历 + 校验值 + 窗口 UNION ALL
+}
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class EventListQueryCountTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.start = timezone.now().replace(microsecond=0) + timedelta(days=1)
+        cls.calendar_owner = User.objects.create_user(username='holidays')
+        cls.calendar = PublicCalendar.objects.create(
+            name='节假日', url_slug='holidays', created_by=cls.calendar_owner
+        )
+
+    def make_user(self, name, count):
+        """创建一个有 count 个事件的用户：部分带地点、部分来自 Roamio、部分在公开日历中、一个重复事件"""
+        user = User.objects.create_user(username=name, email=f'{name}@example.com')
+        events = []
+        for i in range(count):
+            start_time = self.start + timedelta(hours=i)
+            events.append(Event.objects.create(
+                user=user,
+                title=f'事件 {i}',
+                start_time=start_time,
+                end_time=start_time + timedelta(minutes=30),
+                latitude=28.68 if i % 2 == 0 else None,
+                longitude=115.86 if i % 2 == 0 else None,
+                map_provider='amap' if i % 2 == 0 else '',
+                source_app='roamio' if i % 3 == 0 else 'ralendar',
+                recurrence_rule='FREQ=DAILY;COUNT=3' if i == 0 else '',
+            ))
+        self.calendar.events.add(*events[::4])
+        return user
+
+    def make_calendar(self, name, count):
+        """创建一个有 count 个事件（其中一个重复事件）的公开日历"""
+        user = self.make_user(name, count)
+        calendar = PublicCalendar.objects.create(name=name, url_slug=name, created_by=self.calendar_owner)
+        calendar.events.add(*Event.objects.filter(user=user))
+        return calendar
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def assert_constant_queries(self, name, request):
+        """request(用户, 事件数) 在两种页大小下的查询次数都等于 EXPECTED_QUERIES[name]"""
+        for size in (SMALL_PAGE, LARGE_PAGE):
+            user = self.make_user(f'{name}_{size}', size)
+            with self.subTest(page_size=size), self.assertNumQueries(EXPECTED_QUERIES[name]):
+                response = request(user, size)
+            self.assertEqual(response.status_code, 200, response.content[:200])
+
+    def window_params(self):
+        return {
+            'start': self.start.date().isoformat(),
+            'end': (self.start + timedelta(days=7)).date().isoformat(),
+        }
+
+    def test_list(self):
+        self.assert_constant_queries(
+            'list', lambda user, size: self.client_for(user).get('/api/v1/events/')
+        )
+
+    def test_window(self):
+        self.assert_constant_queries(
+            'window', lambda user, size: self.client_for(user).get('/api/v1/events/', self.window_params())
+        )
+
+    def test_cursor(self):
+        self.assert_constant_queries(
+            'cursor', lambda user, size: self.client_for(user).get(
+                '/api/v1/events/', {'cursor': '', 'page_size': size}
+            )
+        )
+
+    def test_occurrences(self):
+        self.assert_constant_queries(
+            'occurrences', lambda user, size: self.client_for(user).get(
+                '/api/v1/events/occurrences/', self.window_params()
+            )
+        )
+
+    def test_sync(self):
+        self.assert_constant_queries(
+            'sync', lambda user, size: self.client_for(user).get('/api/v1/events/sync/')
+        )
+
+    def test_fusion_events(self):
+        def request(user, size):
+            token = AccessToken.for_user(user)
+            return APIClient().get(
+                '/api/v1/fusion/events/', {'cursor': '', 'page_size': size},
+                HTTP_AUTHORIZATION=f'Bearer {token}',
+            )
+        self.assert_constant_queries('fusion_events', request)
+
+    def test_fusion_with_location(self):
+        self.assert_constant_queries(
+            'fusion_with_location', lambda user, size: self.client_for(user).get(
+                '/api/v1/fusion/events/with-location/'
+            )
+        )
+
+    def test_fusion_from_roamio(self):
+        self.assert_constant_queries(
+            'fusion_from_roamio', lambda user, size: self.client_for(user).get(
+                '/api/v1/fusion/events/from-roamio/'
+            )
+        )
+
+    def test_calendar_events_json(self):
+        # 公开日历的事件数不同（不是分页大小），查询次数同样不能变化
+        for name, params in (
+            ('calendar_events_json', {}),
+            ('calendar_events_json_window', self.window_params()),
+        ):
+            for size in (SMALL_PAGE, LARGE_PAGE):
+                calendar = self.make_calendar(f'{name}_{size}', size)
+                with self.subTest(name, calendar_size=size), self.assertNumQueries(EXPECTED_QUERIES[name]):
+                    response = APIClient().get(f'/api/v1/calendars/{calendar.url_slug}/events-json/', params)
+                self.assertEqual(response.status_code, 200, response.content[:200])
+                # 重复事件（FREQ=DAILY;COUNT=3）展开为 3 次
+                self.assertEqual(response.json()['events_count'], size + 2)
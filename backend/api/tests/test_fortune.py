@@ -0,0 +1,31 @@
+"""
+预生成运势的读取测试
+"""
+from datetime import date
+from unittest import mock
+from django.db import OperationalError
+from django.test import TestCase
+from api.models import DailyFortune
+from api.utils import fortune, fortune_notify
+
+DAY = date(2026, 1, 1)
+
+
+class FortuneDetailsTests(TestCase):
+
+    def test_reads_precomputed_row(self):
+        fortune.precompute(DAY, days=0)
+        with self.assertNumQueries(1):
+            details = fortune.get_details(DAY, 'zodiac', '龙')
+        self.assertEqual(details, fortune.build_details(DAY, 'zodiac', '龙'))
+
+    def test_database_error_falls_back_to_live_generation(self):
+        # 例如运势表还没有迁移：no such table: calendar_fortunes
+        error = OperationalError('no such table: calendar_fortunes')
+        with mock.patch.object(DailyFortune.objects, 'filter', side_effect=error):
+            self.assertEqual(fortune.get_details(DAY), fortune.build_details(DAY, 'daily', None))
+
+            fortune_notify.sign_fragments.cache_clear()
+            fragments = fortune_notify.sign_fragments(DAY)
+        fortune_notify.sign_fragments.cache_clear()
+        self.assertIn(('constellation', '天蝎座'), fragments)
@@ -0,0 +1,83 @@
+"""
+每日运势推送的分发与汇总测试（测试配置中 Celery 任务同步执行）
+"""
+from datetime import date, timedelta
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from api import tasks
+from api.models import DataSyncLog, UserFortune
+
+
+@override_settings(FORTUNE_NOTIFY_BATCH_SIZE=2, FORTUNE_NOTIFY_TIMEOUT_MINUTES=120)
+class SendDailyFortunesTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        for i in range(5):
+            user = User.objects.create_user(username=f'fortune{i}', email=f'fortune{i}@example.com')
+            UserFortune.objects.create(
+                user=user, birth_date=date(2000, 1, 1), zodiac='龙', constellation='摩羯座',
+                notify_daily=True,
+            )
+
+    def latest_log(self):
+        return DataSyncLog.objects.filter(data_type='fortune_notify').latest('id')
+
+    def test_batches_are_summarised(self):
+        result = tasks.send_daily_fortunes()
+
+        self.assertEqual(result, {'batches': 3})
+        self.assertEqual(len(mail.outbox), 5)
+        log = self.latest_log()
+        self.assertEqual(log.status, 'success')
+        self.assertEqual(log.records_count, 5)
+        self.assertEqual(log.details['batches'], 3)
+        self.assertEqual(log.details['sent'], 5)
+        self.assertIsNone(log.error_message)
+        # 同一天不会重复推送
+        self.assertEqual(tasks.send_daily_fortunes(), {'skipped': True})
+
+    def test_last_batch_finishes_when_batches_run_after_dispatch(self):
+        # 真实部署时各批在 worker 中异步执行，分发结束时通常还没有完成
+        queued = []
+        with mock.patch.object(tasks.send_fortune_batch, 'delay', side_effect=lambda *args: queued.append(args)):
+            tasks.send_daily_fortunes()
+        self.assertEqual(self.latest_log().status, 'syncing')
+
+        for args in queued:
+            tasks.send_fortune_batch(*args)
+        log = self.latest_log()
+        self.assertEqual(log.status, 'success')
+        self.assertEqual(log.records_count, 5)
+
+    def test_failed_batch_still_finishes_the_log(self):
+        with mock.patch('api.utils.fortune_notify.deliver_fortune_batch', side_effect=ConnectionError('SMTP 不可用')):
+            tasks.send_daily_fortunes()
+
+        log = self.latest_log()
+        self.assertEqual(log.status, 'failed')
+        self.assertEqual(log.details['failed'], 5)
+        self.assertIn('失败', log.error_message)
+
+    def test_stale_syncing_log_does_not_block_today(self):
+        stale = DataSyncLog.objects.create(
+            data_type='fortune_notify', status='syncing', sync_date=timezone.localdate(),
+            started_at=timezone.now() - timedelta(hours=3),
+        )
+
+        self.assertEqual(tasks.send_daily_fortunes(), {'batches': 3})
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, 'failed')
+        self.assertEqual(self.latest_log().status, 'success')
+
+    def test_recent_syncing_log_is_respected(self):
+        DataSyncLog.objects.create(
+            data_type='fortune_notify', status='syncing', sync_date=timezone.localdate(),
+            started_at=timezone.now() - timedelta(minutes=5),
+        )
+        self.assertEqual(tasks.send_daily_fortunes(), {'skipped': True})
+        self.assertEqual(len(mail.outbox), 0)
@@ -0,0 +1,58 @@
+"""
+节假日索引的跨进程失效测试
+
+其他进程（Celery 同步、管理命令）只能通过共享缓存里的版本号通知 web 进程，
+这里直接操作缓存模拟“另一个进程”的修改
+"""
+from datetime import date
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase
+from api.models import Holiday
+from api.utils import holiday_index
+
+# 没有 api/data/holidays_{year}.json 的年份，数据只来自数据库
+YEAR = 2031
+
+
+class HolidayIndexInvalidationTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        holiday_index._local_indexes.clear()
+
+    def add_holiday(self, day, name):
+        # bulk_create 不触发信号，相当于其他进程写入了数据库
+        Holiday.objects.bulk_create([Holiday(
+            date=day, name=name, type='major', is_legal_holiday=True, is_rest_day=True,
+        )])
+
+    def test_version_bump_from_another_process_rebuilds_index(self):
+        self.add_holiday(date(YEAR, 1, 1), '元旦')
+        self.assertEqual(holiday_index.get_index(YEAR).lookup(date(YEAR, 1, 1))['holiday_name'], '元旦')
+
+        self.add_holiday(date(YEAR, 5, 1), '劳动节')
+        # 另一个进程的 invalidate_year：只改共享缓存，不会清掉本进程的副本
+        cache.incr(holiday_index._version_key(YEAR))
+
+        info = holiday_index.get_holiday_info(date(YEAR, 5, 1))
+        self.assertEqual(info['holiday_name'], '劳动节')
+
+    def test_unavailable_year_is_rechecked(self):
+        with mock.patch.object(holiday_index, 'LOCAL_INDEX_SECONDS', 0), \
+                mock.patch.object(holiday_index, 'UNAVAILABLE_CACHE_SECONDS', 0):
+            self.assertIsNone(holiday_index.get_index(YEAR))
+            # 同步写入了数据，但通知丢失（没有递增版本号）
+            self.add_holiday(date(YEAR, 1, 1), '元旦')
+            self.assertIsNotNone(holiday_index.get_index(YEAR))
+
+    def test_evicted_version_does_not_reuse_old_index(self):
+        self.add_holiday(date(YEAR, 1, 1), '元旦')
+        holiday_index.get_index(YEAR)
+        holiday_index.invalidate_year(YEAR)
+        old_version = holiday_index.get_version(YEAR)
+
+        cache.delete(holiday_index._version_key(YEAR))  # 版本号被淘汰
+        later = (old_version + 1) / 1000
+        with mock.patch.object(holiday_index.time, 'time', return_value=later):
+            self.assertGreater(holiday_index.get_version(YEAR), old_version)
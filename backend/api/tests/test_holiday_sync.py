@@ -0,0 +1,153 @@
+"""
+节假日同步的并发下载与重试测试
+
+在本地起一个 Timor API 桩服务（固定延迟），HolidaySyncService(api_base=...) 指向它：
+- 多个年份并发下载
+- 503 之后重试成功
+- 一直返回 500 的年份最终失败，不影响、也不拖住其他年份
+"""
+import json
+import threading
+import time
+from collections import Counter
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from api.models import DataSyncLog, Holiday, HolidaySourceState
+from api.utils.holiday_sync import FetchResult, HolidaySyncService
+
+DELAY = 0.2
+FLAKY_YEAR = 2032    # 第一次 503，重试成功
+BROKEN_YEAR = 2033   # 一直 500
+YEARS = range(2031, 2035)
+
+
+class TimorStub(ThreadingHTTPServer):
+    """Timor 节假日 API 桩服务：记录每个年份的请求次数、完成时间和同时处理中的请求数峰值"""
+    daemon_threads = True
+
+    def __init__(self):
+        self.requests = Counter()
+        self.finished = {}
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+        super().__init__(('127.0.0.1', 0), TimorStubHandler)
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}/api/holiday'
+
+
+class TimorStubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        server = self.server
+        year = int(self.path.rstrip('/').rsplit('/', 1)[-1])
+        with server.lock:
+            server.requests[year] += 1
+            attempt = server.requests[year]
+            server.active += 1
+            server.peak = max(server.peak, server.active)
+        try:
+            time.sleep(DELAY)
+        finally:
+            with server.lock:
+                server.active -= 1
+                server.finished[year] = time.monotonic()
+
+        if year == BROKEN_YEAR or (year == FLAKY_YEAR and attempt == 1):
+            status = 500 if year == BROKEN_YEAR else 503
+            body = b'{}'
+        else:
+            status = 200
+            body = json.dumps({
+                'code': 0,
+                'holiday': {'01-01': {'holiday': True, 'name': '元旦', 'wage': 3}},
+            }).encode('utf-8')
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@override_settings(HOLIDAY_SYNC_RETRIES=2)
+class HolidaySyncFetchTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.stub = TimorStub()
+        threading.Thread(target=self.stub.serve_forever, daemon=True).start()
+        self.addCleanup(self.stub.server_close)
+        self.addCleanup(self.stub.shutdown)
+
+    def test_concurrent_fetch_with_retries(self):
+        service = HolidaySyncService(api_base=self.stub.url, max_workers=len(YEARS))
+        started = time.monotonic()
+        service.sync_multiple_years(YEARS[0], YEARS[-1])
+
+        # 各年份同时下载
+        self.assertEqual(self.stub.peak, len(YEARS))
+
+        # 503 重试一次后成功；500 用完重试次数（1 + 2 次）后放弃
+        self.assertEqual(self.stub.requests[FLAKY_YEAR], 2)
+        self.assertEqual(self.stub.requests[BROKEN_YEAR], 3)
+
+        imported = set(Holiday.objects.values_list('date__year', flat=True))
+        self.assertEqual(imported, {2031, FLAKY_YEAR, 2034})
+        failed = DataSyncLog.objects.filter(data_type='holiday', status='failed')
+        self.assertEqual([log.sync_date.year for log in failed], [BROKEN_YEAR])
+        succeeded = DataSyncLog.objects.filter(data_type='holiday', status='success').first()
+        self.assertIn('inserted', succeeded.details)
+        self.assertIsNone(succeeded.error_message)
+
+        # 其他年份不等失败年份的重试：第一轮请求就已下载完成
+        for year in (2031, 2034):
+            self.assertLess(self.stub.finished[year] - started, DELAY * 2)
+            self.assertLess(self.stub.finished[year], self.stub.finished[BROKEN_YEAR])
+
+
+class HolidaySyncStateTests(TestCase):
+    """上游校验值只在数据完整写入后保存"""
+
+    YEAR = 2031
+    DATA = {'01-01': {'holiday': True, 'name': '元旦', 'wage': 3}}
+
+    def setUp(self):
+        cache.clear()
+        self.service = HolidaySyncService(api_base='http://127.0.0.1:9')
+        # 已有一条内容不同的记录（如人工修改过的描述）
+        Holiday.objects.create(
+            date=date(self.YEAR, 1, 1), name='元旦', type='major',
+            is_legal_holiday=True, is_rest_day=True, description='旧描述',
+        )
+
+    def fetched(self):
+        return FetchResult(data=self.DATA, etag='"v1"')
+
+    def sync(self, replace):
+        state = HolidaySourceState.objects.filter(year=self.YEAR).first()
+        return self.service.apply_fetch_result(self.YEAR, self.fetched(), state, replace=replace)
+
+    def test_skipped_rows_do_not_save_validators(self):
+        self.assertTrue(self.sync(replace=False))
+        self.assertFalse(HolidaySourceState.objects.filter(year=self.YEAR).exists())
+
+        # 之后的 replace=True 同步不会因为相同的哈希跳过写入
+        self.assertTrue(self.sync(replace=True))
+        holiday = Holiday.objects.get(date=date(self.YEAR, 1, 1))
+        self.assertEqual(holiday.description, f'{self.YEAR}年元旦')
+        self.assertEqual(HolidaySourceState.objects.get(year=self.YEAR).etag, '"v1"')
+
+    def test_complete_import_saves_validators(self):
+        Holiday.objects.all().delete()
+        self.assertTrue(self.sync(replace=False))
+        self.assertEqual(HolidaySourceState.objects.get(year=self.YEAR).etag, '"v1"')
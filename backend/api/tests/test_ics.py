@@ -0,0 +1,69 @@
+"""
+iCalendar 订阅中重复事件的时区测试
+
+按客户端的方式展开订阅里的 DTSTART + RRULE，结果必须与服务端（本地时区展开）一致
+"""
+from datetime import date, datetime
+from dateutil.rrule import rrulestr
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+from api.models import Event
+from api.utils.ics import render_calendar
+from api.utils.recurrence import build_rule
+from api.utils.user_feed import feed_window, iter_user_calendar
+
+THANKSGIVINGS = [date(2025, 11, 27), date(2026, 11, 26), date(2027, 11, 25)]
+
+
+def unfold(body):
+    """还原折行（CRLF + 空格）并按行拆分"""
+    return body.replace('\r\n ', '').split('\r\n')
+
+
+def client_expand(body, count):
+    """像订阅客户端一样展开 VEVENT 的重复规则（按 DTSTART 的 TZID 时区）"""
+    lines = unfold(body)
+    lines = lines[lines.index('BEGIN:VEVENT'):]
+    dtstart = next(line for line in lines if line.startswith('DTSTART'))
+    rrule = next(line for line in lines if line.startswith('RRULE:'))
+    rule = rrulestr(f'{dtstart}\n{rrule}')
+    # 客户端在用户所在时区（北京时间）显示
+    return [timezone.localtime(start).date() for start in rule[:count]]
+
+
+class RecurringFeedTimezoneTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='holidays')
+        start = timezone.make_aware(datetime(2025, 11, 27, 0, 0))
+        self.event = Event.objects.create(
+            user=self.user, title='感恩节',
+            start_time=start, end_time=start.replace(hour=23, minute=59),
+            recurrence_rule='FREQ=YEARLY;BYMONTH=11;BYDAY=+4TH',
+        )
+
+    def test_public_feed_expands_on_local_dates(self):
+        body = render_calendar('国际节日', [self.event])
+        lines = unfold(body)
+
+        self.assertIn('DTSTART;TZID=Asia/Shanghai:20251127T000000', lines)
+        self.assertIn('DTEND;TZID=Asia/Shanghai:20251127T235900', lines)
+        self.assertIn('TZID:Asia/Shanghai', lines)
+        self.assertIn('TZOFFSETTO:+0800', lines)
+        self.assertEqual(client_expand(body, 3), THANKSGIVINGS)
+        # 与服务端的展开一致
+        server = [start.date() for start in build_rule(self.event.recurrence_rule, self.event.start_time)[:3]]
+        self.assertEqual(server, THANKSGIVINGS)
+
+    def test_private_feed_expands_on_local_dates(self):
+        window_start, window_end = feed_window(timezone.make_aware(datetime(2025, 11, 1)))
+        body = ''.join(iter_user_calendar(self.user, window_start, window_end))
+        self.assertEqual(client_expand(body, 3), THANKSGIVINGS)
+
+    def test_single_events_stay_in_utc(self):
+        single = Event.objects.create(
+            user=self.user, title='会议',
+            start_time=timezone.make_aware(datetime(2025, 11, 27, 9, 0)),
+        )
+        self.assertIn('DTSTART:20251127T010000Z', unfold(render_calendar('日历', [single])))
@@ -0,0 +1,51 @@
+"""
+农历表进程内数组的失效测试
+
+其他进程（Celery 生成、管理命令）只能通过共享缓存里的版本号通知 web 进程，
+这里直接操作缓存和数据库模拟“另一个进程”的修改
+"""
+from datetime import date
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase
+from api.models import LunarCalendar
+from api.utils import lunar_table
+
+DAY = date(2031, 1, 1)
+
+
+class LunarTableInvalidationTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        lunar_table._year_tables.clear()
+        lunar_table.populate(DAY, DAY)
+
+    def edit_row(self, lunar_day):
+        # update() 不经过 populate，相当于其他进程改了数据库
+        LunarCalendar.objects.filter(date=DAY).update(lunar_day=lunar_day)
+
+    def test_version_bump_from_another_process_reloads_year(self):
+        original = lunar_table.get_day(DAY)['lunar_day']
+        self.edit_row('测试')
+        self.assertEqual(lunar_table.get_day(DAY)['lunar_day'], original)
+
+        # 另一个进程的 invalidate：只改共享缓存，不会清掉本进程的数组
+        cache.incr(lunar_table._VERSION_KEY)
+        self.assertEqual(lunar_table.get_day(DAY)['lunar_day'], '测试')
+
+    def test_local_table_expires_without_invalidation(self):
+        with mock.patch.object(lunar_table, 'LOCAL_TABLE_SECONDS', 0):
+            lunar_table.get_day(DAY)
+            self.edit_row('测试')
+            self.assertEqual(lunar_table.get_day(DAY)['lunar_day'], '测试')
+
+    def test_evicted_version_does_not_reuse_old_table(self):
+        lunar_table.get_day(DAY)
+        lunar_table.invalidate()
+        old_version = lunar_table.get_version()
+
+        cache.delete(lunar_table._VERSION_KEY)  # 版本号被淘汰
+        later = (old_version + 1) / 1000
+        with mock.patch.object(lunar_table.time, 'time', return_value=later):
+            self.assertGreater(lunar_table.get_version(), old_version)
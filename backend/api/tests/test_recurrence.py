@@ -0,0 +1,54 @@
+"""
+重复事件展开的窗口边界和次数上限测试
+"""
+from datetime import datetime, timedelta
+from django.test import SimpleTestCase
+from django.utils import timezone
+from api.models import Event
+from api.utils import recurrence
+
+START = timezone.make_aware(datetime(2026, 3, 2, 9, 0))  # 周一 09:00
+
+
+def make_event(rule='', minutes=60):
+    return Event(title='周会', start_time=START, end_time=START + timedelta(minutes=minutes), recurrence_rule=rule)
+
+
+class OccurrenceWindowTests(SimpleTestCase):
+
+    def test_occurrence_ending_at_window_start_is_excluded(self):
+        week = timedelta(days=7)
+        for rule in ('', 'FREQ=WEEKLY'):
+            event = make_event(rule)
+            ends = START + week + timedelta(hours=1) if rule else START + timedelta(hours=1)
+            # 与普通事件一致：恰好在窗口起点结束的不算，跨过窗口起点的算
+            self.assertEqual(recurrence.occurrence_starts(event, ends, ends + timedelta(hours=1)), [])
+            self.assertEqual(
+                len(recurrence.occurrence_starts(event, ends - timedelta(minutes=30), ends + timedelta(hours=1))), 1
+            )
+
+    def test_zero_length_occurrence_at_window_start_is_included(self):
+        event = make_event('FREQ=WEEKLY', minutes=0)
+        self.assertEqual(recurrence.occurrence_starts(event, START, START + timedelta(hours=1)), [START])
+
+    def test_occurrence_starting_at_window_end_is_excluded(self):
+        event = make_event('FREQ=DAILY')
+        window_end = START + timedelta(days=2)
+        starts = recurrence.occurrence_starts(event, START, window_end)
+        self.assertEqual(starts, [START, START + timedelta(days=1)])
+
+
+class RuleLimitTests(SimpleTestCase):
+
+    def test_until_is_capped_like_count(self):
+        far = 'FREQ=DAILY;UNTIL=20300101T000000Z'
+        with self.assertRaises(ValueError):
+            recurrence.validate_rule(far, START)
+        near = 'FREQ=DAILY;UNTIL=20260401T000000Z'
+        self.assertEqual(recurrence.validate_rule(near, START), near)
+        self.assertEqual(recurrence.last_occurrence_start(near, START), START + timedelta(days=29))  # UNTIL 是本地 08:00
+
+    def test_legacy_far_until_is_treated_as_unbounded(self):
+        # 加上限之前保存的规则：不整个展开，按无限重复处理
+        rule = 'FREQ=DAILY;UNTIL=20990101T000000Z'
+        self.assertIsNone(recurrence.last_occurrence_start(rule, START))
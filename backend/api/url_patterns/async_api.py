@@ -0,0 +1,29 @@
+"""
+异步接口路由（挂载在 async/ 下）
+与同步接口的路径、参数、返回相同，等待上游服务时不占用工作线程；
+需要用 ASGI 服务器部署（start_asgi.sh 启动 uvicorn），
+nginx.conf 把 /api/v1/async/ 转发到 ASGI 进程（经 uwsgi 访问时也能用，但没有连接池复用）
+"""
+from django.urls import path
+from ..views import (
+    get_weather_async,
+    get_today_fortune_async,
+    parse_event_from_text_async,
+    acwing_login_async,
+    qq_login_async,
+)
+
+urlpatterns = [
+    # 天气查询
+    path('weather/', get_weather_async, name='get_weather_async'),
+    
+    # 运势查询
+    path('fortune/today/', get_today_fortune_async, name='get_today_fortune_async'),
+    
+    # AI助手
+    path('ai/parse-event/', parse_event_from_text_async, name='ai_parse_event_async'),
+    
+    # 第三方登录
+    path('auth/acwing/callback/', acwing_login_async, name='acwing_login_async'),
+    path('auth/qq/callback/', qq_login_async, name='qq_login_async'),
+]
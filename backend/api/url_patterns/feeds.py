@@ -0,0 +1,14 @@
+"""
+个人日历订阅路由
+包括：订阅地址管理、订阅内容（ICS）
+"""
+from django.urls import path
+from ..views import calendar_feed_token, user_calendar_feed
+
+urlpatterns = [
+    # 订阅地址（需要登录）
+    path('token/', calendar_feed_token, name='calendar_feed_token'),
+    
+    # 订阅内容（凭签名令牌访问）
+    path('<str:token>.ics', user_calendar_feed, name='user_calendar_feed'),
+]
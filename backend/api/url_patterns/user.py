@@ -1,12 +1,13 @@
 """
 用户中心相关路由
-包括：用户统计、绑定管理、个人信息、密码修改
+包括：用户统计、绑定管理、个人信息、提醒偏好、密码修改
 """
 from django.urls import path
 from ..views import (
     get_user_stats,
     get_bindings,
     update_profile,
+    reminder_preference,
     change_password,
     unbind_acwing,
     unbind_qq,
@@ -23,6 +24,7 @@ urlpatterns = [
     
     # 个人信息
     path('profile/', update_profile, name='update_profile'),
+    path('reminder-preference/', reminder_preference, name='reminder_preference'),
     path('change-password/', change_password, name='change_password'),
 ]
 
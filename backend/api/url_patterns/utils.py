@@ -5,8 +5,10 @@
 from django.urls import path
 from ..views import (
     get_lunar_date,
+    get_lunar_range,
     get_holidays,
     check_holiday,
+    get_holiday_range,
     get_today_holidays,
     get_today_fortune,
 )
@@ -21,10 +23,12 @@ from ..views.external import weather
 urlpatterns = [
     # 农历转换
     path('lunar/', get_lunar_date, name='lunar'),
+    path('lunar/range/', get_lunar_range, name='lunar_range'),
     
     # 节假日查询
     path('holidays/', get_holidays, name='get_holidays'),
     path('holidays/check/', check_holiday, name='check_holiday'),
+    path('holidays/range/', get_holiday_range, name='get_holiday_range'),
     path('holidays/today/', get_today_holidays, name='get_today_holidays'),
     
     # 节日详情
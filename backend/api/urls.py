@@ -5,7 +5,9 @@ API 主路由配置（模块化版本）
 - auth.py: 认证相关（注册、登录、OAuth）
 - user.py: 用户中心（统计、绑定、个人信息）
 - fusion.py: 融合相关（Roamio × Ralendar）
+- feeds.py: 个人日历订阅（ICS）
 - utils.py: 工具类（农历、节假日）
+- async_api.py: 异步接口（天气、运势、AI解析、第三方登录，ASGI 部署）
 """
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
@@ -29,12 +31,18 @@ urlpatterns = [
     # OAuth 2.0 路由（第三方应用接入）
     path('oauth/', include('api.url_patterns.oauth')),
     
+    # 个人日历订阅路由
+    path('feeds/', include('api.url_patterns.feeds')),
+    
     # 融合功能路由 (Roamio × Ralendar)
     path('fusion/', include('api.url_patterns.fusion')),
     
     # 工具类路由 (农历、节假日)
     path('', include('api.url_patterns.utils')),
     
+    # 异步接口路由（调用上游服务的接口，ASGI 部署）
+    path('async/', include('api.url_patterns.async_api')),
+    
     # AcWing OAuth 特殊回调（需要保持在根路径）
     path('oauth2/receive_code/', acwing_oauth_callback, name='acwing_oauth_callback'),
 ]
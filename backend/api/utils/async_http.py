@@ -0,0 +1,96 @@
+"""
+异步接口共用：httpx 连接池 + 视图装饰器
+
+/api/v1/async/ 下的接口（天气、运势、AI 解析、第三方登录）等待上游时不占用工作线程，
+只有用 ASGI 服务器部署时才有这个效果（start_asgi.sh 启动 uvicorn，nginx 把 /api/v1/async/ 转发过去）：
+- 每个事件循环一个 httpx.AsyncClient，所有请求共用连接池（keep-alive 复用连接）
+- 同时打开的上游连接数由 ASYNC_HTTP_MAX_CONNECTIONS 限制，超出的请求排队等待连接
+
+在 WSGI（uwsgi）下这些接口也能访问，但 Django 为每个请求新建并关闭一个事件循环，
+连接池无法跨请求复用：此时每个请求使用自己的客户端，返回前关闭，不会遗留连接
+"""
+import asyncio
+import contextvars
+import json
+import weakref
+from functools import wraps
+import httpx
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponseNotAllowed, JsonResponse
+
+# 未单独指定时的上游超时（秒）
+DEFAULT_TIMEOUT = 10
+
+# {事件循环: AsyncClient}（ASGI 下事件循环与进程同寿命，客户端随之长期复用）
+_clients = weakref.WeakKeyDictionary()
+
+# WSGI 下当前请求专用的客户端（由 async_view 创建和关闭）
+_request_client = contextvars.ContextVar('async_http_request_client', default=None)
+
+
+def _new_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=settings.ASYNC_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.ASYNC_HTTP_MAX_KEEPALIVE,
+        ),
+        timeout=DEFAULT_TIMEOUT,
+    )
+
+
+def get_client() -> httpx.AsyncClient:
+    """当前请求应使用的 httpx.AsyncClient（只能在协程中调用）"""
+    client = _request_client.get()
+    if client is not None:
+        return client
+
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = _clients[loop] = _new_client()
+    return client
+
+
+def async_view(methods):
+    """
+    异步视图装饰器（Django 4.2 自带的 require_http_methods、csrf_exempt 不支持协程视图）
+
+    - 只允许 methods 中的请求方法，其余返回 405
+    - 与 DRF 的 @api_view 一样免除 CSRF 校验（接口不使用 Session 认证）
+    - 不是经 ASGI 进来的请求（事件循环随请求结束）使用请求专用的客户端，返回前关闭
+    """
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return HttpResponseNotAllowed(methods)
+            if isinstance(request, ASGIRequest):
+                return await view(request, *args, **kwargs)
+
+            async with _new_client() as client:
+                token = _request_client.set(client)
+                try:
+                    return await view(request, *args, **kwargs)
+                finally:
+                    _request_client.reset(token)
+
+        wrapper.csrf_exempt = True
+        return wrapper
+    return decorator
+
+
+def request_data(request) -> dict:
+    """请求体（JSON 或表单），相当于 DRF 的 request.data；格式错误时返回空字典"""
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            return {}
+        return data if isinstance(data, dict) else {}
+    return request.POST.dict()
+
+
+def json_response(data, status: int = 200) -> JsonResponse:
+    """JSON 响应（与 DRF 的默认渲染一致，中文不转义）"""
+    return JsonResponse(data, status=status, safe=False, json_dumps_params={'ensure_ascii': False})
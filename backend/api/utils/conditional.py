@@ -0,0 +1,97 @@
+"""
+条件请求（ETag / Last-Modified）工具
+校验值只用一条聚合查询（行数 + 最大 updated_at）计算，
+数据没变时直接返回 304，不再查询和序列化事件
+"""
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+from django.db.models import Count, Max, Sum
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from api.models import EventTombstone
+
+
+@dataclass
+class Validators:
+    """一个响应的校验值"""
+    etag: str
+    last_modified: Optional[datetime] = None
+
+    @property
+    def last_modified_timestamp(self):
+        if self.last_modified is None:
+            return None
+        return int(self.last_modified.timestamp())
+
+
+def event_validators(request, queryset, *extra, user=None, changed_at=None) -> Validators:
+    """
+    计算事件列表的校验值
+
+    参数:
+        request: 当前请求（路径和查询参数参与 ETag，不同的分页/窗口各自缓存）
+        queryset: 决定响应内容的事件集合
+        *extra: 其他影响响应内容的值（如默认窗口的年份）
+        user: 事件所属用户；提供时把该用户最近的删除时间计入 Last-Modified，
+              删除事件（行数减少、最大 updated_at 不变）也能让 If-Modified-Since 失效
+        changed_at: 事件集合本身最后变化的时间（如公开日历的成员变化时间），
+                    移出、删除事件时同样让 If-Modified-Since 失效
+
+    返回:
+        Validators
+    """
+    stats = queryset.order_by().aggregate(
+        count=Count('id'),
+        last_updated=Max('updated_at'),
+        id_sum=Sum('id'),  # 多对多增删（数量不变、事件不变）时也能感知
+    )
+    last_modified = stats['last_updated']
+
+    if user is not None:
+        last_deleted = EventTombstone.objects.filter(user=user).aggregate(last=Max('deleted_at'))['last']
+        if last_deleted and (last_modified is None or last_deleted > last_modified):
+            last_modified = last_deleted
+
+    if changed_at and (last_modified is None or changed_at > last_modified):
+        last_modified = changed_at
+
+    parts = [
+        request.get_full_path(),
+        request.headers.get('Accept', ''),
+        stats['count'],
+        last_modified.isoformat() if last_modified else '',
+        stats['id_sum'] or 0,
+        *extra,
+    ]
+    digest = hashlib.md5('|'.join(str(part) for part in parts).encode()).hexdigest()
+    return Validators(etag=f'"{digest}"', last_modified=last_modified)
+
+
+def not_modified(request, validators: Validators):
+    """
+    处理 If-None-Match / If-Modified-Since
+
+    返回:
+        HttpResponseNotModified（数据未变），否则 None
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return None
+    response = get_conditional_response(
+        request,
+        etag=validators.etag,
+        last_modified=validators.last_modified_timestamp,
+    )
+    if response is not None:
+        set_validators(response, validators)
+    return response
+
+
+def set_validators(response, validators: Validators):
+    """给响应加上 ETag / Last-Modified 头"""
+    if response.status_code in (200, 304):
+        response['ETag'] = validators.etag
+        if validators.last_modified is not None:
+            response['Last-Modified'] = http_date(validators.last_modified_timestamp)
+    return response
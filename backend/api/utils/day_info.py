@@ -0,0 +1,193 @@
+"""
+日期注解：法定节假日、节日（国际节日 + 按农历换算的传统节日）、农历、调休
+单日查询（check_holiday）和按区间批量查询（月视图/年视图）共用同一套逻辑；
+批量查询按 (年, 月) 预先算好列式数据并缓存
+"""
+import logging
+from datetime import date, timedelta
+from django.core.cache import cache
+from api.utils import festivals, holiday_index, lunar_table
+
+logger = logging.getLogger(__name__)
+
+
+# 国际节日（带Emoji）
+INTERNATIONAL_FESTIVALS = {
+    '01-01': {'name': '元旦', 'emoji': '🎊'},
+    '02-14': {'name': '情人节', 'emoji': '💕'},
+    '03-08': {'name': '国际妇女节', 'emoji': '👩'},
+    '03-12': {'name': '植树节', 'emoji': '🌳'},
+    '04-01': {'name': '愚人节', 'emoji': '🤡'},
+    '05-01': {'name': '国际劳动节', 'emoji': '💪'},
+    '05-04': {'name': '青年节', 'emoji': '🎓'},
+    '06-01': {'name': '国际儿童节', 'emoji': '🧒'},
+    '07-01': {'name': '建党节', 'emoji': '🎉'},
+    '08-01': {'name': '建军节', 'emoji': '🎖️'},
+    '09-10': {'name': '教师节', 'emoji': '📚'},
+    '10-01': {'name': '国庆节', 'emoji': '🇨🇳'},
+    '10-31': {'name': '万圣节', 'emoji': '🎃'},
+    '11-11': {'name': '光棍节 / 双11购物节', 'emoji': '1️⃣'},
+    '12-24': {'name': '平安夜', 'emoji': '🎄'},
+    '12-25': {'name': '圣诞节', 'emoji': '🎅'}
+}
+
+# 一次区间查询最多覆盖的天数（够年视图使用）
+MAX_RANGE_DAYS = 366
+
+# 按月缓存的列式数据保留时间（节假日数据变化时通过版本号失效）
+MONTH_CACHE_SECONDS = 7 * 86400
+
+# 列式数据的格式或节日算法变化时递增，旧缓存随之作废
+COLUMNS_VERSION = 3
+
+
+def lunar_label(target_date: date):
+    """农历日期，如"八月十五"、"闰六月初一"；转换失败时返回 None"""
+    try:
+        info = lunar_table.get_day(target_date)
+        return info['lunar_month'] + info['lunar_day']
+    except Exception as e:
+        logger.warning(f"获取农历失败: {e}")
+        return None
+
+
+def festivals_for(target_date: date, holiday_info) -> list:
+    """
+    某一天的节日列表（法定节假日、国际节日、传统节日，按名称去重）
+
+    参数:
+        holiday_info: holiday_index.get_holiday_info() 的结果（可为 None）
+    """
+    month_day = target_date.strftime('%m-%d')
+    festivals_list = []
+
+    # 如果是法定节假日，也要添加到festivals列表（带emoji）
+    if holiday_info and holiday_info['is_holiday']:
+        # 为法定节假日匹配emoji
+        holiday_emoji = '🎉'
+        for festival in INTERNATIONAL_FESTIVALS.values():
+            if festival['name'] in holiday_info['holiday_name']:
+                holiday_emoji = festival['emoji']
+                break
+
+        festivals_list.append({
+            'name': holiday_info['holiday_name'],
+            'emoji': holiday_emoji,
+            'type': 'legal'
+        })
+
+    # 添加国际节日、传统节日（避免与已添加的节日重复）
+    candidates = (
+        (INTERNATIONAL_FESTIVALS.get(month_day), 'international'),
+        (festivals.festival_on(target_date), 'traditional'),
+    )
+    for festival, festival_type in candidates:
+        if festival and not any(f['name'] == festival['name'] for f in festivals_list):
+            festivals_list.append({
+                'name': festival['name'],
+                'emoji': festival['emoji'],
+                'type': festival_type
+            })
+
+    return festivals_list
+
+
+def build_month(year: int, month: int) -> dict:
+    """
+    计算一个月的列式数据
+
+    返回:
+        {
+            'dates': ['2025-10-01', ...],
+            'lunar': ['八月初十', ...],
+            'is_holiday': [True, ...],
+            'is_workday': [False, ...],     # 调休上班
+            'holiday_name': ['国庆节', ...],  # 非节假日为 None
+            'festivals': [[{'name', 'emoji', 'type'}, ...], ...],
+        }
+    """
+    index = holiday_index.get_index(year)
+    columns = {
+        'dates': [],
+        'lunar': [],
+        'is_holiday': [],
+        'is_workday': [],
+        'holiday_name': [],
+        'festivals': [],
+    }
+
+    day = date(year, month, 1)
+    while day.month == month:
+        info = index.lookup(day) if index is not None else None
+        columns['dates'].append(day.isoformat())
+        columns['lunar'].append(lunar_label(day))
+        columns['is_holiday'].append(bool(info and info['is_holiday']))
+        columns['is_workday'].append(bool(info and info['is_workday']))
+        columns['holiday_name'].append(info['holiday_name'] if info else None)
+        columns['festivals'].append(festivals_for(day, info))
+        day += timedelta(days=1)
+
+    return columns
+
+
+def get_month(year: int, month: int) -> dict:
+    """一个月的列式数据（带缓存，节假日数据版本变化时重新计算）"""
+    cache_key = f'day_info_{COLUMNS_VERSION}_{year}_{month}_v{holiday_index.get_version(year)}'
+    columns = cache.get(cache_key)
+    if columns is None:
+        columns = build_month(year, month)
+        cache.set(cache_key, columns, MONTH_CACHE_SECONDS)
+    return columns
+
+
+def get_range(start: date, end: date) -> dict:
+    """
+    [start, end] 内每一天的注解（列式）
+
+    节日对象去重后放在 festival_table 中，festivals 列只保存下标，
+    一个月视图（42 天）的响应只有几 KB
+
+    异常:
+        ValueError: end 早于 start 或区间超过 MAX_RANGE_DAYS
+    """
+    if end < start:
+        raise ValueError('end 不能早于 start')
+    if (end - start).days + 1 > MAX_RANGE_DAYS:
+        raise ValueError(f'查询区间不能超过 {MAX_RANGE_DAYS} 天')
+
+    result = {
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'dates': [],
+        'lunar': [],
+        'is_holiday': [],
+        'is_workday': [],
+        'holiday_name': [],
+        'festivals': [],
+        'festival_table': [],
+    }
+    festival_ids = {}
+
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        columns = get_month(year, month)
+        first = start.day - 1 if (year, month) == (start.year, start.month) else 0
+        last = end.day if (year, month) == (end.year, end.month) else len(columns['dates'])
+
+        for key in ('dates', 'lunar', 'is_holiday', 'is_workday', 'holiday_name'):
+            result[key].extend(columns[key][first:last])
+        for day_festivals in columns['festivals'][first:last]:
+            ids = []
+            for festival in day_festivals:
+                festival_key = (festival['name'], festival['type'])
+                if festival_key not in festival_ids:
+                    festival_ids[festival_key] = len(result['festival_table'])
+                    result['festival_table'].append(festival)
+                ids.append(festival_ids[festival_key])
+            result['festivals'].append(ids)
+
+        month += 1
+        if month > 12:
+            year, month = year + 1, 1
+
+    return result
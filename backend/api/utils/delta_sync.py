@@ -0,0 +1,152 @@
+"""
+事件增量同步
+客户端带上次的同步令牌请求，只返回此后新建/修改的事件和已删除事件的 ID
+
+令牌记录同步位置 (updated_at, id)：
+- 一次变更过多时按 (updated_at, id) 分页，客户端用返回的令牌继续拉取；
+  全量同步的分页令牌另外记录全量同步开始的时间，后续页不再按保留期判断、不再重置
+- 拉取完毕时令牌回退 SYNC_TOKEN_SKEW，覆盖查询时尚未提交的事务
+  （回退窗口内的事件可能重复下发，客户端按 id 覆盖即可）
+"""
+import base64
+import json
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from api.models import Event, EventTombstone
+
+
+# 每次最多返回的变更事件数
+SYNC_PAGE_SIZE = 500
+
+# 令牌回退时间，覆盖慢事务提交的延迟
+SYNC_TOKEN_SKEW = timedelta(seconds=5)
+
+# 全量同步的起点
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def encode_token(updated_at, pk=0, full_sync_at=None) -> str:
+    """
+    生成同步令牌
+
+    参数:
+        full_sync_at: 全量同步分页时传入全量同步开始的时间
+    """
+    payload = {'t': updated_at.isoformat(), 'i': pk}
+    if full_sync_at is not None:
+        payload['f'] = full_sync_at.isoformat()
+    payload = json.dumps(payload, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_token(token: str):
+    """
+    解析同步令牌
+
+    返回:
+        (updated_at, id, 全量同步开始时间或 None)
+
+    异常:
+        ValueError: 令牌无效
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        updated_at = parse_datetime(payload['t'])
+        pk = int(payload['i'])
+        full_sync_at = parse_datetime(payload['f']) if 'f' in payload else None
+    except (ValueError, KeyError, TypeError):
+        updated_at = None
+    if updated_at is None:
+        raise ValueError('无效的同步令牌')
+    return updated_at, pk, full_sync_at
+
+
+def tombstone_retention() -> timedelta:
+    return timedelta(days=settings.EVENT_TOMBSTONE_RETENTION_DAYS)
+
+
+def changes_since(user, token=None, limit=SYNC_PAGE_SIZE):
+    """
+    获取用户自令牌以来的事件变更
+
+    参数:
+        user: 用户
+        token: 上次返回的同步令牌（为空表示全量同步）
+        limit: 本次最多返回的事件数
+
+    返回:
+        dict: {
+            'events': 新建/修改的事件列表,
+            'deleted': 已删除事件 ID 列表,
+            'sync_token': 下次请求使用的令牌,
+            'has_more': 是否还有未拉取的变更（有则立即用新令牌继续请求）,
+            'reset': 是否为全量同步（客户端应先清空本地数据）,
+        }
+
+    异常:
+        ValueError: 令牌无效
+    """
+    now = timezone.now()
+    reset = not token
+    full_sync_at = None
+
+    if token:
+        since, since_id, full_sync_at = decode_token(token)
+        # 追赶令牌早于墓碑保留期：删除记录可能已被清理，只能全量同步；
+        # 全量同步的分页令牌记录的是最后一条事件的 updated_at，不按保留期判断
+        if full_sync_at is None and since < now - tombstone_retention():
+            reset = True
+    if reset:
+        since, since_id = EPOCH, 0
+        full_sync_at = now
+
+    events = list(
+        Event.objects
+        .filter(user=user, updated_at__lte=now)
+        .filter(Q(updated_at__gt=since) | Q(updated_at=since, id__gt=since_id))
+        .select_related('user')
+        .order_by('updated_at', 'id')[:limit + 1]
+    )
+    has_more = len(events) > limit
+    events = events[:limit]
+
+    deleted = []
+    if not reset:
+        # 全量同步的后续页：只需要全量同步开始之后（可能已在前几页下发）的删除
+        deleted_since = max(since, full_sync_at - SYNC_TOKEN_SKEW) if full_sync_at else since
+        deleted = list(
+            EventTombstone.objects
+            .filter(user=user, deleted_at__gt=deleted_since, deleted_at__lte=now)
+            .values_list('event_id', flat=True)
+            .distinct()
+        )
+
+    if has_more:
+        last = events[-1]
+        next_token = encode_token(last.updated_at, last.id, full_sync_at)
+    else:
+        next_token = encode_token(max(now - SYNC_TOKEN_SKEW, since))
+
+    return {
+        'events': events,
+        'deleted': deleted,
+        'sync_token': next_token,
+        'has_more': has_more,
+        'reset': reset,
+    }
+
+
+def purge_tombstones(now=None) -> int:
+    """
+    清理超过保留期的墓碑记录
+
+    返回:
+        删除的记录数
+    """
+    now = now or timezone.now()
+    deleted, _ = EventTombstone.objects.filter(deleted_at__lt=now - tombstone_retention()).delete()
+    return deleted
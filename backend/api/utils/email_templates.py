@@ -0,0 +1,281 @@
+"""
+提醒邮件模板
+静态骨架（HTML 头部、CSS、页眉页脚）在每个 worker 进程内只编译一次，
+每次发送只填充事件相关的片段；支持一次渲染多个事件（汇总邮件）；
+每日运势邮件共用同一套骨架
+"""
+from functools import lru_cache
+from html import escape
+from typing import Iterable, Tuple
+from django.utils import timezone
+
+
+SITE_URL = 'https://app7626.acapp.acwing.com.cn'
+LOGO_URL = f'{SITE_URL}/logo.png'
+
+REMINDER_CSS = """
+        body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }
+        .container { max-width: 600px; margin: 0 auto; padding: 20px; background: white; }
+        .header { background: linear-gradient(135deg, #667eea, #764ba2); color: white; padding: 30px 20px; border-radius: 12px; text-align: center; }
+        .header-content { display: flex; align-items: center; justify-content: center; gap: 15px; }
+        .header-logo { width: 50px; height: 50px; border-radius: 10px; background: white; padding: 5px; box-shadow: 0 2px 8px rgba(0,0,0,0.2); }
+        .header h2 { margin: 0; font-size: 26px; font-weight: 600; }
+        .content { background: #f9f9f9; padding: 20px; border-radius: 0 0 8px 8px; }
+        .event-card { background: white; padding: 20px; border-radius: 8px; margin: 20px 0; box-shadow: 0 2px 8px rgba(0,0,0,0.1); }
+        .event-title { font-size: 20px; font-weight: bold; color: #667eea; margin-bottom: 10px; }
+        .event-info { margin: 10px 0; }
+        .event-info strong { color: #667eea; }
+        .footer { text-align: center; color: #999; font-size: 12px; margin-top: 20px; }
+        .button { display: inline-block; background: #667eea; color: white; padding: 10px 20px; text-decoration: none; border-radius: 5px; margin-top: 15px; }
+"""
+
+# 骨架中的占位符：问候语 / 事件卡片
+_GREETING = '<!--greeting-->'
+_EVENTS = '<!--events-->'
+
+HTML_SKELETON = f"""
+<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <style>{REMINDER_CSS}    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <div class="header-content">
+                <img src="{LOGO_URL}" alt="Ralendar" class="header-logo">
+                <h2>日程提醒</h2>
+            </div>
+        </div>
+        <div class="content">
+            {_GREETING}
+            {_EVENTS}
+            <p>祝您生活愉快！</p>
+        </div>
+        <div class="footer">
+            <p><strong>Ralendar 智能日历系统</strong></p>
+            <p><a href="{SITE_URL}" style="color: #667eea;">{SITE_URL}</a></p>
+        </div>
+    </div>
+</body>
+</html>
+"""
+
+TEXT_FOOTER = f"""
+---
+Ralendar 日历系统
+{SITE_URL}
+"""
+
+# 事件相关片段（每次发送只填充这些）
+HTML_GREETING = '<p>您好 <strong>{username}</strong>，</p>\n            <p>{intro}</p>'
+HTML_EVENT_CARD = """
+            <div class="event-card">
+                <div class="event-title">📋 {title}</div>
+                <div class="event-info"><strong>⏰ 时间：</strong>{start_time}</div>{extra}
+            </div>"""
+HTML_LOCATION = '\n                <div class="event-info"><strong>📍 地点：</strong>{location}</div>'
+HTML_DESCRIPTION = '\n                <div class="event-info"><strong>📝 备注：</strong>{description}</div>'
+HTML_ROAMIO = '\n                <div class="event-info" style="color: #ff6b6b;">🔔 <strong>来自 Roamio 旅行计划</strong></div>'
+HTML_MAP_BUTTON = '\n                <a href="{map_url}" class="button">🗺️ 查看地图导航</a>'
+
+# 每日运势邮件：标题不同，其余骨架相同
+FORTUNE_SKELETON = HTML_SKELETON.replace('<h2>日程提醒</h2>', '<h2>今日运势</h2>')
+HTML_FORTUNE_CARD = """
+            <div class="event-card">
+                <div class="event-title">🔮 {title} {stars}</div>
+                <div class="event-info"><strong>📝 运势：</strong>{description}</div>
+                <div class="event-info"><strong>✅ 宜：</strong>{good_things}</div>
+                <div class="event-info"><strong>⛔ 忌：</strong>{bad_things}</div>
+                <div class="event-info"><strong>🍀 幸运：</strong>{lucky}</div>
+                <div class="event-info"><strong>💡 提示：</strong>{tip}</div>
+            </div>"""
+
+
+class ReminderTemplate:
+    """编译后的提醒邮件模板（骨架预先切分为静态片段）"""
+
+    def __init__(self, skeleton: str = HTML_SKELETON):
+        head, rest = skeleton.split(_GREETING)
+        middle, tail = rest.split(_EVENTS)
+        self.html_head = head
+        self.html_middle = middle
+        self.html_tail = tail
+
+    # ---------- 单个事件片段 ----------
+
+    @staticmethod
+    def event_fragments(event, tz=None) -> Tuple[str, str]:
+        """
+        渲染单个事件的片段（派生字段只计算一次，纯文本和 HTML 共用）
+
+        返回:
+            (纯文本片段, HTML 片段)
+        """
+        start_time = timezone.localtime(event.start_time, tz).strftime('%Y年%m月%d日 %H:%M')
+        has_location = event.has_location
+        map_url = event.map_url if has_location else None
+
+        text_lines = [f"📋 标题：{event.title}", f"⏰ 时间：{start_time}"]
+        html_extra = []
+
+        if has_location:
+            location = event.location or '已设置地理位置'
+            text_lines.append(f"📍 地点：{location}")
+            html_extra.append(HTML_LOCATION.format(location=escape(location)))
+        if map_url:
+            text_lines.append(f"🗺️ 导航：{map_url}")
+        if event.description:
+            text_lines.append(f"📝 备注：{event.description}")
+            html_extra.append(HTML_DESCRIPTION.format(description=escape(event.description)))
+        if event.is_from_roamio:
+            text_lines.append('🔔 这是来自 Ralendar 旅行计划的提醒')
+            html_extra.append(HTML_ROAMIO)
+        if map_url:
+            html_extra.append(HTML_MAP_BUTTON.format(map_url=escape(map_url)))
+
+        html = HTML_EVENT_CARD.format(
+            title=escape(event.title),
+            start_time=start_time,
+            extra=''.join(html_extra),
+        )
+        return '\n'.join(text_lines), html
+
+    # ---------- 整封邮件 ----------
+
+    def render(self, username: str, events: Iterable, intro: str) -> Tuple[str, str]:
+        """
+        渲染一封邮件（可包含多个事件，一次遍历完成）
+
+        返回:
+            (纯文本, HTML)
+        """
+        tz = timezone.get_current_timezone()
+        return self.render_fragments(
+            username, (self.event_fragments(event, tz) for event in events), intro
+        )
+
+    def render_fragments(self, username: str, fragments: Iterable[Tuple[str, str]], intro: str) -> Tuple[str, str]:
+        """
+        用已渲染好的片段拼出一封邮件
+
+        参数:
+            fragments: [(纯文本片段, HTML 片段)]
+
+        返回:
+            (纯文本, HTML)
+        """
+        html_parts = [
+            self.html_head,
+            HTML_GREETING.format(username=escape(username), intro=intro),
+            self.html_middle,
+        ]
+        text_parts = [f"\n您好 {username}，\n\n{intro}\n"]
+
+        for text, html in fragments:
+            text_parts.append(text)
+            html_parts.append(html)
+
+        html_parts.append(self.html_tail)
+        text_parts.append(TEXT_FOOTER)
+
+        return '\n\n'.join(text_parts), ''.join(html_parts)
+
+
+@lru_cache(maxsize=None)
+def get_reminder_template() -> ReminderTemplate:
+    """获取编译好的模板（每个进程只编译一次）"""
+    return ReminderTemplate()
+
+
+def render_reminder(event) -> Tuple[str, str, str]:
+    """
+    渲染单个事件的提醒邮件
+
+    返回:
+        (主题, 纯文本, HTML)
+    """
+    subject = f"📅 日程提醒：{event.title}"
+    text, html = get_reminder_template().render(
+        event.user.username, [event], '您有一个即将开始的日程：'
+    )
+    return subject, text, html
+
+
+def render_digest(user, events) -> Tuple[str, str, str]:
+    """
+    渲染多个事件的汇总提醒邮件
+
+    参数:
+        user: 收件用户
+        events: 事件列表（按时间排序）
+
+    返回:
+        (主题, 纯文本, HTML)
+    """
+    events = list(events)
+    subject = f"📅 日程提醒：您有 {len(events)} 个即将开始的日程"
+    text, html = get_reminder_template().render(
+        user.username, events, f'您有 {len(events)} 个即将开始的日程：'
+    )
+    return subject, text, html
+
+
+@lru_cache(maxsize=None)
+def get_fortune_template() -> ReminderTemplate:
+    """获取编译好的运势邮件模板（每个进程只编译一次）"""
+    return ReminderTemplate(FORTUNE_SKELETON)
+
+
+def fortune_fragments(title: str, fortune: dict) -> Tuple[str, str]:
+    """
+    渲染一条运势的片段（同一生肖 / 星座的所有订阅用户共用）
+
+    参数:
+        title: 如"属龙 今日运势"
+        fortune: api.utils.fortune.apply_weather() 的结果
+
+    返回:
+        (纯文本片段, HTML 片段)
+    """
+    good_things = '、'.join(fortune['good_things'])
+    bad_things = '、'.join(fortune['bad_things'])
+    lucky = f"{fortune['lucky_color']} · 数字 {fortune['lucky_number']} · {fortune['lucky_element']}"
+
+    text = '\n'.join([
+        f"🔮 {title} {fortune['star_display']}（{fortune['fortune_score']} 分）",
+        f"📝 运势：{fortune['description']}",
+        f"✅ 宜：{good_things}",
+        f"⛔ 忌：{bad_things}",
+        f"🍀 幸运：{lucky}",
+        f"💡 提示：{fortune['weekday_tip']}",
+    ])
+    html = HTML_FORTUNE_CARD.format(
+        title=escape(title),
+        stars=fortune['star_display'],
+        description=escape(fortune['description']),
+        good_things=escape(good_things),
+        bad_things=escape(bad_things),
+        lucky=escape(lucky),
+        tip=escape(fortune['weekday_tip']),
+    )
+    return text, html
+
+
+def render_fortune(user, day, fragments) -> Tuple[str, str, str]:
+    """
+    渲染每日运势邮件
+
+    参数:
+        day: 运势日期
+        fragments: fortune_fragments() 的结果列表
+
+    返回:
+        (主题, 纯文本, HTML)
+    """
+    subject = f"🔮 今日运势：{day.month}月{day.day}日"
+    text, html = get_fortune_template().render_fragments(
+        user.username, fragments, f'这是您 {day.month}月{day.day}日 的运势：'
+    )
+    return subject, text, html
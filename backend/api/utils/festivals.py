@@ -0,0 +1,70 @@
+"""
+农历传统节日
+按农历日期用 lunarcalendar 换算出任意年份的公历日期，不再写死某一年的日期；
+每年的结果在第一次使用时算好（MM-DD -> 节日），之后直接查表
+"""
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Dict, List, Tuple
+from lunarcalendar import Converter, Lunar
+
+
+# 支持的公历年份范围（lunarcalendar 推荐 1900 - 2100）
+MIN_YEAR = 1901
+MAX_YEAR = 2099
+
+# 农历节日：(农历月, 农历日, 名称, Emoji)
+LUNAR_FESTIVALS = [
+    (1, 1, '春节', '🧨'),
+    (1, 15, '元宵节', '🏮'),
+    (5, 5, '端午节', '🐉'),
+    (7, 7, '七夕节', '💕'),
+    (8, 15, '中秋节', '🥮'),
+    (9, 9, '重阳节', '🍵'),
+    (12, 8, '腊八节', '🍜'),
+]
+
+# 除夕是农历年的最后一天（腊月可能只有 29 天），按下一年春节的前一天计算
+NEW_YEARS_EVE = ('除夕', '🏮')
+
+
+def _lunar_to_solar(lunar_year, month, day) -> date:
+    solar = Converter.Lunar2Solar(Lunar(lunar_year, month, day, isleap=False))
+    return date(solar.year, solar.month, solar.day)
+
+
+def _festival_dates(lunar_year) -> List[Tuple[date, str, str]]:
+    """一个农历年内的所有传统节日 [(公历日期, 名称, Emoji)]"""
+    dates = [
+        (_lunar_to_solar(lunar_year, month, day), name, emoji)
+        for month, day, name, emoji in LUNAR_FESTIVALS
+    ]
+    eve = _lunar_to_solar(lunar_year + 1, 1, 1) - timedelta(days=1)
+    dates.append((eve, *NEW_YEARS_EVE))
+    return dates
+
+
+@lru_cache(maxsize=None)
+def traditional_festivals(year: int) -> Dict[str, dict]:
+    """
+    某一公历年的传统节日表
+
+    腊八、除夕可能落在下一个公历年，所以同时换算前一个农历年和当年
+
+    返回:
+        {'MM-DD': {'name': '春节', 'emoji': '🧨'}}（缓存共享，只读），超出支持范围的年份返回空表
+    """
+    if not MIN_YEAR <= year <= MAX_YEAR:
+        return {}
+
+    table = {}
+    for lunar_year in (year - 1, year):
+        for solar_date, name, emoji in _festival_dates(lunar_year):
+            if solar_date.year == year:
+                table.setdefault(solar_date.strftime('%m-%d'), {'name': name, 'emoji': emoji})
+    return dict(sorted(table.items()))
+
+
+def festival_on(target_date: date):
+    """某一天的传统节日（{'name', 'emoji'}），不是节日时返回 None"""
+    return traditional_festivals(target_date.year).get(target_date.strftime('%m-%d'))
@@ -0,0 +1,516 @@
+"""
+今日运势
+运势中与天气无关的部分（宜忌挑选、幸运元素、基础分数）只由日期决定，
+由定时任务提前算好写入 DailyFortune（当天 + 未来 FORTUNE_PRECOMPUTE_DAYS 天，
+通用运势 + 每个生肖 + 每个星座），接口读取后只叠加实时天气
+
+天气会调整宜忌的优先顺序，进而影响后续的随机抽取，所以每条记录按
+天气类型 x 气温区间保存全部组合（variants），叠加天气时取对应的一组，
+结果与逐次现场生成完全一致
+"""
+import logging
+from datetime import date, timedelta
+from typing import Dict, Optional
+from django.conf import settings
+from django.db import DatabaseError
+from django.utils import timezone
+from api.models import DailyFortune, DataSyncLog
+from api.utils.lunar_table import ZODIAC
+
+logger = logging.getLogger(__name__)
+
+
+# 二十四节气数据（2025年）
+SOLAR_TERMS = {
+    '01-05': {'name': '小寒', 'desc': '天气寒冷，宜养生保暖', 'boost': ['读书', '沐浴', '求医'], 'reduce': ['出行', '动土']},
+    '01-20': {'name': '大寒', 'desc': '一年中最冷的时节', 'boost': ['祭祀', '祈福', '修造'], 'reduce': ['移徙', '嫁娶']},
+    '02-03': {'name': '立春', 'desc': '春季开始，万物复苏', 'boost': ['开市', '求财', '纳财', '会友'], 'reduce': ['安葬', '破土']},
+    '02-18': {'name': '雨水', 'desc': '降雨增多，气温回升', 'boost': ['栽种', '祈福', '开市'], 'reduce': ['动土', '修造']},
+    '03-05': {'name': '惊蛰', 'desc': '春雷惊醒蛰伏', 'boost': ['出行', '交易', '求财', '会友'], 'reduce': ['安床', '移徙']},
+    '03-20': {'name': '春分', 'desc': '昼夜平分，春意盎然', 'boost': ['嫁娶', '纳采', '祭祀'], 'reduce': ['诉讼', '词讼']},
+    '04-04': {'name': '清明', 'desc': '天清地明，祭祖扫墓', 'boost': ['祭祀', '扫舍', '修墓'], 'reduce': ['嫁娶', '开市']},
+    '04-20': {'name': '谷雨', 'desc': '雨生百谷，播种佳时', 'boost': ['栽种', '开市', '纳财'], 'reduce': ['移徙', '入宅']},
+    '05-05': {'name': '立夏', 'desc': '夏季开始，气温升高', 'boost': ['出行', '会友', '交易'], 'reduce': ['动土', '破土']},
+    '05-21': {'name': '小满', 'desc': '麦类作物籽粒饱满', 'boost': ['纳财', '开市', '求财'], 'reduce': ['诉讼', '安葬']},
+    '06-05': {'name': '芒种', 'desc': '有芒作物成熟', 'boost': ['栽种', '纳财', '开市'], 'reduce': ['嫁娶', '移徙']},
+    '06-21': {'name': '夏至', 'desc': '白昼最长，阳气最盛', 'boost': ['祈福', '求财', '交易'], 'reduce': ['词讼', '安葬']},
+    '07-07': {'name': '小暑', 'desc': '天气炎热，注意防暑', 'boost': ['沐浴', '求医', '治病'], 'reduce': ['嫁娶', '移徙', '出行']},
+    '07-22': {'name': '大暑', 'desc': '一年中最热的时节', 'boost': ['沐浴', '扫舍', '解除'], 'reduce': ['出行', '开市', '动土']},
+    '08-07': {'name': '立秋', 'desc': '秋季开始，暑去凉来', 'boost': ['开市', '求财', '交易'], 'reduce': ['嫁娶', '移徙']},
+    '08-23': {'name': '处暑', 'desc': '炎热结束，秋高气爽', 'boost': ['出行', '会友', '祭祀'], 'reduce': ['安葬', '破土']},
+    '09-07': {'name': '白露', 'desc': '天气转凉，露水增多', 'boost': ['求医', '治病', '沐浴'], 'reduce': ['嫁娶', '移徙']},
+    '09-23': {'name': '秋分', 'desc': '昼夜平分，丰收时节', 'boost': ['纳财', '开市', '祭祀'], 'reduce': ['诉讼', '词讼']},
+    '10-08': {'name': '寒露', 'desc': '露水将凝，气温下降', 'boost': ['祈福', '祭祀', '求医'], 'reduce': ['嫁娶', '开市']},
+    '10-23': {'name': '霜降', 'desc': '天气渐冷，初霜出现', 'boost': ['纳财', '开市', '修造'], 'reduce': ['移徙', '出行']},
+    '11-07': {'name': '立冬', 'desc': '冬季开始，万物收藏', 'boost': ['祭祀', '修造', '纳财'], 'reduce': ['嫁娶', '移徙', '出行']},
+    '11-22': {'name': '小雪', 'desc': '开始降雪，气温降低', 'boost': ['祭祀', '祈福', '修造'], 'reduce': ['嫁娶', '出行']},
+    '12-07': {'name': '大雪', 'desc': '降雪增多，严寒将至', 'boost': ['修造', '祭祀', '沐浴'], 'reduce': ['嫁娶', '移徙', '出行']},
+    '12-21': {'name': '冬至', 'desc': '阴极阳生，白昼最短', 'boost': ['祭祀', '祈福', '沐浴'], 'reduce': ['嫁娶', '移徙']}
+}
+
+# 黄历宜事列表
+GOOD_THINGS_LIST = [
+    "出行", "会友", "开市", "祈福", "求财", "纳财", "交易",
+    "立券", "移徙", "嫁娶", "祭祀", "安床", "入宅", "动土",
+    "修造", "纳采", "订盟", "理发", "求医", "治病", "沐浴",
+    "扫舍", "裁衣", "作灶", "解除", "栽种", "牧养"
+]
+
+# 黄历忌事列表
+BAD_THINGS_LIST = [
+    "诉讼", "词讼", "动土", "破土", "安葬", "开市", "交易",
+    "纳财", "栽种", "嫁娶", "移徙", "入宅", "安床", "作灶",
+    "修造", "出行", "祈福", "祭祀", "探病", "针灸", "求医",
+    "治病", "裁衣", "解除", "伐木", "捕捉", "畋猎"
+]
+
+# 幸运颜色列表
+LUCKY_COLORS = [
+    "红色", "橙色", "黄色", "绿色", "青色", "蓝色",
+    "紫色", "粉色", "白色", "金色", "银色", "米色"
+]
+
+# 五行列表
+ELEMENTS = ["金", "木", "水", "火", "土"]
+
+# 运势描述列表
+FORTUNE_DESCRIPTIONS = [
+    "今日运势极佳，万事顺意！",
+    "运势平稳，适宜稳扎稳打。",
+    "小有波折，需谨慎行事。",
+    "运势上扬，把握机会！",
+    "诸事顺利，心情愉悦。",
+    "运势一般，保持平常心。",
+    "运势渐好，积极进取！"
+]
+
+
+# 星座列表
+CONSTELLATIONS = [
+    "白羊座", "金牛座", "双子座", "巨蟹座", "狮子座", "处女座",
+    "天秤座", "天蝎座", "射手座", "摩羯座", "水瓶座", "双鱼座"
+]
+
+# 预生成的运势：(运势类型, 生肖或星座)
+FORTUNE_SIGNS = (
+    [('daily', None)]
+    + [('zodiac', sign) for sign in ZODIAC]
+    + [('constellation', sign) for sign in CONSTELLATIONS]
+)
+
+# 生肖 / 星座运势的种子偏移步长（小于 233280 / 25，各运势的随机序列互不相同）
+SIGN_SEED_STEP = 7919
+
+# 天气类型调整的宜事、忌事优先项
+WEATHER_PRIORITY = {
+    'sunny': (['出行', '会友', '祈福', '求财'], []),
+    'rain': (['读书', '沐浴', '扫舍', '修造'], ['出行', '移徙', '嫁娶']),
+    'snow': (['祭祀', '祈福', '沐浴'], ['出行', '嫁娶', '移徙', '开市']),
+    'cloudy': (['祭祀', '修造', '求医'], []),
+    'other': ([], []),
+}
+
+# 气温区间调整的忌事优先项
+TEMPERATURE_PRIORITY = {
+    'hot': ['出行', '开市', '移徙'],
+    'cold': ['出行', '嫁娶', '移徙'],
+    'mild': [],
+}
+
+# 没有天气数据时对应的组合（不调整宜忌）
+NO_WEATHER_VARIANT = 'other-mild'
+
+WEEKDAY_NAMES = ['星期一', '星期二', '星期三', '星期四', '星期五', '星期六', '星期日']
+
+WEEKDAY_TIPS = [
+    "周一元气满满！新的一周，加油开始！💪",
+    "保持节奏，稳步前进！🚀",
+    "周三已过半，坚持就是胜利！🌟",
+    "临近周末，再努力一把！💫",
+    "愉快的周五，周末即将到来！🎉",
+    "周末愉快，享受休闲时光！🌈",
+    "周日放松，为新的一周充电！⚡"
+]
+
+# 批量写入时每批的条数
+BULK_BATCH_SIZE = 500
+
+
+def seeded_random_generator(seed):
+    """基于种子的伪随机数生成器"""
+    def random():
+        nonlocal seed
+        seed = (seed * 9301 + 49297) % 233280
+        return seed / 233280
+    return random
+
+
+def fortune_seed(day: date, fortune_type: str = 'daily', sign: Optional[str] = None) -> int:
+    """运势的随机种子：通用运势只由日期决定，生肖 / 星座运势再加上各自的偏移"""
+    seed = day.year * 10000 + day.month * 100 + day.day
+    if fortune_type == 'zodiac':
+        seed += (ZODIAC.index(sign) + 1) * SIGN_SEED_STEP
+    elif fortune_type == 'constellation':
+        seed += (CONSTELLATIONS.index(sign) + 13) * SIGN_SEED_STEP
+    return seed
+
+
+def weather_variant(weather_data: Optional[dict]) -> str:
+    """天气数据对应的组合键：'天气类型-气温区间'"""
+    if not weather_data:
+        return NO_WEATHER_VARIANT
+    weather = weather_data.get('weather', '')
+    temp = weather_data.get('temperature', 20)
+
+    if '晴' in weather:
+        kind = 'sunny'
+    elif '雨' in weather:
+        kind = 'rain'
+    elif '雪' in weather:
+        kind = 'snow'
+    elif '阴' in weather or '云' in weather:
+        kind = 'cloudy'
+    else:
+        kind = 'other'
+
+    if temp > 30:
+        band = 'hot'
+    elif temp < 5:
+        band = 'cold'
+    else:
+        band = 'mild'
+    return f'{kind}-{band}'
+
+
+def _prioritize(items, priority):
+    """把优先项提到列表前面"""
+    if not priority:
+        return items
+    return list(priority) + [item for item in items if item not in priority]
+
+
+def select_fortune(seed: int, solar_term_data: Optional[dict], variant: str) -> dict:
+    """
+    运势中与实时天气无关的部分（确定性算法）
+
+    参数:
+        seed: fortune_seed() 的结果
+        solar_term_data: 节气数据
+        variant: weather_variant() 的结果（决定宜忌的优先顺序）
+
+    返回:
+        {'good_things', 'bad_things', 'lucky_color', 'lucky_number', 'lucky_element',
+         'base_score', 'description'}，description 为没有节气、天气描述时使用的随机描述
+    """
+    random = seeded_random_generator(seed)
+    kind, band = variant.split('-')
+
+    # 基础宜忌列表
+    base_good_things = list(GOOD_THINGS_LIST)
+    base_bad_things = list(BAD_THINGS_LIST)
+
+    # 如果是节气，调整宜忌（节气优先）
+    if solar_term_data:
+        base_good_things = _prioritize(base_good_things, solar_term_data.get('boost', []))
+        base_bad_things = _prioritize(base_bad_things, solar_term_data.get('reduce', []))
+
+    # 根据天气调整宜忌
+    priority_good, priority_bad = WEATHER_PRIORITY[kind]
+    base_good_things = _prioritize(base_good_things, priority_good)
+    base_bad_things = _prioritize(base_bad_things, priority_bad)
+    base_bad_things = _prioritize(base_bad_things, TEMPERATURE_PRIORITY[band])
+
+    # 随机选择宜忌
+    good_count = 4 + int(random() * 4)  # 4-7项
+    bad_count = 3 + int(random() * 3)   # 3-5项
+
+    # 用字典保存选中项（保持选中顺序，预生成的结果在不同进程中一致）
+    selected_good = {}
+    selected_bad = {}
+
+    # 选择宜事（优先从调整后的列表前面选择）
+    for i in range(min(good_count, len(base_good_things))):
+        selected_good[base_good_things[i]] = None
+
+    while len(selected_good) < good_count and len(base_good_things) > 0:
+        idx = int(random() * len(base_good_things))
+        selected_good[base_good_things[idx]] = None
+
+    # 选择忌事（优先从调整后的列表前面选择，且避免与宜事重复）
+    for i in range(len(base_bad_things)):
+        if len(selected_bad) >= bad_count:
+            break
+        if base_bad_things[i] not in selected_good:
+            selected_bad[base_bad_things[i]] = None
+
+    while len(selected_bad) < bad_count and len(base_bad_things) > 0:
+        idx = int(random() * len(base_bad_things))
+        bad = base_bad_things[idx]
+        if bad not in selected_good:
+            selected_bad[bad] = None
+
+    # 幸运元素
+    lucky_color = LUCKY_COLORS[int(random() * len(LUCKY_COLORS))]
+    lucky_number = int(random() * 100)
+    lucky_element = ELEMENTS[int(random() * len(ELEMENTS))]
+
+    # 基础运势分数
+    base_score = 60 + int(random() * 40)  # 60-99分
+
+    return {
+        'good_things': list(selected_good),
+        'bad_things': list(selected_bad),
+        'lucky_color': lucky_color,
+        'lucky_number': lucky_number,
+        'lucky_element': lucky_element,
+        'base_score': base_score,
+        'description': FORTUNE_DESCRIPTIONS[int(random() * len(FORTUNE_DESCRIPTIONS))],
+    }
+
+
+def build_details(day: date, fortune_type: str = 'daily', sign: Optional[str] = None) -> dict:
+    """一条运势在所有天气组合下的结果 {'variants': {组合键: select_fortune() 的结果}}"""
+    seed = fortune_seed(day, fortune_type, sign)
+    solar_term_data = SOLAR_TERMS.get(day.strftime('%m-%d'))
+    return {
+        'variants': {
+            f'{kind}-{band}': select_fortune(seed, solar_term_data, f'{kind}-{band}')
+            for kind in WEATHER_PRIORITY
+            for band in TEMPERATURE_PRIORITY
+        }
+    }
+
+
+def apply_weather(day: date, details: dict, weather_data: Optional[dict]) -> dict:
+    """
+    在预生成的运势上叠加实时天气：选出对应的宜忌组合，调整分数、描述和提示
+
+    返回:
+        接口中的运势字段（fortune_score、stars、good_things ... weekday_tip）
+    """
+    fortune = details['variants'][weather_variant(weather_data)]
+    solar_term_data = SOLAR_TERMS.get(day.strftime('%m-%d'))
+    base_score = fortune['base_score']
+    weather = weather_data.get('weather', '') if weather_data else ''
+    temp = weather_data.get('temperature', 20) if weather_data else 20
+
+    # 根据天气调整分数
+    if weather_data:
+        if '晴' in weather:
+            base_score += 5  # 晴天加分
+        elif '雨' in weather or '雪' in weather:
+            base_score -= 3  # 雨雪天减分
+
+        if 15 <= temp <= 25:
+            base_score += 3  # 舒适温度加分
+        elif temp > 35 or temp < 0:
+            base_score -= 5  # 极端温度减分
+
+    # 确保分数在60-99范围内
+    fortune_score = max(60, min(99, base_score))
+
+    # 根据节气、天气和分数生成运势描述
+    if solar_term_data:
+        description = f"今日{solar_term_data['name']}，{solar_term_data['desc']}。"
+    elif '晴' in weather:
+        description = '天气晴朗，运势上扬，把握机会！'
+    elif '雨' in weather:
+        description = '雨天宜静养，适合思考和规划。'
+    elif '雪' in weather:
+        description = '雪天出行需谨慎，适合室内活动。'
+    else:
+        description = fortune['description']
+
+    # 星级评分（分数不低于 60，至少两颗星）
+    if fortune_score >= 90:
+        stars = 5
+    elif fortune_score >= 80:
+        stars = 4
+    elif fortune_score >= 70:
+        stars = 3
+    else:
+        stars = 2
+
+    # 温馨提示（结合天气）
+    tip = ''
+
+    if weather_data:
+        # 基于天气的提示
+        if '雨' in weather:
+            tip = '今日有雨，出门记得带伞哦！☔ '
+        elif '雪' in weather:
+            tip = '今日下雪，注意保暖防滑！❄️ '
+        elif '晴' in weather:
+            tip = '今日晴朗，适合户外活动！☀️ '
+        elif '雾' in weather or '霾' in weather:
+            tip = '今日有雾霾，减少外出，注意健康！😷 '
+
+        # 基于温度的提示
+        if temp > 30:
+            tip += '高温天气，多补充水分！🥤'
+        elif temp < 5:
+            tip += '寒冷天气，注意保暖！🧣'
+        elif 15 <= temp <= 25:
+            tip += '温度适宜，心情愉悦！😊'
+
+    # 如果没有天气数据，使用星期提示
+    if not tip:
+        tip = WEEKDAY_TIPS[day.weekday()]
+
+    # 如果是节气，添加节气提示
+    if solar_term_data:
+        tip = f"{solar_term_data['name']}：{solar_term_data['desc']}。{tip}"
+
+    return {
+        'fortune_score': fortune_score,
+        'stars': stars,
+        'star_display': '⭐' * stars,
+        'description': description,
+        'good_things': fortune['good_things'],
+        'bad_things': fortune['bad_things'],
+        'lucky_color': fortune['lucky_color'],
+        'lucky_number': fortune['lucky_number'],
+        'lucky_element': fortune['lucky_element'],
+        'weekday_tip': tip
+    }
+
+
+def generate_fortune(day: date, weather_data: Optional[dict] = None,
+                     fortune_type: str = 'daily', sign: Optional[str] = None) -> dict:
+    """现场生成一条运势（没有预生成记录时使用）"""
+    return apply_weather(day, build_details(day, fortune_type, sign), weather_data)
+
+
+# ---------- 预生成 ----------
+
+def _row_fields(day: date, fortune_type: str, sign: Optional[str]) -> dict:
+    """一条 DailyFortune 记录的字段（摘要字段取没有天气时的结果）"""
+    details = build_details(day, fortune_type, sign)
+    plain = apply_weather(day, details, None)
+    return {
+        'overall_score': plain['fortune_score'],
+        'summary': plain['description'],
+        'lucky_color': plain['lucky_color'],
+        'lucky_number': str(plain['lucky_number']),
+        'advice': plain['weekday_tip'],
+        'details': details,
+    }
+
+
+def precompute(start: date = None, days: int = None) -> Dict[str, int]:
+    """
+    预生成 [start, start + days] 每天的通用、生肖、星座运势并批量写入
+
+    一次查询取出区间内已有的记录，只写入新增和内容变化的记录
+
+    返回:
+        {'inserted': 新增数, 'updated': 更新数, 'unchanged': 未变化数}
+    """
+    start = start or timezone.localdate()
+    days = settings.FORTUNE_PRECOMPUTE_DAYS if days is None else days
+    end = start + timedelta(days=days)
+
+    try:
+        result = _write_rows(start, end)
+    except Exception as e:
+        DataSyncLog.objects.create(
+            data_type='fortune', status='failed', sync_date=start, sync_date_end=end,
+            error_message=str(e), completed_at=timezone.now()
+        )
+        raise
+
+    detail = f"新增 {result['inserted']}，更新 {result['updated']}，未变化 {result['unchanged']}"
+    DataSyncLog.objects.create(
+        data_type='fortune', status='success', sync_date=start, sync_date_end=end,
+        records_count=result['inserted'] + result['updated'], details=result,
+        completed_at=timezone.now()
+    )
+    print(f"✅ 运势预生成完成 {start} - {end}: {detail}")
+    return result
+
+
+def _write_rows(start: date, end: date) -> Dict[str, int]:
+    """生成 [start, end] 的记录，与已有记录比对后批量写入"""
+    existing = {
+        (row.date, row.fortune_type, row.zodiac, row.constellation): row
+        for row in DailyFortune.objects.filter(date__range=(start, end))
+    }
+    to_create = []
+    to_update = []
+    update_fields = set()
+    unchanged_count = 0
+    now = timezone.now()
+
+    day = start
+    while day <= end:
+        for fortune_type, sign in FORTUNE_SIGNS:
+            zodiac = sign if fortune_type == 'zodiac' else None
+            constellation = sign if fortune_type == 'constellation' else None
+            fields = _row_fields(day, fortune_type, sign)
+
+            row = existing.get((day, fortune_type, zodiac, constellation))
+            if row is None:
+                to_create.append(DailyFortune(
+                    date=day, fortune_type=fortune_type, zodiac=zodiac,
+                    constellation=constellation, **fields
+                ))
+                continue
+            changed = [field for field, value in fields.items() if getattr(row, field) != value]
+            if not changed:
+                unchanged_count += 1
+                continue
+            for field in changed:
+                setattr(row, field, fields[field])
+            row.updated_at = now  # bulk_update 不会自动更新 auto_now 字段
+            update_fields.update(changed)
+            to_update.append(row)
+        day += timedelta(days=1)
+
+    if to_create:
+        DailyFortune.objects.bulk_create(to_create, batch_size=BULK_BATCH_SIZE)
+    if to_update:
+        DailyFortune.objects.bulk_update(
+            to_update, sorted(update_fields | {'updated_at'}), batch_size=BULK_BATCH_SIZE
+        )
+
+    return {
+        'inserted': len(to_create),
+        'updated': len(to_update),
+        'unchanged': unchanged_count,
+    }
+
+
+def get_details(day: date, fortune_type: str = 'daily', sign: Optional[str] = None) -> dict:
+    """读取预生成的运势（一次索引查询），没有记录或读取失败时现场生成"""
+    try:
+        details = (
+            DailyFortune.objects
+            .filter(
+                date=day,
+                fortune_type=fortune_type,
+                zodiac=sign if fortune_type == 'zodiac' else None,
+                constellation=sign if fortune_type == 'constellation' else None,
+            )
+            .values_list('details', flat=True)
+            .first()
+        )
+    except DatabaseError as e:
+        logger.warning(f"读取预生成运势失败: {e}")
+        details = None
+    if not details:
+        details = build_details(day, fortune_type, sign)
+    return details
+
+
+def today_fortune(weather_data: Optional[dict] = None, fortune_type: str = 'daily',
+                  sign: Optional[str] = None, day: date = None) -> dict:
+    """接口返回的今日运势：日期、节气 + 预生成的运势叠加实时天气"""
+    day = day or timezone.localdate()
+    solar_term_data = SOLAR_TERMS.get(day.strftime('%m-%d'))
+    return {
+        'date': day.isoformat(),
+        'weekday': WEEKDAY_NAMES[day.weekday()],
+        'solar_term': solar_term_data['name'] if solar_term_data else None,
+        'solar_term_desc': solar_term_data['desc'] if solar_term_data else None,
+        **apply_weather(day, get_details(day, fortune_type, sign), weather_data)
+    }
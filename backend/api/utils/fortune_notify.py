@@ -0,0 +1,174 @@
+"""
+每日运势推送
+给打开了 notify_daily 的 UserFortune 用户发送当天的生肖 / 星座运势邮件：
+- 订阅用户按 ID 流式读取、切块，每块交给一个批量任务（一个 SMTP 连接）
+- 运势按生肖 / 星座从预生成的 DailyFortune 读取（每天 24 条，而不是每个用户一条），
+  邮件片段按生肖 / 星座只渲染一次，每封邮件只拼接问候语
+"""
+import logging
+from datetime import date
+from functools import lru_cache
+from typing import Dict, Iterator, List, Tuple
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMultiAlternatives
+from django.db import DatabaseError
+from api.models import DailyFortune, UserFortune
+from api.utils import fortune
+from api.utils.email_templates import fortune_fragments, render_fortune
+from api.utils.mail_delivery import BatchResult, send_batch
+
+logger = logging.getLogger(__name__)
+
+# 一次推送的进度计数（各批任务在不同的 worker 进程中累加，放在共享缓存里）
+PROGRESS_FIELDS = ('users', 'sent', 'failed', 'skipped', 'milliseconds')
+PROGRESS_CACHE_SECONDS = 86400
+
+
+def subscriber_batches(batch_size: int = None) -> Iterator[List[int]]:
+    """
+    按 ID 顺序流式读取订阅用户，每 batch_size 个用户 ID 一块
+
+    只读取用户 ID（服务端游标），不把整个用户表载入内存
+    """
+    batch_size = batch_size or settings.FORTUNE_NOTIFY_BATCH_SIZE
+    user_ids = (
+        UserFortune.objects
+        .filter(notify_daily=True, user__is_active=True)
+        .exclude(user__email='')
+        .order_by('user_id')
+        .values_list('user_id', flat=True)
+        .iterator(chunk_size=batch_size * 10)
+    )
+
+    batch = []
+    for user_id in user_ids:
+        batch.append(user_id)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+@lru_cache(maxsize=2)
+def sign_fragments(day: date) -> Dict[Tuple[str, str], Tuple[str, str]]:
+    """
+    当天每个生肖 / 星座的邮件片段 {(运势类型, 生肖或星座): (纯文本, HTML)}
+
+    一次查询读出当天的预生成记录，缺少的记录（或读取失败时）现场生成；每个进程每天只渲染一次
+    """
+    try:
+        details = {
+            (row['fortune_type'], row['zodiac'] or row['constellation']): row['details']
+            for row in DailyFortune.objects.filter(
+                date=day, fortune_type__in=['zodiac', 'constellation']
+            ).values('fortune_type', 'zodiac', 'constellation', 'details')
+        }
+    except DatabaseError as e:
+        logger.warning(f"读取预生成运势失败: {e}")
+        details = {}
+
+    fragments = {}
+    for fortune_type, sign in fortune.FORTUNE_SIGNS:
+        if fortune_type == 'daily':
+            continue
+        sign_details = details.get((fortune_type, sign)) or fortune.build_details(day, fortune_type, sign)
+        title = f'属{sign} 今日运势' if fortune_type == 'zodiac' else f'{sign} 今日运势'
+        fragments[(fortune_type, sign)] = fortune_fragments(
+            title, fortune.apply_weather(day, sign_details, None)
+        )
+    return fragments
+
+
+def build_fortune_email(day: date, profile: UserFortune):
+    """
+    构建一位用户的运势邮件
+
+    返回:
+        EmailMultiAlternatives，用户没有可发送的运势时返回 None
+    """
+    fragments = sign_fragments(day)
+    parts = []
+    if profile.subscribe_zodiac and ('zodiac', profile.zodiac) in fragments:
+        parts.append(fragments[('zodiac', profile.zodiac)])
+    if profile.subscribe_constellation and ('constellation', profile.constellation) in fragments:
+        parts.append(fragments[('constellation', profile.constellation)])
+    if not parts:
+        return None
+
+    subject, message, html_message = render_fortune(profile.user, day, parts)
+    email = EmailMultiAlternatives(
+        subject=subject,
+        body=message,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[profile.user.email],
+    )
+    email.attach_alternative(html_message, 'text/html')
+    return email
+
+
+def deliver_fortune_batch(day: date, user_ids: List[int]) -> Tuple[BatchResult, int]:
+    """
+    给一批用户发送运势邮件（一次查询，一个 SMTP 连接）
+
+    返回:
+        (BatchResult, 跳过的用户数)
+    """
+    profiles = (
+        UserFortune.objects
+        .filter(user_id__in=user_ids, notify_daily=True)
+        .select_related('user')
+    )
+
+    messages = []
+    for profile in profiles:
+        email = build_fortune_email(day, profile)
+        if email is not None:
+            messages.append((profile.user_id, email))
+
+    return send_batch(messages), len(user_ids) - len(messages)
+
+
+# ---------- 推送进度 ----------
+
+def _progress_key(log_id: int, name: str) -> str:
+    return f'fortune_notify_{log_id}_{name}'
+
+
+def add_progress(log_id: int, **counts):
+    """
+    累加一批的结果（users / sent / failed / skipped / milliseconds）
+
+    完成批数最后累加：看到批数已满时其余计数一定都已加上
+    """
+    for name, value in [*counts.items(), ('batches', 1)]:
+        key = _progress_key(log_id, name)
+        cache.add(key, 0, PROGRESS_CACHE_SECONDS)
+        cache.incr(key, value)
+
+
+def set_total_batches(log_id: int, total: int):
+    """分发完毕后记下总批数"""
+    cache.set(_progress_key(log_id, 'total'), total, PROGRESS_CACHE_SECONDS)
+
+
+def get_progress(log_id: int) -> dict:
+    """{'batches': 已完成批数, 'total': 总批数（还在分发时为 None）, 'users', 'sent', ...}"""
+    names = ('batches', 'total') + PROGRESS_FIELDS
+    values = cache.get_many([_progress_key(log_id, name) for name in names])
+    progress = {name: values.get(_progress_key(log_id, name), 0) for name in names}
+    progress['total'] = values.get(_progress_key(log_id, 'total'))
+    return progress
+
+
+def claim_finish(log_id: int) -> bool:
+    """
+    总批数已知且全部批次都已完成时返回 True
+
+    最后一批和分发任务都会检查，只有一个调用方能拿到（cache.add 是原子操作）
+    """
+    progress = get_progress(log_id)
+    if progress['total'] is None or progress['batches'] < progress['total']:
+        return False
+    return cache.add(_progress_key(log_id, 'finished'), 1, PROGRESS_CACHE_SECONDS)
@@ -0,0 +1,299 @@
+"""
+节假日索引
+每年的数据只构建一次 日期 -> 节假日 的字典：按日期查询 O(1)，按月直接取出当月的节假日
+
+数据来源：
+- api/data/holidays_{year}.json（人工维护，优先）
+- 没有该年份的文件时，使用从 Timor API 同步到数据库的 Holiday 记录
+
+索引缓存在进程内和共享的 Django cache（Redis）中，缓存键带每年的版本号：
+- 版本号存放在共享缓存里，每次查询都会读取；同步数据（Celery / 管理命令）或后台修改后
+  调用 invalidate_year()，所有 web 进程在下一次查询时发现版本变化并重建
+- 进程内的副本最多保留 LOCAL_INDEX_SECONDS，没有数据的年份在共享缓存中只保留
+  UNAVAILABLE_CACHE_SECONDS，即使漏掉了失效（如直接改了 JSON 文件或数据库）也会自动更新
+"""
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Dict, List, Optional
+from django.core.cache import cache
+from django.db import DatabaseError
+
+logger = logging.getLogger(__name__)
+
+
+# 节假日数据文件目录（api/data/）
+HOLIDAYS_DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+
+# 构建好的索引在 Django cache 中的保留时间（数据变化时通过版本号失效）
+INDEX_CACHE_SECONDS = 86400
+
+# 没有数据的年份在 Django cache 中的保留时间（之后重新检查是否已同步到数据）
+UNAVAILABLE_CACHE_SECONDS = 300
+
+# 进程内副本的最长保留时间
+LOCAL_INDEX_SECONDS = 300
+
+# 进程内缓存：{year: (version, 过期时间 monotonic, HolidayIndex)}
+_local_indexes = {}
+
+
+def empty_info() -> dict:
+    """普通日期的节假日信息"""
+    return {
+        'is_holiday': False,
+        'is_workday': False,
+        'holiday_name': None,
+        'holiday_type': None,
+    }
+
+
+@dataclass
+class HolidayIndex:
+    """一年的节假日索引"""
+    year: int
+    # 'YYYY-MM-DD' -> 节假日信息（只包含节假日和调休工作日）
+    days: Dict[str, dict] = field(default_factory=dict)
+    # get_holidays 接口返回的节假日列表
+    holidays: List[dict] = field(default_factory=list)
+    # 月份 -> [(日期字符串, 节假日信息)]，按日期排序
+    by_month: Dict[int, list] = field(default_factory=dict)
+    # 该年份是否有数据
+    available: bool = True
+
+    def lookup(self, target_date: date) -> dict:
+        """查询某一天（返回副本，调用方可以随意修改）"""
+        info = self.days.get(target_date.isoformat())
+        return dict(info) if info else empty_info()
+
+    def month(self, month: int) -> list:
+        """当月的节假日和调休工作日 [(日期字符串, 节假日信息)]"""
+        return self.by_month.get(month, [])
+
+    def finalize(self):
+        """按日期整理出每月的列表"""
+        by_month = {}
+        for date_str in sorted(self.days):
+            by_month.setdefault(int(date_str[5:7]), []).append((date_str, self.days[date_str]))
+        self.by_month = by_month
+        return self
+
+
+# ---------- 构建 ----------
+
+def _build_from_json(year: int, year_data: dict) -> HolidayIndex:
+    """
+    从 JSON 构建
+
+    JSON 格式：{"春节": "2025-01-28", "春节假期": ["2025-01-28", ...], ...}
+    同一天既是节日当天又在假期中时，以节日当天（major）为准
+    """
+    majors = {}
+    vacations = {}
+    holidays = []
+
+    for holiday_name, holiday_date in year_data.items():
+        if isinstance(holiday_date, str):
+            majors.setdefault(holiday_date, {
+                'is_holiday': True,
+                'is_workday': False,
+                'holiday_name': holiday_name,
+                'holiday_type': 'major',
+            })
+            holidays.append({
+                'name': holiday_name,
+                'date': holiday_date,
+                'type': 'major',
+            })
+        elif isinstance(holiday_date, list) and holiday_date:
+            for date_str in holiday_date:
+                vacations.setdefault(date_str, {
+                    'is_holiday': True,
+                    'is_workday': False,
+                    # 提取节假日名称（去掉"假期"）
+                    'holiday_name': holiday_name.replace('假期', ''),
+                    'holiday_type': 'vacation',
+                })
+            holidays.append({
+                'name': holiday_name,
+                'dates': holiday_date,
+                'start_date': holiday_date[0],
+                'end_date': holiday_date[-1],
+                'type': 'vacation',
+                'days': len(holiday_date),
+            })
+
+    days = {**vacations, **majors}
+    return HolidayIndex(year=year, days=days, holidays=holidays).finalize()
+
+
+def _build_from_db(year: int) -> Optional[HolidayIndex]:
+    """从数据库中同步的 Holiday 记录构建，没有记录时返回 None"""
+    from api.models import Holiday
+
+    try:
+        rows = list(
+            Holiday.objects
+            .filter(date__year=year, type__in=['major', 'vacation'])
+            .values('date', 'name', 'type', 'is_rest_day', 'is_workday', 'holiday_group')
+            .order_by('date')
+        )
+    except DatabaseError as e:
+        logger.warning(f"读取节假日数据库失败: {e}")
+        return None
+    if not rows:
+        return None
+
+    days = {}
+    holidays = []
+    groups = {}
+    for row in rows:
+        date_str = row['date'].isoformat()
+        if row['is_workday'] and not row['is_rest_day']:
+            # 调休上班
+            days.setdefault(date_str, {
+                'is_holiday': False,
+                'is_workday': True,
+                'holiday_name': row['name'],
+                'holiday_type': 'workday',
+            })
+            continue
+
+        is_major = row['type'] == 'major'
+        group = row['holiday_group']
+        info = {
+            'is_holiday': True,
+            'is_workday': False,
+            'holiday_name': row['name'] if is_major or not group else group.replace('假期', ''),
+            'holiday_type': row['type'],
+        }
+        if is_major or date_str not in days:
+            days[date_str] = info
+        if is_major:
+            holidays.append({'name': row['name'], 'date': date_str, 'type': 'major'})
+        if group:
+            groups.setdefault(group, []).append(date_str)
+
+    for group, dates in groups.items():
+        dates = sorted(set(dates))
+        holidays.append({
+            'name': group,
+            'dates': dates,
+            'start_date': dates[0],
+            'end_date': dates[-1],
+            'type': 'vacation',
+            'days': len(dates),
+        })
+
+    return HolidayIndex(year=year, days=days, holidays=holidays).finalize()
+
+
+def build_index(year: int) -> HolidayIndex:
+    """读取数据源并构建一年的索引（该年没有数据时 available=False）"""
+    file_path = os.path.join(HOLIDAYS_DATA_DIR, f'holidays_{year}.json')
+    if os.path.exists(file_path):
+        with open(file_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if str(year) in data:
+            return _build_from_json(year, data[str(year)])
+
+    index = _build_from_db(year)
+    if index is not None:
+        return index
+    return HolidayIndex(year=year, available=False)
+
+
+# ---------- 缓存与失效 ----------
+
+def _version_key(year: int) -> str:
+    return f'holidays_version_{year}'
+
+
+def get_version(year: int) -> int:
+    """
+    一年节假日数据的当前版本号（依赖节假日数据的缓存可以把它放进缓存键）
+
+    版本号不存在（从未失效过或被 Redis 淘汰）时以当前毫秒时间戳初始化，
+    不会退回到旧版本号而读到旧版本的缓存
+    """
+    key = _version_key(year)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, int(time.time() * 1000), None)
+        version = cache.get(key, 0)
+    return version
+
+
+def get_index(year: int) -> Optional[HolidayIndex]:
+    """
+    获取一年的节假日索引
+
+    返回:
+        HolidayIndex，该年没有数据时返回 None
+    """
+    version = get_version(year)
+    now = time.monotonic()
+
+    local = _local_indexes.get(year)
+    if local is not None and local[0] == version and local[1] > now:
+        index = local[2]
+    else:
+        cache_key = f'holidays_index_{year}_v{version}'
+        index = cache.get(cache_key)
+        if index is None:
+            index = build_index(year)
+            timeout = INDEX_CACHE_SECONDS if index.available else UNAVAILABLE_CACHE_SECONDS
+            cache.set(cache_key, index, timeout)
+        _local_indexes[year] = (version, now + LOCAL_INDEX_SECONDS, index)
+
+    return index if index.available else None
+
+
+def invalidate_year(year: int):
+    """节假日数据变化后调用：递增共享缓存中的版本号，所有进程下次查询时重建索引"""
+    key = _version_key(year)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # 版本号不存在：同样用时间戳，不能从 1 重新开始
+        cache.set(key, int(time.time() * 1000), None)
+    _local_indexes.pop(year, None)
+
+
+# ---------- 查询 ----------
+
+def get_holiday_info(target_date: date) -> Optional[dict]:
+    """
+    查询某一天的节假日信息
+
+    返回:
+        {'is_holiday', 'is_workday', 'holiday_name', 'holiday_type'}，该年没有数据时返回 None
+    """
+    index = get_index(target_date.year)
+    if index is None:
+        return None
+    return index.lookup(target_date)
+
+
+def holidays_between(start: date, end: date) -> Dict[str, dict]:
+    """
+    [start, end] 内的节假日和调休工作日
+
+    返回:
+        {'YYYY-MM-DD': 节假日信息}（与索引共享，只读），普通日期不包含在内
+    """
+    result = {}
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        index = get_index(year)
+        if index is not None:
+            for date_str, info in index.month(month):
+                if start.isoformat() <= date_str <= end.isoformat():
+                    result[date_str] = info
+        month += 1
+        if month > 12:
+            year, month = year + 1, 1
+    return result
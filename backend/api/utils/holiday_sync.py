@@ -1,27 +1,92 @@
 """
 节假日数据同步工具
 支持从多个数据源同步节假日数据
+
+多个年份并发下载（线程池，每个线程一个带重试的 Session），
+下载完成后在当前线程依次批量写入数据库
+
+每年的上游校验值和内容哈希记在 HolidaySourceState：
+上游返回 304 时不下载，内容哈希没变时不写库，例行同步几乎没有 I/O
 """
+import hashlib
 import requests
 import json
+import threading
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, date
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional
+from django.conf import settings
 from django.db import transaction
 from django.utils import timezone
-from api.models import Holiday, DataSyncLog
+from api.models import Holiday, DataSyncLog, HolidaySourceState
+from api.utils import holiday_index
+
+
+WEEKDAY_NAMES = ['周一', '周二', '周三', '周四', '周五', '周六', '周日']
+
+
+@dataclass
+class FetchResult:
+    """一年数据的下载结果"""
+    data: Optional[Dict] = None      # Timor 节假日数据，下载失败或 304 时为 None
+    not_modified: bool = False       # 上游返回 304
+    etag: str = ''
+    last_modified: str = ''
+
+
+def payload_hash(timor_data: Dict) -> str:
+    """节假日数据的内容哈希（键排序后序列化，与上游字段顺序无关）"""
+    payload = json.dumps(timor_data, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
 
 
 class HolidaySyncService:
     """节假日数据同步服务"""
     
-    # Timor API（免费、稳定）
-    TIMOR_API_BASE = "http://timor.tech/api/holiday"
+    # 批量写入时每批的记录数
+    BULK_BATCH_SIZE = 500
+    
+    # 单次请求超时（秒）
+    REQUEST_TIMEOUT = 10
     
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Ralendar/1.0 (Holiday Sync Service)'
-        })
+    def __init__(self, api_base: str = None, max_workers: int = None):
+        """
+        参数:
+            api_base: Timor API 地址（默认 settings.HOLIDAY_API_BASE，测试时可指向本地桩服务）
+            max_workers: 并发下载的线程数（默认 settings.HOLIDAY_SYNC_WORKERS）
+        """
+        self.api_base = (api_base or settings.HOLIDAY_API_BASE).rstrip('/')
+        self.max_workers = max_workers or settings.HOLIDAY_SYNC_WORKERS
+        self._local = threading.local()
+    
+    @property
+    def session(self) -> requests.Session:
+        """
+        当前线程的 HTTP Session（requests.Session 不保证线程安全，每个线程各用一个）
+        
+        连接失败、429 和 5xx 自动重试，间隔按 0.5s、1s、2s 指数退避
+        """
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            retry = Retry(
+                total=settings.HOLIDAY_SYNC_RETRIES,
+                backoff_factor=0.5,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=['GET'],
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(max_retries=retry)
+            session = requests.Session()
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers.update({
+                'User-Agent': 'Ralendar/1.0 (Holiday Sync Service)'
+            })
+            self._local.session = session
+        return session
     
     def fetch_year_holidays_from_timor(self, year: int) -> Optional[Dict]:
         """
@@ -37,24 +102,45 @@ class HolidaySyncService:
             }
         }
         """
+        return self.fetch_year(year).data
+    
+    def fetch_year(self, year: int, etag: str = '', last_modified: str = '') -> FetchResult:
+        """
+        条件下载一年的数据
+        
+        参数:
+            etag / last_modified: 上次保存的上游校验值（有则带上条件请求头）
+        """
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        
         try:
-            url = f"{self.TIMOR_API_BASE}/year/{year}"
-            response = self.session.get(url, timeout=10)
+            url = f"{self.api_base}/year/{year}"
+            response = self.session.get(url, headers=headers, timeout=self.REQUEST_TIMEOUT)
+            if response.status_code == 304:
+                return FetchResult(not_modified=True, etag=etag, last_modified=last_modified)
             response.raise_for_status()
             
             data = response.json()
             if data.get('code') == 0:
-                return data.get('holiday', {})
+                return FetchResult(
+                    data=data.get('holiday', {}),
+                    etag=response.headers.get('ETag', ''),
+                    last_modified=response.headers.get('Last-Modified', ''),
+                )
             else:
                 print(f"❌ Timor API 返回错误: {data.get('message', '未知错误')}")
-                return None
+                return FetchResult()
                 
         except requests.RequestException as e:
             print(f"❌ 网络请求失败: {str(e)}")
-            return None
+            return FetchResult()
         except json.JSONDecodeError as e:
             print(f"❌ JSON 解析失败: {str(e)}")
-            return None
+            return FetchResult()
     
     def fetch_date_holiday_from_timor(self, target_date: date) -> Optional[Dict]:
         """
@@ -72,8 +158,8 @@ class HolidaySyncService:
         """
         try:
             date_str = target_date.strftime('%Y-%m-%d')
-            url = f"{self.TIMOR_API_BASE}/info/{date_str}"
-            response = self.session.get(url, timeout=10)
+            url = f"{self.api_base}/info/{date_str}"
+            response = self.session.get(url, timeout=self.REQUEST_TIMEOUT)
             response.raise_for_status()
             
             data = response.json()
@@ -175,71 +261,189 @@ class HolidaySyncService:
         return holidays
     
     @transaction.atomic
-    def import_holidays_to_db(self, holidays: List[Dict], replace: bool = False) -> int:
+    def import_holidays_to_db(self, holidays: List[Dict], replace: bool = False) -> Dict[str, int]:
         """
-        将节假日数据导入数据库
+        将节假日数据导入数据库（批量）
+        
+        一次查询取出涉及日期上已有的记录，按 (date, name, type) 比对后
+        用 bulk_create / bulk_update 分批写入，只更新内容真正变化的记录
         
         参数:
             holidays: 节假日数据列表
             replace: 是否替换已存在的数据（默认跳过）
         
         返回:
-            成功导入的记录数
+            {'inserted': 新增数, 'updated': 更新数, 'unchanged': 未变化数, 'skipped': 跳过数}
         """
-        imported_count = 0
+        # 同一键重复出现时以最后一条为准
+        incoming = {
+            (holiday_data['date'], holiday_data['name'], holiday_data['type']): holiday_data
+            for holiday_data in holidays
+        }
+        existing = {
+            (holiday.date, holiday.name, holiday.type): holiday
+            for holiday in Holiday.objects.filter(date__in={key[0] for key in incoming})
+        }
+        
+        to_create = []
+        to_update = []
+        update_fields = set()
+        unchanged_count = 0
         skipped_count = 0
+        now = timezone.now()
         
-        for holiday_data in holidays:
-            try:
-                # 检查是否已存在
-                existing = Holiday.objects.filter(
-                    date=holiday_data['date'],
-                    name=holiday_data['name'],
-                    type=holiday_data['type']
-                ).first()
-                
-                if existing:
-                    if replace:
-                        # 更新现有记录
-                        for key, value in holiday_data.items():
-                            setattr(existing, key, value)
-                        existing.save()
-                        imported_count += 1
-                        print(f"  ✓ 更新: {holiday_data['date']} - {holiday_data['name']}")
-                    else:
-                        skipped_count += 1
-                        print(f"  - 跳过: {holiday_data['date']} - {holiday_data['name']} (已存在)")
-                else:
-                    # 创建新记录
-                    Holiday.objects.create(**holiday_data)
-                    imported_count += 1
-                    print(f"  ✓ 新增: {holiday_data['date']} - {holiday_data['name']}")
-                    
-            except Exception as e:
-                print(f"  ❌ 导入失败: {holiday_data.get('date')} - {str(e)}")
+        for key, holiday_data in incoming.items():
+            holiday = existing.get(key)
+            if holiday is None:
+                to_create.append(Holiday(**holiday_data))
+                continue
+            if not replace:
+                skipped_count += 1
                 continue
+            
+            changed = [
+                field for field, value in holiday_data.items()
+                if getattr(holiday, field) != value
+            ]
+            if not changed:
+                unchanged_count += 1
+                continue
+            for field in changed:
+                setattr(holiday, field, holiday_data[field])
+            holiday.last_updated = now  # bulk_update 不会自动更新 auto_now 字段
+            update_fields.update(changed)
+            to_update.append(holiday)
+        
+        if to_create:
+            Holiday.objects.bulk_create(to_create, batch_size=self.BULK_BATCH_SIZE)
+        if to_update:
+            Holiday.objects.bulk_update(
+                to_update,
+                sorted(update_fields | {'last_updated'}),
+                batch_size=self.BULK_BATCH_SIZE
+            )
+        
+        # 批量写入不触发模型信号，手动使数据有变化的年份重建索引
+        changed_years = {holiday.date.year for holiday in to_create + to_update}
+        for year in changed_years:
+            holiday_index.invalidate_year(year)
+        
+        result = {
+            'inserted': len(to_create),
+            'updated': len(to_update),
+            'unchanged': unchanged_count,
+            'skipped': skipped_count,
+        }
         
         print(f"\n📊 导入统计:")
-        print(f"  - 成功: {imported_count} 条")
-        print(f"  - 跳过: {skipped_count} 条")
+        print(f"  - 新增: {result['inserted']} 条")
+        print(f"  - 更新: {result['updated']} 条")
+        print(f"  - 未变化: {result['unchanged']} 条")
+        print(f"  - 跳过: {result['skipped']} 条")
         
-        return imported_count
+        return result
     
-    def sync_year_holidays(self, year: int, replace: bool = False) -> bool:
+    def sync_year_holidays(self, year: int, replace: bool = False, force: bool = False) -> bool:
         """
         同步指定年份的节假日数据
         
         参数:
             year: 年份
             replace: 是否替换已存在的数据
+            force: 忽略保存的校验值和哈希，重新下载并导入
         
         返回:
             是否同步成功
         """
         print(f"\n🔄 开始同步 {year} 年节假日数据...")
         
-        # 1. 从 Timor API 获取数据
-        timor_data = self.fetch_year_holidays_from_timor(year)
+        # 1. 从 Timor API 获取数据（带上次的校验值）
+        state = None if force else HolidaySourceState.objects.filter(year=year).first()
+        if state:
+            result = self.fetch_year(year, state.etag, state.last_modified)
+        else:
+            result = self.fetch_year(year)
+        return self.apply_fetch_result(year, result, state, replace=replace)
+    
+    def fetch_years(self, years: Iterable[int], states: Dict[int, HolidaySourceState] = None) -> Dict[int, FetchResult]:
+        """
+        并发下载多个年份的数据
+        
+        参数:
+            states: {年份: 同步状态}，有则按保存的校验值发条件请求
+        
+        返回:
+            {年份: FetchResult}
+        """
+        years = list(years)
+        if not years:
+            return {}
+        states = states or {}
+        
+        def fetch(year):
+            state = states.get(year)
+            if state is None:
+                return self.fetch_year(year)
+            return self.fetch_year(year, state.etag, state.last_modified)
+        
+        workers = max(1, min(self.max_workers, len(years)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='holiday-sync') as executor:
+            return dict(zip(years, executor.map(fetch, years)))
+    
+    def apply_fetch_result(self, year: int, result: FetchResult, state: Optional[HolidaySourceState],
+                           replace: bool = False) -> bool:
+        """
+        处理一年的下载结果：未变化时跳过写库，否则导入并更新同步状态
+        
+        只有上游数据完整写入（replace=True，或没有跳过已有记录）时才保存上游校验值和内容哈希；
+        否则下次同步（如每月的 replace=True 定时任务）拿到 304 / 相同哈希，会漏掉跳过的那部分更新
+        
+        参数:
+            state: 上次的同步状态（None 表示首次同步或强制同步）
+        """
+        now = timezone.now()
+        
+        if result.not_modified:
+            print(f"✓ {year} 年数据未变化（304），跳过下载")
+            HolidaySourceState.objects.filter(year=year).update(checked_at=now)
+            return True
+        
+        if not result.data:
+            self.import_year(year, None, replace=replace)
+            return False
+        
+        content_hash = payload_hash(result.data)
+        validators = {
+            'etag': result.etag,
+            'last_modified': result.last_modified,
+            'content_hash': content_hash,
+            'checked_at': now,
+        }
+        
+        if state is not None and state.content_hash == content_hash:
+            print(f"✓ {year} 年数据内容未变化，跳过写入")
+            HolidaySourceState.objects.filter(year=year).update(**validators)
+            return True
+        
+        counts = self.import_year(year, result.data, replace=replace)
+        if counts is None:
+            return False
+        if replace or not counts['skipped']:
+            HolidaySourceState.objects.update_or_create(
+                year=year,
+                defaults={**validators, 'changed_at': now}
+            )
+        else:
+            print(f"⚠️  {year} 年跳过了 {counts['skipped']} 条已有记录，不保存上游校验值（下次同步重新比对）")
+        return True
+    
+    def import_year(self, year: int, timor_data: Optional[Dict], replace: bool = False) -> Optional[Dict[str, int]]:
+        """
+        解析并导入已下载的一年数据，记录同步日志
+        
+        返回:
+            导入统计 {'inserted', 'updated', 'unchanged', 'skipped'}，获取失败时返回 None
+        """
         if not timor_data:
             print(f"❌ 获取 {year} 年数据失败")
             from datetime import date
@@ -250,7 +454,7 @@ class HolidaySyncService:
                 sync_date=date(year, 1, 1),
                 sync_date_end=date(year, 12, 31)
             )
-            return False
+            return None
         
         print(f"✓ 成功获取 {len(timor_data)} 天的数据")
         
@@ -260,37 +464,30 @@ class HolidaySyncService:
         
         if not holidays:
             print(f"⚠️  {year} 年没有节假日数据")
-            return True
+            return {'inserted': 0, 'updated': 0, 'unchanged': 0, 'skipped': 0}
         
         # 3. 导入数据库
-        imported_count = self.import_holidays_to_db(holidays, replace=replace)
+        result = self.import_holidays_to_db(holidays, replace=replace)
+        imported_count = result['inserted'] + result['updated']
         
         # 4. 记录同步日志
         from datetime import date
+        self._log_sync_result(
+            data_type='holiday',
+            status='success',
+            message=f'成功同步 {year} 年 {imported_count} 条记录',
+            sync_date=date(year, 1, 1),
+            sync_date_end=date(year, 12, 31),
+            records_count=imported_count,
+            details=result
+        )
         if imported_count > 0:
-            self._log_sync_result(
-                data_type='holiday',
-                status='success',
-                message=f'成功同步 {year} 年 {imported_count} 条记录',
-                sync_date=date(year, 1, 1),
-                sync_date_end=date(year, 12, 31),
-                records_count=imported_count
-            )
             print(f"\n✅ {year} 年节假日数据同步完成！")
-            return True
         else:
-            self._log_sync_result(
-                data_type='holiday',
-                status='success',
-                message=f'{year} 年数据已是最新',
-                sync_date=date(year, 1, 1),
-                sync_date_end=date(year, 12, 31),
-                records_count=0
-            )
             print(f"\n✓ {year} 年数据已是最新")
-            return True
+        return result
     
-    def sync_multiple_years(self, start_year: int, end_year: int, replace: bool = False):
+    def sync_multiple_years(self, start_year: int, end_year: int, replace: bool = False, force: bool = False):
         """
         同步多个年份的节假日数据
         
@@ -298,6 +495,7 @@ class HolidaySyncService:
             start_year: 起始年份
             end_year: 结束年份（包含）
             replace: 是否替换已存在的数据
+            force: 忽略保存的校验值和哈希，重新下载并导入
         """
         print(f"\n{'='*60}")
         print(f"🚀 开始批量同步节假日数据 ({start_year} - {end_year})")
@@ -306,8 +504,14 @@ class HolidaySyncService:
         success_count = 0
         fail_count = 0
         
-        for year in range(start_year, end_year + 1):
-            if self.sync_year_holidays(year, replace=replace):
+        # 先并发下载所有年份（带上次的校验值），再依次写入数据库
+        years = range(start_year, end_year + 1)
+        states = {} if force else HolidaySourceState.objects.in_bulk(list(years), field_name='year')
+        fetched = self.fetch_years(years, states)
+        
+        for year in years:
+            print(f"\n🔄 导入 {year} 年节假日数据...")
+            if self.apply_fetch_result(year, fetched[year], states.get(year), replace=replace):
                 success_count += 1
             else:
                 fail_count += 1
@@ -319,8 +523,12 @@ class HolidaySyncService:
         print(f"{'='*60}\n")
     
     def _log_sync_result(self, data_type: str, status: str, message: str, 
-                         sync_date=None, sync_date_end=None, records_count=0):
-        """记录同步结果到数据库"""
+                         sync_date=None, sync_date_end=None, records_count=0, details=None):
+        """
+        记录同步结果到数据库
+        
+        details: 同步明细（新增/更新/未变化/跳过条数），记在 details 字段中
+        """
         try:
             from datetime import date
             DataSyncLog.objects.create(
@@ -330,6 +538,7 @@ class HolidaySyncService:
                 sync_date_end=sync_date_end,
                 records_count=records_count,
                 error_message=message if status == 'failed' else None,
+                details=details or {},
                 completed_at=timezone.now() if status in ['success', 'failed'] else None
             )
         except Exception as e:
@@ -337,34 +546,57 @@ class HolidaySyncService:
 
 
 # 便捷函数
-def sync_holidays(year: int = None, replace: bool = False):
+def sync_holidays(year: int = None, replace: bool = False, force: bool = False):
     """
     同步节假日数据（便捷函数）
     
     参数:
         year: 年份，如果为 None 则同步当前年份和未来2年
         replace: 是否替换已存在的数据
+        force: 忽略保存的校验值和哈希，重新下载并导入
     """
     service = HolidaySyncService()
     
     if year:
-        return service.sync_year_holidays(year, replace=replace)
+        return service.sync_year_holidays(year, replace=replace, force=force)
     else:
         # 默认同步：去年、今年、未来2年（共4年）
         current_year = datetime.now().year
-        service.sync_multiple_years(current_year - 1, current_year + 2, replace=replace)
+        service.sync_multiple_years(current_year - 1, current_year + 2, replace=replace, force=force)
 
 
 def check_holiday(target_date: date) -> Dict:
     """
     检查指定日期是否是节假日（便捷函数）
     
+    优先查本地节假日索引，该年份没有本地数据时才请求 Timor API
+    
     参数:
         target_date: 要检查的日期
     
     返回:
-        节假日信息字典
+        节假日信息字典（Timor 格式）:
+        {
+            "type": 0,  # 0:工作日 1:周末 2:节假日 3:节假日调休
+            "name": "春节",
+            "week": 5
+        }
     """
+    info = holiday_index.get_holiday_info(target_date)
+    if info is not None:
+        if info['is_holiday']:
+            day_type = 2
+        elif info['is_workday']:
+            day_type = 3
+        elif target_date.weekday() >= 5:
+            day_type = 1
+        else:
+            day_type = 0
+        return {
+            'type': day_type,
+            'name': info['holiday_name'] or WEEKDAY_NAMES[target_date.weekday()],
+            'week': target_date.isoweekday(),
+        }
+    
     service = HolidaySyncService()
     return service.fetch_date_holiday_from_timor(target_date)
-
@@ -0,0 +1,243 @@
+"""
+iCalendar (RFC 5545) 生成工具
+逐行生成 VCALENDAR 文本（生成器），配合 StreamingHttpResponse 边查边发；
+完整的订阅内容缓存在 Django cache 中，数据变化时换用新的缓存键
+（版本号和内容都在共享的 Redis 缓存里，任何进程中的修改都会让所有 web 进程换用新键）
+"""
+import hashlib
+import time
+from datetime import timezone as dt_timezone
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+CRLF = '\r\n'
+CONTENT_TYPE = 'text/calendar; charset=utf-8'
+PRODID = '-//Ralendar//Ralendar Calendar//CN'
+UID_DOMAIN = 'kotlincalendar.com'
+
+# RFC 5545 3.1：每行不超过 75 个字节（不含换行）
+MAX_LINE_OCTETS = 75
+
+# 输出格式版本（参与缓存键，格式变化后不再返回旧格式的缓存内容）
+FORMAT_VERSION = 2
+
+
+def escape_text(value) -> str:
+    """TEXT 类型转义：反斜杠、分号、逗号、换行"""
+    return (
+        str(value or '')
+        .replace('\\', '\\\\')
+        .replace(';', '\\;')
+        .replace(',', '\\,')
+        .replace('\r\n', '\\n')
+        .replace('\n', '\\n')
+        .replace('\r', '\\n')
+    )
+
+
+def fold_line(line: str) -> str:
+    """
+    折行：按 UTF-8 字节数切分，续行以一个空格开头
+
+    不会把一个多字节字符（中文、emoji）切成两半
+    """
+    if len(line.encode('utf-8')) <= MAX_LINE_OCTETS:
+        return line + CRLF
+
+    parts = []
+    current = []
+    size = 0
+    limit = MAX_LINE_OCTETS
+    for char in line:
+        char_size = len(char.encode('utf-8'))
+        if size + char_size > limit:
+            parts.append(''.join(current))
+            current = []
+            size = 0
+            limit = MAX_LINE_OCTETS - 1  # 续行开头的空格占 1 个字节
+        current.append(char)
+        size += char_size
+    parts.append(''.join(current))
+    return (CRLF + ' ').join(parts) + CRLF
+
+
+def format_datetime(value) -> str:
+    """UTC 时间：20250101T000000Z"""
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def format_local_datetime(value) -> str:
+    """本地时间（配合 TZID 参数使用）：20250101T080000"""
+    return timezone.localtime(value).strftime('%Y%m%dT%H%M%S')
+
+
+def format_utc_offset(offset) -> str:
+    """UTC 偏移：+0800"""
+    minutes = int(offset.total_seconds() // 60)
+    sign = '+' if minutes >= 0 else '-'
+    minutes = abs(minutes)
+    return f'{sign}{minutes // 60:02d}{minutes % 60:02d}'
+
+
+def timezone_lines():
+    """
+    本地时区的 VTIMEZONE 内容行（重复事件的 DTSTART 引用它）
+
+    只写一个 STANDARD 分量（当前偏移），适用于没有夏令时的时区（Asia/Shanghai）
+    """
+    now = timezone.localtime()
+    offset = format_utc_offset(now.utcoffset())
+    yield 'BEGIN:VTIMEZONE'
+    yield f'TZID:{settings.TIME_ZONE}'
+    yield 'BEGIN:STANDARD'
+    yield 'DTSTART:19700101T000000'
+    yield f'TZOFFSETFROM:{offset}'
+    yield f'TZOFFSETTO:{offset}'
+    yield f'TZNAME:{now.tzname()}'
+    yield 'END:STANDARD'
+    yield 'END:VTIMEZONE'
+
+
+def event_lines(event):
+    """单个事件的 VEVENT 内容行（未折行）"""
+    yield 'BEGIN:VEVENT'
+    yield f'UID:event-{event.id}@{UID_DOMAIN}'
+    yield f'DTSTAMP:{format_datetime(event.updated_at or event.start_time)}'
+    if event.recurrence_rule:
+        # 服务端在本地时区展开重复规则（recurrence.build_rule），BYDAY / BYMONTHDAY 按本地日期计算；
+        # DTSTART 写成带 TZID 的本地时间，客户端才会按同一时区展开，不会落到前一天或后一天
+        tzid = settings.TIME_ZONE
+        yield f'DTSTART;TZID={tzid}:{format_local_datetime(event.start_time)}'
+        if event.end_time:
+            yield f'DTEND;TZID={tzid}:{format_local_datetime(event.end_time)}'
+        yield f'RRULE:{event.recurrence_rule}'
+    else:
+        yield f'DTSTART:{format_datetime(event.start_time)}'
+        if event.end_time:
+            yield f'DTEND:{format_datetime(event.end_time)}'
+    yield f'SUMMARY:{escape_text(event.title)}'
+    if event.description:
+        yield f'DESCRIPTION:{escape_text(event.description)}'
+    if event.location:
+        yield f'LOCATION:{escape_text(event.location)}'
+    if event.latitude is not None and event.longitude is not None:
+        yield f'GEO:{event.latitude};{event.longitude}'
+    if event.updated_at:
+        yield f'LAST-MODIFIED:{format_datetime(event.updated_at)}'
+    yield 'END:VEVENT'
+
+
+def iter_calendar(name, events, description=''):
+    """
+    逐行生成完整的 VCALENDAR（每次产出一行，已折行并带 CRLF）
+
+    参数:
+        name: 日历名称
+        events: 事件迭代器（可直接传 QuerySet.iterator()，不必整表载入内存）
+        description: 日历描述
+    """
+    header = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        f'PRODID:{PRODID}',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{escape_text(name)}',
+        f'X-WR-TIMEZONE:{settings.TIME_ZONE}',
+    ]
+    if description:
+        header.append(f'X-WR-CALDESC:{escape_text(description)}')
+    header.extend(timezone_lines())
+
+    for line in header:
+        yield fold_line(line)
+    for event in events:
+        for line in event_lines(event):
+            yield fold_line(line)
+    yield fold_line('END:VCALENDAR')
+
+
+def render_calendar(name, events, description='') -> str:
+    """一次性生成完整的 VCALENDAR 文本"""
+    return ''.join(iter_calendar(name, events, description))
+
+
+# ---------- 订阅内容缓存 ----------
+
+def _version_key(calendar_id):
+    return f'ics_feed_version_{calendar_id}'
+
+
+def feed_cache_key(calendar_id, version=None):
+    """公开日历订阅内容的缓存键（带版本号，失效时只需递增版本）"""
+    if version is None:
+        key = _version_key(calendar_id)
+        version = cache.get(key)
+        if version is None:
+            # 版本号不存在（从未失效过或被 Redis 淘汰）时以毫秒时间戳初始化，不会退回到旧版本
+            cache.add(key, int(time.time() * 1000), None)
+            version = cache.get(key, 0)
+    return f'ics_feed_{FORMAT_VERSION}_{calendar_id}_v{version}'
+
+
+def cache_while_streaming(chunks, cache_key):
+    """
+    包装生成器：边输出边收集，完整输出后写入缓存
+
+    缓存键在开始生成前确定，生成期间数据发生变化时写入的是旧键，不会被读到
+    """
+    generated_at = timezone.now()
+    collected = []
+    for chunk in chunks:
+        collected.append(chunk)
+        yield chunk
+
+    body = ''.join(collected)
+    etag = '"%s"' % hashlib.md5(body.encode('utf-8')).hexdigest()
+    cache.set(cache_key, (etag, generated_at, body), settings.ICS_FEED_CACHE_SECONDS)
+
+
+def feed_response(request, cache_key, render, filename):
+    """
+    订阅接口的响应
+
+    - 缓存命中：直接返回缓存的完整内容，不查询事件；内容未变时返回 304
+    - 未命中：边生成边输出（StreamingHttpResponse），输出完成后写入缓存
+
+    参数:
+        cache_key: 订阅内容的缓存键
+        render: 无参函数，返回逐行生成的 VCALENDAR（只在未命中时调用）
+        filename: 下载文件名
+    """
+    cached = cache.get(cache_key)
+    if cached is not None:
+        etag, generated_at, body = cached
+        last_modified = int(generated_at.timestamp())
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = HttpResponse(body, content_type=CONTENT_TYPE)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+    else:
+        response = StreamingHttpResponse(
+            cache_while_streaming(render(), cache_key),
+            content_type=CONTENT_TYPE,
+        )
+    response['Content-Disposition'] = f'inline; filename="{filename}"'
+    return response
+
+
+def invalidate_feeds(calendar_ids):
+    """使若干公开日历的订阅缓存失效"""
+    for calendar_id in set(calendar_ids):
+        key = _version_key(calendar_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # 版本号还不存在（从未缓存过或被淘汰），同样用时间戳，不能从 1 重新开始
+            cache.set(key, int(time.time() * 1000), None)
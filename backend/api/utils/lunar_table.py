@@ -0,0 +1,320 @@
+"""
+农历数据表
+按公历日期批量生成农历日期、干支、生肖、节气，写入 LunarCalendar：
+- 连续的日期只在农历月末重新换算，其余日期直接递推（每月约 2 次换算，而不是每天 1 次）
+- 日干支按儒略日计算，月干支按节气中的"节"划分，年干支和生肖按农历年
+- 节气每年只计算一次
+
+查询时整年的数据一次读入进程内的数组（按年内第几天下标访问），共享缓存中的版本号变化或
+超过 LOCAL_TABLE_SECONDS 后重新读入；
+不在预生成范围内的日期现场换算（按日期做 LRU 缓存），返回格式相同；
+整月、整年的批量查询直接切片，缺数据的部分用递推批量生成
+"""
+import bisect
+import logging
+import time
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Tuple
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.utils import timezone
+from lunarcalendar import Converter, Lunar, Solar
+from lunarcalendar.solarterm import solarterms, zh_hans_terms
+
+logger = logging.getLogger(__name__)
+
+
+TIANGAN = '甲乙丙丁戊己庚辛壬癸'
+DIZHI = '子丑寅卯辰巳午未申酉戌亥'
+ZODIAC = '鼠牛虎兔龙蛇马羊猴鸡狗猪'
+
+# 农历月份、日期中文
+LUNAR_MONTH_CN = ['正', '二', '三', '四', '五', '六', '七', '八', '九', '十', '十一', '十二']
+LUNAR_DAY_CN = ['初一', '初二', '初三', '初四', '初五', '初六', '初七', '初八', '初九', '初十',
+                '十一', '十二', '十三', '十四', '十五', '十六', '十七', '十八', '十九', '二十',
+                '廿一', '廿二', '廿三', '廿四', '廿五', '廿六', '廿七', '廿八', '廿九', '三十']
+
+# 支持的公历年份范围（lunarcalendar 推荐 1900 - 2100，节令月需要前后各一年的节气）
+MIN_YEAR = 1901
+MAX_YEAR = 2099
+
+# 公历日序号（date.toordinal()）换算为儒略日
+JDN_OFFSET = 1721425
+
+# 批量写入时每批的条数
+BULK_BATCH_SIZE = 500
+
+# 现场换算结果的 LRU 缓存条数（约 10 年）
+LIVE_CACHE_SIZE = 4096
+
+# LunarCalendar 中由本模块生成的字段（宜忌等其他字段不覆盖）
+GENERATED_FIELDS = [
+    'lunar_year', 'lunar_month', 'lunar_day', 'lunar_date_cn',
+    'zodiac', 'ganzhi_year', 'ganzhi_month', 'ganzhi_day', 'solar_term',
+]
+
+# 进程内整年数组的最长保留时间（漏掉失效时，如直接改了数据库，也会自动更新）
+LOCAL_TABLE_SECONDS = 300
+
+# 进程内缓存：{year: (version, 过期时间 monotonic, [当年每一天的字段或 None])}
+_year_tables = {}
+
+_VERSION_KEY = 'lunar_table_version'
+
+
+def check_year(year: int):
+    """超出支持范围时抛出 ValueError"""
+    if not MIN_YEAR <= year <= MAX_YEAR:
+        raise ValueError(f'只支持 {MIN_YEAR} - {MAX_YEAR} 年')
+
+
+def ganzhi(index: int) -> str:
+    """六十甲子中的第 index 个（0 = 甲子）"""
+    return TIANGAN[index % 10] + DIZHI[index % 12]
+
+
+def day_ganzhi_index(target_date: date) -> int:
+    """日干支序号：(儒略日 + 49) mod 60"""
+    return (target_date.toordinal() + JDN_OFFSET + 49) % 60
+
+
+@lru_cache(maxsize=None)
+def solar_terms(year: int) -> Dict[date, str]:
+    """一个公历年内的 24 个节气 {日期: 名称}"""
+    return {solarterms[i](year): zh_hans_terms[i] for i in range(24)}
+
+
+@lru_cache(maxsize=None)
+def _month_boundaries(year: int) -> Tuple[List[date], List[int]]:
+    """
+    覆盖公历 year 全年的节令月分界：([交节日期], [月干支序号])
+
+    每个节令月从"节"（立春、惊蛰 ... 大雪、小寒）开始，立春开始的是寅月；
+    以立春所在年 y 计，第 k 个月（0 = 寅月）的月干支序号为 (12y + k + 14) mod 60
+    """
+    boundaries = []
+    for solar_year in (year - 1, year):
+        for k in range(12):
+            if k < 11:
+                start = solarterms[2 * k](solar_year)
+            else:
+                # 小寒在下一个公历年的 1 月
+                start = solarterms[22](solar_year + 1)
+            boundaries.append((start, (solar_year * 12 + k + 14) % 60))
+    boundaries.sort()
+    return [start for start, _ in boundaries], [index for _, index in boundaries]
+
+
+def month_ganzhi_index(target_date: date) -> int:
+    """月干支序号（按交节日期划分）"""
+    starts, indexes = _month_boundaries(target_date.year)
+    return indexes[bisect.bisect_right(starts, target_date) - 1]
+
+
+def day_fields(target_date: date, lunar: Lunar) -> dict:
+    """由公历日期和对应的农历日期得出 LunarCalendar 的字段"""
+    lunar_month = ('闰' if lunar.isleap else '') + f'{LUNAR_MONTH_CN[lunar.month - 1]}月'
+    lunar_day = LUNAR_DAY_CN[lunar.day - 1]
+    ganzhi_year = ganzhi((lunar.year - 4) % 60)
+    return {
+        'lunar_year': lunar.year,
+        'lunar_month': lunar_month,
+        'lunar_day': lunar_day,
+        'lunar_date_cn': f'{ganzhi_year}年{lunar_month}{lunar_day}',
+        'zodiac': ZODIAC[(lunar.year - 4) % 12],
+        'ganzhi_year': ganzhi_year,
+        'ganzhi_month': ganzhi(month_ganzhi_index(target_date)),
+        'ganzhi_day': ganzhi(day_ganzhi_index(target_date)),
+        'solar_term': solar_terms(target_date.year).get(target_date),
+    }
+
+
+@lru_cache(maxsize=LIVE_CACHE_SIZE)
+def compute_day(target_date: date) -> dict:
+    """现场换算一天（不在预生成范围内时使用，结果缓存共享，只读）"""
+    check_year(target_date.year)
+    lunar = Converter.Solar2Lunar(Solar(target_date.year, target_date.month, target_date.day))
+    return day_fields(target_date, lunar)
+
+
+def generate_days(start: date, end: date) -> Iterator[Tuple[date, dict]]:
+    """
+    逐日生成 [start, end] 的字段
+
+    农历月至少 29 天，所以农历初一到廿八的下一天一定在同一个月，直接递推；
+    只有廿九、三十的下一天需要重新换算
+    """
+    check_year(start.year)
+    check_year(end.year)
+    day = start
+    lunar = None
+    while day <= end:
+        if lunar is not None and lunar.day < 29:
+            lunar = Lunar(lunar.year, lunar.month, lunar.day + 1, isleap=lunar.isleap)
+        else:
+            lunar = Converter.Solar2Lunar(Solar(day.year, day.month, day.day))
+        yield day, day_fields(day, lunar)
+        day += timedelta(days=1)
+
+
+# ---------- 写入 ----------
+
+def populate(start: date, end: date) -> Dict[str, int]:
+    """
+    生成 [start, end] 的数据并批量写入 LunarCalendar
+
+    一次查询取出区间内已有的记录，只写入新增和内容变化的日期
+
+    返回:
+        {'inserted': 新增数, 'updated': 更新数, 'unchanged': 未变化数}
+    """
+    from api.models import LunarCalendar
+
+    existing = {row.date: row for row in LunarCalendar.objects.filter(date__range=(start, end))}
+    to_create = []
+    to_update = []
+    now = timezone.now()
+
+    for day, fields in generate_days(start, end):
+        row = existing.get(day)
+        if row is None:
+            to_create.append(LunarCalendar(date=day, **fields))
+            continue
+        if all(getattr(row, field) == value for field, value in fields.items()):
+            continue
+        for field, value in fields.items():
+            setattr(row, field, value)
+        row.last_updated = now  # bulk_update 不会自动更新 auto_now 字段
+        to_update.append(row)
+
+    if to_create:
+        LunarCalendar.objects.bulk_create(to_create, batch_size=BULK_BATCH_SIZE)
+    if to_update:
+        LunarCalendar.objects.bulk_update(
+            to_update, GENERATED_FIELDS + ['last_updated'], batch_size=BULK_BATCH_SIZE
+        )
+    if to_create or to_update:
+        invalidate()
+
+    return {
+        'inserted': len(to_create),
+        'updated': len(to_update),
+        'unchanged': (end - start).days + 1 - len(to_create) - len(to_update),
+    }
+
+
+def generate_years(start_year: int, end_year: int) -> Dict[str, int]:
+    """生成 start_year 到 end_year（包含）的农历数据，并记录同步日志"""
+    from api.models import DataSyncLog
+
+    start, end = date(start_year, 1, 1), date(end_year, 12, 31)
+    print(f"🔄 生成农历数据: {start} - {end}")
+    try:
+        result = populate(start, end)
+    except Exception as e:
+        DataSyncLog.objects.create(
+            data_type='lunar', status='failed', sync_date=start, sync_date_end=end,
+            error_message=str(e), completed_at=timezone.now()
+        )
+        raise
+
+    detail = f"新增 {result['inserted']}，更新 {result['updated']}，未变化 {result['unchanged']}"
+    DataSyncLog.objects.create(
+        data_type='lunar', status='success', sync_date=start, sync_date_end=end,
+        records_count=result['inserted'] + result['updated'], details=result,
+        completed_at=timezone.now()
+    )
+    print(f"✅ 农历数据生成完成: {detail}")
+    return result
+
+
+# ---------- 查询 ----------
+
+def get_version() -> int:
+    """
+    农历表的当前版本号
+
+    版本号不存在（从未失效过或被 Redis 淘汰）时以当前毫秒时间戳初始化，
+    不会退回到其他进程已经用过的旧版本号
+    """
+    version = cache.get(_VERSION_KEY)
+    if version is None:
+        cache.add(_VERSION_KEY, int(time.time() * 1000), None)
+        version = cache.get(_VERSION_KEY, 0)
+    return version
+
+
+def invalidate():
+    """农历表变化后调用：递增版本号，各进程下次查询时重新读入"""
+    try:
+        cache.incr(_VERSION_KEY)
+    except ValueError:
+        # 版本号不存在：同样用时间戳，不能从 1 重新开始
+        cache.set(_VERSION_KEY, int(time.time() * 1000), None)
+    _year_tables.clear()
+
+
+def load_year(year: int) -> List[Optional[dict]]:
+    """读入一年的数据：下标为年内第几天（0 起），没有预生成的日期为 None"""
+    from api.models import LunarCalendar
+
+    days = (date(year + 1, 1, 1) - date(year, 1, 1)).days
+    table = [None] * days
+    try:
+        rows = LunarCalendar.objects.filter(date__year=year).values('date', *GENERATED_FIELDS)
+        for row in rows:
+            table[row.pop('date').timetuple().tm_yday - 1] = row
+    except DatabaseError as e:
+        logger.warning(f"读取农历数据表失败: {e}")
+    return table
+
+
+def _year_table(year: int) -> List[Optional[dict]]:
+    """进程内的整年数组（版本号变化或超过 LOCAL_TABLE_SECONDS 时重新读入）"""
+    version = get_version()
+    now = time.monotonic()
+    local = _year_tables.get(year)
+    if local is None or local[0] != version or local[1] <= now:
+        local = (version, now + LOCAL_TABLE_SECONDS, load_year(year))
+        _year_tables[year] = local
+    return local[2]
+
+
+def get_day(target_date: date) -> dict:
+    """
+    查询一天的农历信息（字段同 LunarCalendar 的生成字段，结果只读）
+
+    优先使用进程内的整年数组，没有预生成的日期现场换算
+
+    异常:
+        ValueError: 日期超出 lunarcalendar 支持的范围
+    """
+    fields = _year_table(target_date.year)[target_date.timetuple().tm_yday - 1]
+    if fields is None:
+        fields = compute_day(target_date)
+    return fields
+
+
+def get_days(start: date, end: date) -> List[Tuple[date, dict]]:
+    """
+    批量查询 [start, end] 每一天的农历信息 [(日期, 字段)]（结果只读）
+
+    每年的数据整段切片；某一年有未预生成的日期时，这一段改用递推批量生成
+
+    异常:
+        ValueError: 日期超出 lunarcalendar 支持的范围
+    """
+    check_year(start.year)
+    check_year(end.year)
+    result = []
+    for year in range(start.year, end.year + 1):
+        first = max(start, date(year, 1, 1))
+        last = min(end, date(year, 12, 31))
+        offset = first.timetuple().tm_yday - 1
+        rows = _year_table(year)[offset:offset + (last - first).days + 1]
+        if all(rows):
+            result.extend((first + timedelta(days=i), fields) for i, fields in enumerate(rows))
+        else:
+            result.extend(generate_days(first, last))
+    return result
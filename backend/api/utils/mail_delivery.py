@@ -0,0 +1,94 @@
+"""
+批量邮件发送工具
+同一批邮件复用一个 SMTP 连接，单封失败不影响整批
+"""
+import logging
+import smtplib
+from dataclasses import dataclass, field
+from typing import Any, Iterable, List, Tuple
+from django.core.mail import get_connection
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BatchResult:
+    """一批邮件的发送结果"""
+    sent: List[Any] = field(default_factory=list)  # 发送成功的 key
+    failed: List[Tuple[Any, str]] = field(default_factory=list)  # (key, 错误信息)
+
+    @property
+    def sent_count(self) -> int:
+        return len(self.sent)
+
+    @property
+    def failed_count(self) -> int:
+        return len(self.failed)
+
+    def as_dict(self) -> dict:
+        return {
+            'sent': self.sent_count,
+            'failed': self.failed_count,
+            'failures': [{'key': key, 'error': error} for key, error in self.failed],
+        }
+
+
+def chunked(items: list, size: int) -> Iterable[list]:
+    """把列表按固定大小切块"""
+    size = max(1, size)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def send_batch(messages: Iterable[Tuple[Any, Any]], connection=None) -> BatchResult:
+    """
+    通过一个 SMTP 连接发送一批邮件
+
+    参数:
+        messages: (key, EmailMessage) 列表，key 用于在结果中标识每封邮件（如事件 ID）
+        connection: 可选的邮件连接（默认按 EMAIL_BACKEND 创建）
+
+    返回:
+        BatchResult
+    """
+    messages = list(messages)
+    result = BatchResult()
+    connection = connection or get_connection(fail_silently=False)
+
+    try:
+        connection.open()
+    except Exception as e:
+        # 连接都建立不了，整批记为失败，交给下一轮重试
+        logger.error(f'建立邮件连接失败: {str(e)}')
+        for key, _ in messages:
+            result.failed.append((key, f'connection: {str(e)}'))
+        return result
+
+    try:
+        for key, message in messages:
+            message.connection = connection
+            try:
+                connection.send_messages([message])
+                result.sent.append(key)
+            except smtplib.SMTPServerDisconnected:
+                # 服务器中途断开：重连一次后重试当前邮件
+                try:
+                    connection.close()
+                    connection.open()
+                    connection.send_messages([message])
+                    result.sent.append(key)
+                except Exception as e:
+                    result.failed.append((key, str(e)))
+            except Exception as e:
+                # 单个地址被拒等错误只影响当前邮件
+                result.failed.append((key, str(e)))
+    finally:
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    if result.failed:
+        logger.warning(f'批量发送: 成功 {result.sent_count} 封，失败 {result.failed_count} 封')
+
+    return result
@@ -0,0 +1,271 @@
+"""
+重复事件工具
+事件只保存一条主记录和 RRULE 规则（RFC 5545），
+查询时只在请求的时间窗口内惰性展开出具体的每一次发生
+"""
+import copy
+from itertools import islice
+from datetime import datetime, time, timedelta
+from dateutil.rrule import rrulestr
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+
+# 允许的重复频率（不支持按小时/分钟重复，避免展开量失控）
+ALLOWED_FREQUENCIES = {'DAILY', 'WEEKLY', 'MONTHLY', 'YEARLY'}
+
+# 有限规则（COUNT 或 UNTIL）允许的最大次数
+MAX_COUNT = 1000
+
+# 单次请求允许展开的最大窗口
+MAX_WINDOW = timedelta(days=366)
+
+# 数据库预筛选重复事件时，为跨越窗口起点的长事件预留的余量
+OVERLAP_MARGIN = timedelta(days=31)
+
+
+def normalize_rule(rule: str) -> str:
+    """去掉前缀 "RRULE:" 和多余空白，统一为大写"""
+    rule = (rule or '').strip()
+    if rule.upper().startswith('RRULE:'):
+        rule = rule[len('RRULE:'):]
+    return rule.upper()
+
+
+def rule_parts(rule: str) -> dict:
+    """把 "FREQ=WEEKLY;COUNT=10" 拆成 {'FREQ': 'WEEKLY', 'COUNT': '10'}"""
+    parts = {}
+    for item in normalize_rule(rule).split(';'):
+        if '=' in item:
+            key, value = item.split('=', 1)
+            parts[key.strip()] = value.strip()
+    return parts
+
+
+def build_rule(rule: str, dtstart):
+    """
+    按事件开始时间构建 dateutil rrule
+
+    在本地时区展开，保证"每周一 10:00"在任何时候都是本地 10:00
+
+    参数:
+        rule: RRULE 字符串（如 "FREQ=WEEKLY;BYDAY=MO"）
+        dtstart: 第一次发生的开始时间（aware datetime）
+    """
+    return rrulestr(f'RRULE:{normalize_rule(rule)}', dtstart=timezone.localtime(dtstart))
+
+
+def validate_rule(rule: str, dtstart=None) -> str:
+    """
+    校验 RRULE 字符串
+
+    返回:
+        规范化后的规则
+
+    异常:
+        ValueError: 规则无法解析或超出允许范围
+    """
+    rule = normalize_rule(rule)
+    if not rule:
+        return ''
+
+    try:
+        build_rule(rule, dtstart or timezone.now())
+    except (ValueError, TypeError) as e:
+        raise ValueError(f'无效的重复规则: {e}')
+
+    parts = rule_parts(rule)
+    if parts.get('FREQ') not in ALLOWED_FREQUENCIES:
+        raise ValueError('重复频率只支持 DAILY / WEEKLY / MONTHLY / YEARLY')
+    if 'COUNT' in parts and int(parts['COUNT']) > MAX_COUNT:
+        raise ValueError(f'重复次数不能超过 {MAX_COUNT}')
+    if 'UNTIL' in parts:
+        # 只数到 MAX_COUNT + 1 次，不会把很远的 UNTIL 整个展开
+        occurrences = islice(build_rule(rule, dtstart or timezone.now()), MAX_COUNT + 1)
+        if sum(1 for _ in occurrences) > MAX_COUNT:
+            raise ValueError(f'重复截止时间太远：重复次数不能超过 {MAX_COUNT}')
+
+    return rule
+
+
+def last_occurrence_start(rule: str, dtstart):
+    """
+    最后一次发生的开始时间
+
+    最多展开 MAX_COUNT + 1 次；超过 MAX_COUNT 次的旧规则（校验加上 UNTIL 上限之前保存的）
+    按无限重复处理，窗口预筛选不会把它漏掉
+
+    返回:
+        datetime: 无限重复（没有 COUNT / UNTIL）或超过 MAX_COUNT 次时返回 None
+    """
+    parts = rule_parts(rule)
+    if 'COUNT' not in parts and 'UNTIL' not in parts:
+        return None
+
+    starts = list(islice(build_rule(rule, dtstart), MAX_COUNT + 1))
+    if not starts or len(starts) > MAX_COUNT:
+        return None
+    return starts[-1]
+
+
+def occurrence_at(event, start):
+    """
+    生成事件在某个时间点的一次发生
+
+    返回主记录的浅拷贝：id 不变（指向主记录），只替换开始/结束时间
+    """
+    occurrence = copy.copy(event)
+    occurrence.start_time = start
+    if event.end_time is not None:
+        occurrence.end_time = start + (event.end_time - event.start_time)
+    return occurrence
+
+
+def occurrence_starts(event, window_start, window_end):
+    """
+    事件在 [window_start, window_end) 内发生的开始时间
+
+    用事件时长向前扩展窗口，跨越窗口起点的发生也会被包含；
+    与普通事件相同，恰好在窗口起点结束的发生不算在窗口内（零时长事件除外）
+    """
+    duration = (event.end_time - event.start_time) if event.end_time else timedelta(0)
+
+    def overlaps(start):
+        return start < window_end and (start + duration > window_start or start >= window_start)
+
+    if not event.is_recurring:
+        return [event.start_time] if overlaps(event.start_time) else []
+
+    parsed = build_rule(event.recurrence_rule, event.start_time)
+    starts = parsed.between(window_start - duration, window_end, inc=True)
+    return [start for start in starts if overlaps(start)][:MAX_COUNT]
+
+
+def parse_window_bound(value: str):
+    """
+    解析窗口边界（支持 ISO 日期时间或日期，日期按本地 00:00）
+
+    异常:
+        ValueError: 格式无法识别
+    """
+    value = (value or '').strip()
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f'无法识别的时间: {value}')
+        parsed = datetime.combine(day, time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def parse_window(start: str, end: str):
+    """
+    解析查询窗口 [start, end)
+
+    异常:
+        ValueError: 格式错误、结束不晚于开始或窗口超过 MAX_WINDOW
+    """
+    window_start = parse_window_bound(start)
+    window_end = parse_window_bound(end)
+    if window_end <= window_start:
+        raise ValueError('end 必须晚于 start')
+    if window_end - window_start > MAX_WINDOW:
+        raise ValueError(f'时间窗口不能超过 {MAX_WINDOW.days} 天')
+    return window_start, window_end
+
+
+def window_queryset(queryset, window_start, window_end):
+    """
+    数据库层面的窗口预筛选
+
+    拆成三段各自能走索引的查询再 UNION，开销只与窗口内的事件数有关：
+        - 普通事件在窗口内开始：start_time ∈ [start, end)    -> (user, start_time) 索引
+        - 普通事件在窗口前开始、跨入窗口：end_time > start     -> (user, end_time) 索引
+        - 重复事件：在窗口结束前开始，且最后一次发生不早于窗口开始
+          （留出余量，精确判断交给展开）                       -> (user, recurrence_rule) 索引
+
+    参数:
+        queryset: 事件 QuerySet（通常已按用户或日历过滤）
+
+    返回:
+        UNION 后的 QuerySet（只能再做排序/切片，不能继续 filter）
+    """
+    queryset = queryset.order_by()  # UNION 的子查询不能带 ORDER BY（展开后再排序）
+    starts_inside = queryset.filter(
+        recurrence_rule='',
+        start_time__gte=window_start,
+        start_time__lt=window_end,
+    )
+    spans_into = queryset.filter(
+        recurrence_rule='',
+        end_time__gt=window_start,
+        start_time__lt=window_start,
+    )
+    recurring = queryset.filter(
+        Q(recurrence_end__isnull=True) | Q(recurrence_end__gte=window_start - OVERLAP_MARGIN),
+        recurrence_rule__gt='',
+        start_time__lt=window_end,
+    )
+    return starts_inside.union(spans_into, recurring, all=True)
+
+
+def expand_events(events, window_start, window_end):
+    """
+    把事件展开为窗口内的具体发生（按开始时间排序）
+
+    普通事件原样返回；重复事件按规则展开，每次发生是主记录的浅拷贝
+
+    参数:
+        events: 事件列表或 QuerySet
+        window_start: 窗口开始（含）
+        window_end: 窗口结束（不含）
+    """
+    occurrences = []
+    for event in events:
+        if not event.is_recurring:
+            if occurrence_starts(event, window_start, window_end):
+                occurrences.append(event)
+            continue
+
+        for start in occurrence_starts(event, window_start, window_end):
+            occurrences.append(occurrence_at(event, start))
+
+    occurrences.sort(key=lambda e: (e.start_time, e.id))
+    return occurrences
+
+
+def next_occurrence_start(event, after=None, inc=True):
+    """
+    下一次发生的开始时间
+
+    参数:
+        event: 事件
+        after: 起算时间（默认当前时间）
+        inc: 是否包含恰好等于 after 的那一次
+
+    返回:
+        datetime: 已经没有后续发生时返回 None
+    """
+    after = after or timezone.now()
+    if not event.is_recurring:
+        if event.start_time > after or (inc and event.start_time == after):
+            return event.start_time
+        return None
+
+    parsed = build_rule(event.recurrence_rule, event.start_time)
+    return parsed.after(timezone.localtime(after), inc=inc)
+
+
+def reminder_occurrence(event):
+    """
+    提醒对应的那一次发生
+
+    重复事件的 remind_at 指向下一次发生，发送邮件时要显示那一次的时间
+    """
+    if not event.is_recurring or event.remind_at is None:
+        return event
+    start = event.remind_at + timedelta(minutes=event.reminder_minutes or 0)
+    return occurrence_at(event, start)
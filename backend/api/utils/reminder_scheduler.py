@@ -0,0 +1,194 @@
+"""
+提醒调度工具
+事件保存时计算好提醒触发时间（Event.remind_at），
+定时任务每分钟只按索引读取当前分钟到期的提醒；
+开启汇总模式的用户由汇总任务提前把一个窗口内的提醒合并发送
+"""
+from datetime import timedelta
+from itertools import groupby
+from django.db.models import Q
+from django.utils import timezone
+from api.models import Event, ReminderPreference
+from api.utils.recurrence import next_occurrence_start
+
+
+# 容差范围：Celery Beat 可能有 1-2 分钟的延迟
+REMINDER_GRACE_MINUTES = 2
+
+# 各汇总模式覆盖的时间窗口
+DIGEST_WINDOWS = {
+    ReminderPreference.DIGEST_HOURLY: timedelta(hours=1),
+    ReminderPreference.DIGEST_DAILY: timedelta(days=1),
+}
+
+
+def due_reminders(now=None):
+    """
+    获取当前到期的提醒
+
+    条件：提醒时间 - 容差 < 提醒时间 <= 当前时间
+    查询只命中 remind_at 索引中的一小段，开销只与到期提醒数量有关
+
+    参数:
+        now: 当前时间（默认 timezone.now()）
+
+    返回:
+        到期事件的 QuerySet（已关联 user）
+    """
+    now = now or timezone.now()
+    window_start = now - timedelta(minutes=REMINDER_GRACE_MINUTES)
+
+    return Event.objects.filter(
+        Q(start_time__gte=now) | ~Q(recurrence_rule=''),  # 事件还没开始（重复事件的 remind_at 已指向下一次发生）
+        remind_at__gt=window_start,
+        remind_at__lte=now,
+        email_reminder=True,  # 启用了邮件提醒
+        notification_sent=False,  # 尚未发送
+        user__email__isnull=False,  # 有邮箱
+        user__email__gt='',
+    ).select_related('user').order_by('remind_at', 'id')
+
+
+def digest_reminders(mode, now=None):
+    """
+    获取某个汇总模式下、本窗口内将要触发的提醒（一个窗口一条查询）
+
+    窗口从 now + 容差 开始：已经到期或马上到期的提醒仍由逐分钟任务单独发送，
+    两个任务读取的 remind_at 区间不重叠，不会重复发送；
+    汇总之后才新建/修改的事件也会由逐分钟任务兜底
+
+    参数:
+        mode: 汇总模式（ReminderPreference.DIGEST_HOURLY / DIGEST_DAILY）
+        now: 当前时间（默认 timezone.now()）
+
+    返回:
+        事件 QuerySet（已关联 user，按用户、开始时间排序）
+    """
+    now = now or timezone.now()
+    window_start = now + timedelta(minutes=REMINDER_GRACE_MINUTES)
+    window_end = now + DIGEST_WINDOWS[mode]
+
+    return Event.objects.filter(
+        user__reminder_preference__digest_mode=mode,
+        remind_at__gt=window_start,
+        remind_at__lte=window_end,
+        email_reminder=True,
+        notification_sent=False,
+        user__email__isnull=False,
+        user__email__gt='',
+    ).select_related('user').order_by('user_id', 'start_time', 'id')
+
+
+def group_by_user(events):
+    """
+    把按用户排序的事件分组
+
+    返回:
+        [(user, [event, ...]), ...]
+    """
+    return [
+        (user_events[0].user, user_events)
+        for user_events in (list(group) for _, group in groupby(events, key=lambda e: e.user_id))
+    ]
+
+
+def reschedule_reminders(queryset, batch_size: int = 500) -> int:
+    """
+    重新计算一批事件的提醒触发时间
+
+    用于绕过 Event.save() 的批量更新（如 QuerySet.update）之后
+
+    参数:
+        queryset: 事件 QuerySet
+        batch_size: 每批写入数量
+
+    返回:
+        更新的事件数
+    """
+    events = []
+    for event in queryset.only('id', 'start_time', 'reminder_minutes', 'email_reminder', 'recurrence_rule', 'remind_at'):
+        remind_at = event.compute_remind_at()
+        if remind_at != event.remind_at:
+            event.remind_at = remind_at
+            events.append(event)
+
+    if events:
+        Event.objects.bulk_update(events, ['remind_at'], batch_size=batch_size)
+
+    return len(events)
+
+
+def mark_reminders_sent(event_ids) -> int:
+    """
+    把一批事件标记为提醒已发送
+
+    普通事件用单条 UPDATE 标记；重复事件不标记，而是把 remind_at 推进到下一次发生
+
+    参数:
+        event_ids: 事件 ID 列表
+
+    返回:
+        更新的事件数
+    """
+    event_ids = list(event_ids)
+    if not event_ids:
+        return 0
+
+    # QuerySet.update 不会触发 auto_now，手动更新 updated_at 让增量同步能读到变更
+    updated = Event.objects.filter(id__in=event_ids, recurrence_rule='').update(
+        notification_sent=True, updated_at=timezone.now()
+    )
+    recurring = Event.objects.filter(id__in=event_ids).exclude(recurrence_rule='')
+    return updated + advance_recurring_reminders(recurring)
+
+
+def advance_recurring_reminders(queryset, batch_size: int = 500) -> int:
+    """
+    把重复事件的 remind_at 推进到下一次发生
+
+    没有后续发生的重复事件标记为已发送
+
+    参数:
+        queryset: 重复事件 QuerySet
+        batch_size: 每批写入数量
+
+    返回:
+        更新的事件数
+    """
+    events = list(queryset.only(
+        'id', 'start_time', 'end_time', 'reminder_minutes', 'email_reminder',
+        'recurrence_rule', 'remind_at', 'notification_sent',
+    ))
+    if not events:
+        return 0
+
+    now = timezone.now()
+    for event in events:
+        event.updated_at = now
+        # 从当前这次提醒对应的发生之后开始找下一次
+        current = event.remind_at + timedelta(minutes=event.reminder_minutes or 0) if event.remind_at else now
+        next_start = next_occurrence_start(event, after=max(current, now), inc=False)
+        if next_start is None:
+            event.remind_at = None
+            event.notification_sent = True
+        else:
+            event.remind_at = next_start - timedelta(minutes=event.reminder_minutes or 0)
+
+    Event.objects.bulk_update(events, ['remind_at', 'notification_sent', 'updated_at'], batch_size=batch_size)
+    return len(events)
+
+
+def advance_stale_recurring_reminders(now=None) -> int:
+    """
+    推进错过的重复事件提醒
+
+    Beat 停机等原因错过窗口的重复事件，remind_at 会停留在过去，
+    这里把它们推进到下一次发生，避免之后的每次发生都收不到提醒
+    """
+    now = now or timezone.now()
+    stale = Event.objects.filter(
+        remind_at__lte=now - timedelta(minutes=REMINDER_GRACE_MINUTES),
+        email_reminder=True,
+        notification_sent=False,
+    ).exclude(recurrence_rule='')
+    return advance_recurring_reminders(stale)
@@ -0,0 +1,103 @@
+"""
+个人日历订阅
+外部日历应用（Google / Apple / Outlook）通过带签名令牌的地址订阅用户自己的事件：
+- 令牌 = 签名的 (用户 ID, 版本号)，不在数据库保存明文；重置时版本号加一，旧地址立即失效
+- 只输出滚动窗口内的事件（过去 USER_FEED_PAST_DAYS 天到未来 USER_FEED_FUTURE_DAYS 天），
+  重复事件输出主记录和 RRULE，由客户端展开
+- 完整内容按用户最后修改时间缓存，客户端轮询时数据没变就不再生成
+"""
+import hashlib
+from datetime import datetime, time, timedelta
+from django.conf import settings
+from django.core import signing
+from django.db.models import F, Max
+from django.utils import timezone
+from api.models import CalendarFeedToken, Event, EventTombstone
+from api.utils.ics import FORMAT_VERSION, iter_calendar
+from api.utils.recurrence import window_queryset
+
+
+FEED_SALT = 'api.user_calendar_feed'
+
+
+def _signer():
+    # 不带时间戳：同一版本的令牌始终相同，重复获取不会得到不同的地址
+    return signing.Signer(salt=FEED_SALT)
+
+
+def get_feed_token(user) -> str:
+    """获取用户当前的订阅令牌（首次调用时创建）"""
+    feed, _ = CalendarFeedToken.objects.get_or_create(user=user)
+    return _signer().sign_object({'u': user.id, 'v': feed.version}, compress=True)
+
+
+def rotate_feed_token(user) -> str:
+    """重置订阅令牌，旧的订阅地址立即失效"""
+    feed, created = CalendarFeedToken.objects.get_or_create(user=user)
+    if not created:
+        CalendarFeedToken.objects.filter(pk=feed.pk).update(version=F('version') + 1)
+    return get_feed_token(user)
+
+
+def resolve_feed_token(token: str):
+    """
+    校验订阅令牌
+
+    返回:
+        User: 令牌有效时返回对应用户，签名错误、已吊销或用户已停用时返回 None
+    """
+    try:
+        payload = _signer().unsign_object(token)
+        user_id, version = int(payload['u']), int(payload['v'])
+    except (signing.BadSignature, KeyError, TypeError, ValueError):
+        return None
+
+    feed = (
+        CalendarFeedToken.objects
+        .select_related('user')
+        .filter(user_id=user_id, version=version, user__is_active=True)
+        .first()
+    )
+    return feed.user if feed else None
+
+
+def feed_window(now=None):
+    """
+    订阅的滚动窗口 [start, end)
+
+    按本地日期对齐，同一天内窗口不变，缓存可以复用
+    """
+    today = timezone.localtime(now).date()
+    start = timezone.make_aware(datetime.combine(today - timedelta(days=settings.USER_FEED_PAST_DAYS), time.min))
+    end = timezone.make_aware(datetime.combine(today + timedelta(days=settings.USER_FEED_FUTURE_DAYS + 1), time.min))
+    return start, end
+
+
+def user_feed_cache_key(user, window_start) -> str:
+    """
+    个人订阅的缓存键
+
+    由用户事件的最后修改时间和最后删除时间决定（两条走索引的聚合查询），
+    事件新建/修改/删除或窗口滚动到新的一天都会换成新的键
+    """
+    last_updated = Event.objects.filter(user=user).aggregate(last=Max('updated_at'))['last']
+    last_deleted = EventTombstone.objects.filter(user=user).aggregate(last=Max('deleted_at'))['last']
+    parts = [
+        str(FORMAT_VERSION),
+        user.username,
+        last_updated.isoformat() if last_updated else '',
+        last_deleted.isoformat() if last_deleted else '',
+        window_start.date().isoformat(),
+    ]
+    digest = hashlib.md5('|'.join(parts).encode('utf-8')).hexdigest()
+    return f'user_feed_{user.id}_{digest}'
+
+
+def iter_user_calendar(user, window_start, window_end):
+    """逐行生成用户在窗口内的 VCALENDAR"""
+    events = (
+        window_queryset(Event.objects.filter(user=user), window_start, window_end)
+        .order_by('start_time', 'id')
+        .iterator(chunk_size=500)
+    )
+    return iter_calendar(f'{user.username} 的日历', events, 'Ralendar 个人日历')
@@ -0,0 +1,255 @@
+"""
+高德实时天气客户端（天气接口和运势接口共用）
+
+- 按城市名 / adcode 缓存实况数据：WEATHER_CACHE_SECONDS 内直接返回
+- 过期但不超过 WEATHER_STALE_SECONDS：先返回旧数据，后台线程刷新
+  （刷新标记放在共享的 Redis 缓存中，所有进程同一时间只刷新一次；换成进程内缓存时只能保证单个进程内）
+- 同一进程内同一城市的并发未命中合并成一次上游请求，其余请求等待结果
+- 上游出错时返回最后一次成功的数据（保留 WEATHER_FALLBACK_SECONDS），没有可用数据才抛出异常
+
+aget_live() 是异步版本（异步接口使用）：共用同一份缓存，上游请求走 httpx 连接池，
+等待上游时不占用线程；后台刷新仍交给刷新线程池
+"""
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
+import httpx
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from api.utils import async_http
+
+logger = logging.getLogger(__name__)
+
+
+AMAP_WEATHER_URL = 'https://restapi.amap.com/v3/weather/weatherInfo'
+
+# 后台刷新线程池（刷新只涉及网络等待，两个线程足够）
+_refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='weather-refresh')
+
+# 进程内正在进行的上游请求：{缓存键: Future}
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+# 每个线程一个 Session（复用连接）
+_local = threading.local()
+
+# 异步版本正在进行的上游请求：{事件循环: {缓存键: asyncio.Future}}
+_async_inflight = weakref.WeakKeyDictionary()
+
+
+class WeatherError(Exception):
+    """天气服务返回错误（未配置、上游返回失败）"""
+
+
+class CityNotFound(WeatherError):
+    """上游没有该城市的实况数据"""
+
+
+def _session() -> requests.Session:
+    session = getattr(_local, 'session', None)
+    if session is None:
+        session = _local.session = requests.Session()
+    return session
+
+
+def _cache_key(city: str) -> str:
+    # 城市名可能是中文，memcached 等后端不接受，取摘要
+    return 'weather_live_' + hashlib.md5(city.encode('utf-8')).hexdigest()
+
+
+def _params(city: str) -> dict:
+    api_key = getattr(settings, 'AMAP_API_KEY', '')
+    if not api_key:
+        raise WeatherError('天气服务未配置')
+    return {
+        'city': city,  # 城市名称或adcode
+        'key': api_key,  # API Key
+        'extensions': 'base',  # 返回实况天气
+    }
+
+
+def _parse(data: dict, city: str) -> dict:
+    if data.get('status') != '1':
+        raise WeatherError(data.get('info', '未知错误'))
+    lives = data.get('lives', [])
+    if not lives:
+        raise CityNotFound(f'未找到城市: {city}')
+    return lives[0]
+
+
+def fetch_live(city: str) -> dict:
+    """
+    直接请求高德实时天气（不经过缓存）
+
+    返回:
+        高德返回的 lives[0]（city、adcode、weather、temperature、humidity ...）
+
+    异常:
+        WeatherError / CityNotFound: 未配置或上游返回失败
+        requests.RequestException: 网络错误、超时
+    """
+    params = _params(city)
+    logger.info(f'请求高德地图天气API: location={city}')
+    response = _session().get(AMAP_WEATHER_URL, params=params, timeout=settings.WEATHER_TIMEOUT)
+    response.raise_for_status()
+    return _parse(response.json(), city)
+
+
+async def afetch_live(city: str) -> dict:
+    """
+    fetch_live() 的异步版本（共用 httpx 连接池）
+
+    异常:
+        WeatherError / CityNotFound: 未配置或上游返回失败
+        httpx.HTTPError: 网络错误、超时
+    """
+    params = _params(city)
+    logger.info(f'请求高德地图天气API: location={city}')
+    response = await async_http.get_client().get(
+        AMAP_WEATHER_URL, params=params, timeout=settings.WEATHER_TIMEOUT
+    )
+    response.raise_for_status()
+    return _parse(response.json(), city)
+
+
+def _store(key: str, live: dict):
+    entry = {'live': live, 'fetched_at': time.time()}
+    cache.set(key, entry, settings.WEATHER_FALLBACK_SECONDS)
+    # 同时按 adcode 缓存，按 adcode 查询同一城市也能命中
+    adcode = live.get('adcode')
+    if adcode and _cache_key(adcode) != key:
+        cache.set(_cache_key(adcode), entry, settings.WEATHER_FALLBACK_SECONDS)
+
+
+def _fetch_coalesced(city: str, key: str) -> dict:
+    """请求上游并写入缓存；同一进程内同一城市同时只有一个请求，其他调用等待它的结果"""
+    with _inflight_lock:
+        future = _inflight.get(key)
+        owner = future is None
+        if owner:
+            future = _inflight[key] = Future()
+
+    if not owner:
+        return future.result()
+
+    try:
+        live = fetch_live(city)
+        _store(key, live)
+        future.set_result(live)
+        return live
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+
+
+def _refresh(city: str, key: str, lock_key: str):
+    try:
+        _fetch_coalesced(city, key)
+    except Exception as e:
+        # 刷新失败保留旧数据，下次请求再试
+        logger.warning(f'后台刷新天气失败: {city} {str(e)}')
+    finally:
+        cache.delete(lock_key)
+
+
+def _schedule_refresh(city: str, key: str):
+    """后台刷新；同一城市同时只有一个刷新（共享缓存上的 cache.add 是原子操作，对所有进程有效）"""
+    lock_key = f'{key}_refreshing'
+    if cache.add(lock_key, 1, settings.WEATHER_TIMEOUT * 3):
+        _refresh_executor.submit(_refresh, city, key, lock_key)
+
+
+def get_live(city: str) -> dict:
+    """
+    获取城市的实况天气（带缓存）
+
+    参数:
+        city: 城市名称或 adcode
+
+    返回:
+        高德返回的 lives[0]
+
+    异常:
+        同 fetch_live()，只在没有任何可用的旧数据时抛出
+    """
+    city = city.strip()
+    key = _cache_key(city)
+    entry = cache.get(key)
+
+    if entry is not None:
+        age = time.time() - entry['fetched_at']
+        if age < settings.WEATHER_CACHE_SECONDS:
+            return entry['live']
+        if age < settings.WEATHER_STALE_SECONDS:
+            # 稍旧的数据：直接返回，后台刷新
+            _schedule_refresh(city, key)
+            return entry['live']
+
+    try:
+        return _fetch_coalesced(city, key)
+    except (WeatherError, requests.RequestException) as e:
+        if entry is None:
+            raise
+        # 上游出错：返回最后一次成功的数据
+        logger.warning(f'天气查询失败，使用 {int(time.time() - entry["fetched_at"])} 秒前的数据: {city} {str(e)}')
+        return entry['live']
+
+
+async def _afetch_coalesced(city: str, key: str) -> dict:
+    """_fetch_coalesced() 的异步版本：同一事件循环内同一城市同时只有一个上游请求"""
+    inflight = _async_inflight.setdefault(asyncio.get_running_loop(), {})
+    future = inflight.get(key)
+    if future is not None:
+        # shield：等待方被取消时不影响发起方的请求
+        return await asyncio.shield(future)
+
+    future = inflight[key] = asyncio.get_running_loop().create_future()
+    try:
+        live = await afetch_live(city)
+        await sync_to_async(_store)(key, live)
+        future.set_result(live)
+        return live
+    except BaseException as e:
+        future.set_exception(e)
+        # 没有其他等待方时避免 "exception was never retrieved" 警告
+        future.exception()
+        raise
+    finally:
+        inflight.pop(key, None)
+
+
+async def aget_live(city: str) -> dict:
+    """
+    get_live() 的异步版本（缓存、后台刷新、出错回退规则相同）
+
+    异常:
+        同 afetch_live()，只在没有任何可用的旧数据时抛出
+    """
+    city = city.strip()
+    key = _cache_key(city)
+    entry = await cache.aget(key)
+
+    if entry is not None:
+        age = time.time() - entry['fetched_at']
+        if age < settings.WEATHER_CACHE_SECONDS:
+            return entry['live']
+        if age < settings.WEATHER_STALE_SECONDS:
+            await sync_to_async(_schedule_refresh)(city, key)
+            return entry['live']
+
+    try:
+        return await _afetch_coalesced(city, key)
+    except (WeatherError, httpx.HTTPError) as e:
+        if entry is None:
+            raise
+        logger.warning(f'天气查询失败，使用 {int(time.time() - entry["fetched_at"])} 秒前的数据: {city} {str(e)}')
+        return entry['live']
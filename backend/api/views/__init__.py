@@ -5,22 +5,26 @@ API Views Package - 模块化视图导入
 
 重构说明：
 - auth/: 认证相关（auth.py, oauth_callback.py, user.py）
-- calendar/: 日历核心（calendars.py, events.py）
+- calendar/: 日历核心（calendars.py, events.py, feeds.py）
 - external/: 外部服务（holidays.py, lunar.py, weather.py）
 - ai/: AI助手（assistant.py）
 - integration/: 第三方集成（fusion.py）
 - oauth/: OAuth 2.0 服务器（authorize.py, token.py, userinfo.py, revoke.py）
+
+调用上游服务的接口另有异步版本（*_async），路由见 url_patterns/async_api.py
 """
 
 # Calendar Core - ViewSets
 from .calendar.events import EventViewSet
 from .calendar.calendars import PublicCalendarViewSet
+from .calendar.feeds import calendar_feed_token, user_calendar_feed
 
 # Authentication
 from .auth.auth import get_current_user, acwing_login, qq_login, get_acwing_login_url, get_qq_login_url
+from .auth.auth import acwing_login_async, qq_login_async
 
 # User Profile
-from .auth.user import get_user_stats, get_bindings, update_profile, change_password, unbind_acwing, unbind_qq
+from .auth.user import get_user_stats, get_bindings, update_profile, reminder_preference, change_password, unbind_acwing, unbind_qq
 
 # OAuth Callback
 from .auth.oauth_callback import acwing_oauth_callback
@@ -32,9 +36,13 @@ from .oauth.userinfo import oauth_userinfo
 from .oauth.revoke import oauth_revoke, oauth_authorized_apps
 
 # External Services
-from .external.lunar import get_lunar_date
-from .external.holidays import get_holidays, check_holiday, get_today_holidays
-from .external.fortune import get_today_fortune
+from .external.lunar import get_lunar_date, get_lunar_range
+from .external.holidays import get_holidays, check_holiday, get_holiday_range, get_today_holidays
+from .external.fortune import get_today_fortune, get_today_fortune_async
+from .external.weather import get_weather_async
+
+# AI Assistant
+from .ai.assistant import parse_event_from_text_async
 
 # Third-party Integration
 from .integration.fusion import (
@@ -55,16 +63,21 @@ __all__ = [
     # Calendar
     'EventViewSet',
     'PublicCalendarViewSet',
+    'calendar_feed_token',
+    'user_calendar_feed',
     # Authentication
     'get_current_user',
     'acwing_login',
     'qq_login',
     'get_acwing_login_url',
     'get_qq_login_url',
+    'acwing_login_async',
+    'qq_login_async',
     # User Profile
     'get_user_stats',
     'get_bindings',
     'update_profile',
+    'reminder_preference',
     'change_password',
     'unbind_acwing',
     'unbind_qq',
@@ -78,10 +91,16 @@ __all__ = [
     'oauth_authorized_apps',
     # External Services
     'get_lunar_date',
+    'get_lunar_range',
     'get_holidays',
     'check_holiday',
+    'get_holiday_range',
     'get_today_holidays',
     'get_today_fortune',
+    'get_today_fortune_async',
+    'get_weather_async',
+    # AI Assistant
+    'parse_event_from_text_async',
     # Fusion APIs
     'batch_create_events',
     'get_user_events',
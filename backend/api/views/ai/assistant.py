@@ -8,28 +8,24 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from django.conf import settings
+import httpx
 import requests
+from api.utils import async_http
 
 logger = logging.getLogger(__name__)
 
+QWEN_API_URL = "https://dashscope.aliyuncs.com/api/v1/services/aigc/text-generation/generation"
 
-def call_qwen_api(prompt: str, system_prompt: str = None) -> str:
-    """
-    调用通义千问API
-    
-    参数:
-        prompt: 用户输入
-        system_prompt: 系统提示词（可选）
-    
-    返回:
-        AI响应文本
-    """
+# 请求通义千问的超时时间（秒）
+QWEN_TIMEOUT = 30
+
+
+def _qwen_request(prompt: str, system_prompt: str = None):
+    """通义千问请求的 (headers, data)"""
     api_key = getattr(settings, 'QWEN_API_KEY', None)
     if not api_key:
         raise ValueError("未配置通义千问API密钥")
     
-    url = "https://dashscope.aliyuncs.com/api/v1/services/aigc/text-generation/generation"
-    
     headers = {
         "Authorization": f"Bearer {api_key}",
         "Content-Type": "application/json"
@@ -55,24 +51,125 @@ def call_qwen_api(prompt: str, system_prompt: str = None) -> str:
             "result_format": "message"
         }
     }
+    return headers, data
+
+
+def _qwen_content(result: dict) -> str:
+    # 提取AI回复
+    if result.get('output') and result['output'].get('choices'):
+        return result['output']['choices'][0]['message']['content']
+    else:
+        logger.error(f"通义千问API响应格式异常: {result}")
+        return None
+
+
+def call_qwen_api(prompt: str, system_prompt: str = None) -> str:
+    """
+    调用通义千问API
+    
+    参数:
+        prompt: 用户输入
+        system_prompt: 系统提示词（可选）
+    
+    返回:
+        AI响应文本
+    """
+    headers, data = _qwen_request(prompt, system_prompt)
     
     try:
-        response = requests.post(url, headers=headers, json=data, timeout=30)
+        response = requests.post(QWEN_API_URL, headers=headers, json=data, timeout=QWEN_TIMEOUT)
         response.raise_for_status()
-        result = response.json()
-        
-        # 提取AI回复
-        if result.get('output') and result['output'].get('choices'):
-            return result['output']['choices'][0]['message']['content']
-        else:
-            logger.error(f"通义千问API响应格式异常: {result}")
-            return None
+        return _qwen_content(response.json())
             
     except requests.RequestException as e:
         logger.error(f"调用通义千问API失败: {e}")
         raise
 
 
+async def acall_qwen_api(prompt: str, system_prompt: str = None) -> str:
+    """call_qwen_api 的异步版本（共用 httpx 连接池）"""
+    headers, data = _qwen_request(prompt, system_prompt)
+    
+    try:
+        response = await async_http.get_client().post(
+            QWEN_API_URL, headers=headers, json=data, timeout=QWEN_TIMEOUT
+        )
+        response.raise_for_status()
+        return _qwen_content(response.json())
+            
+    except httpx.HTTPError as e:
+        logger.error(f"调用通义千问API失败: {e}")
+        raise
+
+
+def parse_event_prompt() -> str:
+    """解析日程的系统提示词（带当前时间）"""
+    return """你是一个日程助手，负责将用户的自然语言输入解析为结构化的日程信息。
+
+当前日期时间: {now}
+
+请将用户输入解析为JSON格式，包含以下字段：
+- title: 日程标题（必填）
+- date: 日期 YYYY-MM-DD 格式（必填）
+- time: 时间 HH:MM 格式（可选，没有时间信息则不填）
+- description: 描述（可选）
+- reminder_minutes: 提前提醒分钟数（可选，默认15分钟）
+
+注意：
+1. "明天"、"后天"等相对时间要转换为具体日期
+2. "下午3点"要转换为24小时制"15:00"
+3. 如果没有明确时间，可以根据事件类型推荐时间
+4. 只返回JSON，不要其他文字
+
+示例：
+输入: "明天下午3点开会，讨论项目方案"
+输出: {{"title": "项目方案讨论会议", "date": "2025-11-13", "time": "15:00", "description": "讨论项目方案", "reminder_minutes": 15}}
+""".format(now=datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+
+
+def parse_event_result(ai_response: str):
+    """
+    从AI响应中解析日程
+
+    返回:
+        (响应数据, HTTP 状态码)
+    """
+    if not ai_response:
+        return {'error': 'AI解析失败'}, 500
+    
+    # 解析JSON
+    try:
+        # 尝试从AI响应中提取JSON
+        ai_response = ai_response.strip()
+        if ai_response.startswith('```json'):
+            ai_response = ai_response[7:]
+        if ai_response.endswith('```'):
+            ai_response = ai_response[:-3]
+        ai_response = ai_response.strip()
+        
+        event_data = json.loads(ai_response)
+        
+        # 验证必填字段
+        if 'title' not in event_data or 'date' not in event_data:
+            return {
+                'error': 'AI解析结果缺少必填字段',
+                'raw_response': ai_response
+            }, 500
+        
+        return {
+            'success': True,
+            'event': event_data,
+            'raw_response': ai_response
+        }, 200
+        
+    except json.JSONDecodeError as e:
+        logger.error(f"解析AI响应JSON失败: {e}, 原始响应: {ai_response}")
+        return {
+            'error': 'AI返回格式错误',
+            'raw_response': ai_response
+        }, 500
+
+
 @api_view(['POST'])
 @permission_classes([AllowAny])  # 临时允许匿名访问（开发测试阶段）
 def parse_event_from_text(request):
@@ -97,71 +194,36 @@ def parse_event_from_text(request):
     if not text:
         return Response({'error': '请提供文本输入'}, status=400)
     
-    # 构建系统提示词
-    system_prompt = """你是一个日程助手，负责将用户的自然语言输入解析为结构化的日程信息。
-
-当前日期时间: {now}
-
-请将用户输入解析为JSON格式，包含以下字段：
-- title: 日程标题（必填）
-- date: 日期 YYYY-MM-DD 格式（必填）
-- time: 时间 HH:MM 格式（可选，没有时间信息则不填）
-- description: 描述（可选）
-- reminder_minutes: 提前提醒分钟数（可选，默认15分钟）
+    try:
+        # 调用AI
+        ai_response = call_qwen_api(text, parse_event_prompt())
+        data, status_code = parse_event_result(ai_response)
+        return Response(data, status=status_code)
+            
+    except Exception as e:
+        logger.error(f"AI解析日程失败: {e}")
+        return Response({'error': f'处理失败: {str(e)}'}, status=500)
 
-注意：
-1. "明天"、"后天"等相对时间要转换为具体日期
-2. "下午3点"要转换为24小时制"15:00"
-3. 如果没有明确时间，可以根据事件类型推荐时间
-4. 只返回JSON，不要其他文字
 
-示例：
-输入: "明天下午3点开会，讨论项目方案"
-输出: {{"title": "项目方案讨论会议", "date": "2025-11-13", "time": "15:00", "description": "讨论项目方案", "reminder_minutes": 15}}
-""".format(now=datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+@async_http.async_view(['POST'])
+async def parse_event_from_text_async(request):
+    """
+    parse_event_from_text 的异步版本（POST /api/v1/async/ai/parse-event/，参数和返回相同）
+    
+    等待通义千问响应（通常数秒）时不占用工作线程
+    """
+    text = async_http.request_data(request).get('text')
+    if not text:
+        return async_http.json_response({'error': '请提供文本输入'}, status=400)
     
     try:
-        # 调用AI
-        ai_response = call_qwen_api(text, system_prompt)
-        
-        if not ai_response:
-            return Response({'error': 'AI解析失败'}, status=500)
-        
-        # 解析JSON
-        try:
-            # 尝试从AI响应中提取JSON
-            ai_response = ai_response.strip()
-            if ai_response.startswith('```json'):
-                ai_response = ai_response[7:]
-            if ai_response.endswith('```'):
-                ai_response = ai_response[:-3]
-            ai_response = ai_response.strip()
-            
-            event_data = json.loads(ai_response)
-            
-            # 验证必填字段
-            if 'title' not in event_data or 'date' not in event_data:
-                return Response({
-                    'error': 'AI解析结果缺少必填字段',
-                    'raw_response': ai_response
-                }, status=500)
-            
-            return Response({
-                'success': True,
-                'event': event_data,
-                'raw_response': ai_response
-            })
-            
-        except json.JSONDecodeError as e:
-            logger.error(f"解析AI响应JSON失败: {e}, 原始响应: {ai_response}")
-            return Response({
-                'error': 'AI返回格式错误',
-                'raw_response': ai_response
-            }, status=500)
+        ai_response = await acall_qwen_api(text, parse_event_prompt())
+        data, status_code = parse_event_result(ai_response)
+        return async_http.json_response(data, status=status_code)
             
     except Exception as e:
         logger.error(f"AI解析日程失败: {e}")
-        return Response({'error': f'处理失败: {str(e)}'}, status=500)
+        return async_http.json_response({'error': f'处理失败: {str(e)}'}, status=500)
 
 
 @api_view(['POST'])
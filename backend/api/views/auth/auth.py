@@ -8,14 +8,26 @@ from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth.models import User
 from django.conf import settings
+from asgiref.sync import sync_to_async
+import httpx
 import requests
+import json
 import logging
+import re
+import traceback
+import urllib.parse
 
 from ...models import AcWingUser, QQUser
 from ...serializers import UserSerializer
+from ...utils import async_http
 
 logger = logging.getLogger(__name__)
 
+QQ_TOKEN_URL = "https://graph.qq.com/oauth2.0/token"
+QQ_USERINFO_URL = "https://graph.qq.com/user/get_user_info"
+QQ_EMAIL_URL = "https://graph.qq.com/user/get_info"
+QQ_REDIRECT_URI = 'https://app7626.acapp.acwing.com.cn/qq/callback'
+
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -25,102 +37,122 @@ def get_current_user(request):
     return Response(serializer.data)
 
 
+class LoginError(Exception):
+    """第三方登录失败（错误信息直接返回给前端）"""
+
+    def __init__(self, message, status_code=status.HTTP_400_BAD_REQUEST):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+# ---------- AcWing 登录：解析上游响应、创建用户（同步、异步接口共用） ----------
+
+def _acwing_token_url(code):
+    # AcWing 应用信息（从配置文件读取）
+    ACWING_APPID = getattr(settings, 'ACWING_APPID', '7626')
+    ACWING_SECRET = getattr(settings, 'ACWING_SECRET', '')
+    return f"https://www.acwing.com/third_party/api/oauth2/access_token/?appid={ACWING_APPID}&secret={ACWING_SECRET}&code={code}"
+
+
+def _acwing_token(token_data):
+    """access_token 响应 -> (access_token, openid, refresh_token)"""
+    if 'errcode' in token_data:
+        error_msg = f"Failed to get token: {token_data.get('errmsg', 'unknown error')}"
+        logger.error(f"[AcWing Login] {error_msg}")
+        raise LoginError(error_msg)
+    
+    return token_data['access_token'], token_data['openid'], token_data.get('refresh_token', '')
+
+
+def _acwing_userinfo_url(access_token, openid):
+    return f"https://www.acwing.com/third_party/api/meta/identity/getinfo/?access_token={access_token}&openid={openid}"
+
+
+def _acwing_userinfo(userinfo_data):
+    """用户信息响应 -> (username, photo_url)"""
+    if 'errcode' in userinfo_data:
+        raise LoginError(f"获取用户信息失败: {userinfo_data.get('errmsg', 'unknown error')}")
+    
+    return userinfo_data['username'], userinfo_data.get('photo', '')
+
+
+def acwing_login_user(openid, access_token, refresh_token, username, photo_url):
+    """查找或创建 AcWing 用户并签发 JWT，返回登录接口的响应数据"""
+    acwing_user = AcWingUser.objects.filter(openid=openid).first()
+    
+    if acwing_user:
+        # 已存在的用户，更新token
+        acwing_user.access_token = access_token
+        acwing_user.refresh_token = refresh_token
+        acwing_user.photo_url = photo_url
+        acwing_user.save()
+        user = acwing_user.user
+        # 更新用户名（如果AcWing上修改了）
+        if user.username != username:
+            # 检查新用户名是否已被其他用户占用
+            if not User.objects.filter(username=username).exclude(id=user.id).exists():
+                user.username = username
+                user.save()
+    else:
+        # 新用户，创建账号
+        # 检查用户名是否已存在，如果存在则添加后缀
+        base_username = username
+        counter = 1
+        while User.objects.filter(username=username).exists():
+            username = f"{base_username}_{counter}"
+            counter += 1
+        
+        user = User.objects.create_user(
+            username=username,
+            password=None  # AcWing登录不需要密码
+        )
+        
+        AcWingUser.objects.create(
+            user=user,
+            openid=openid,
+            access_token=access_token,
+            refresh_token=refresh_token,
+            photo_url=photo_url
+        )
+    
+    # 生成JWT token
+    refresh = RefreshToken.for_user(user)
+    
+    return {
+        'access': str(refresh.access_token),
+        'refresh': str(refresh),
+        'user': {
+            'id': user.id,
+            'username': user.username,
+            'photo': photo_url
+        }
+    }
+
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def acwing_login(request):
     """AcWing OAuth2 一键登录"""
-    import traceback
-    
     code = request.data.get('code')
     
     if not code:
         return Response({'error': '缺少授权码'}, status=status.HTTP_400_BAD_REQUEST)
     
-    # AcWing 应用信息（从配置文件读取）
-    ACWING_APPID = getattr(settings, 'ACWING_APPID', '7626')
-    ACWING_SECRET = getattr(settings, 'ACWING_SECRET', '')
-    
     try:
         # 第二步：申请 access_token 和 openid
-        token_url = f"https://www.acwing.com/third_party/api/oauth2/access_token/?appid={ACWING_APPID}&secret={ACWING_SECRET}&code={code}"
-        token_response = requests.get(token_url, timeout=10)
-        token_data = token_response.json()
-        
-        if 'errcode' in token_data:
-            error_msg = f"Failed to get token: {token_data.get('errmsg', 'unknown error')}"
-            logger.error(f"[AcWing Login] {error_msg}")
-            return Response({
-                'error': error_msg
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        access_token = token_data['access_token']
-        openid = token_data['openid']
-        refresh_token = token_data.get('refresh_token', '')
+        token_response = requests.get(_acwing_token_url(code), timeout=10)
+        access_token, openid, refresh_token = _acwing_token(token_response.json())
         
         # 第三步：获取用户信息
-        userinfo_url = f"https://www.acwing.com/third_party/api/meta/identity/getinfo/?access_token={access_token}&openid={openid}"
-        userinfo_response = requests.get(userinfo_url, timeout=10)
-        userinfo_data = userinfo_response.json()
-        
-        if 'errcode' in userinfo_data:
-            return Response({
-                'error': f"获取用户信息失败: {userinfo_data.get('errmsg', 'unknown error')}"
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        username = userinfo_data['username']
-        photo_url = userinfo_data.get('photo', '')
+        userinfo_response = requests.get(_acwing_userinfo_url(access_token, openid), timeout=10)
+        username, photo_url = _acwing_userinfo(userinfo_response.json())
         
-        # 查找或创建用户
-        acwing_user = AcWingUser.objects.filter(openid=openid).first()
-        
-        if acwing_user:
-            # 已存在的用户，更新token
-            acwing_user.access_token = access_token
-            acwing_user.refresh_token = refresh_token
-            acwing_user.photo_url = photo_url
-            acwing_user.save()
-            user = acwing_user.user
-            # 更新用户名（如果AcWing上修改了）
-            if user.username != username:
-                # 检查新用户名是否已被其他用户占用
-                if not User.objects.filter(username=username).exclude(id=user.id).exists():
-                    user.username = username
-                    user.save()
-        else:
-            # 新用户，创建账号
-            # 检查用户名是否已存在，如果存在则添加后缀
-            base_username = username
-            counter = 1
-            while User.objects.filter(username=username).exists():
-                username = f"{base_username}_{counter}"
-                counter += 1
-            
-            user = User.objects.create_user(
-                username=username,
-                password=None  # AcWing登录不需要密码
-            )
-            
-            AcWingUser.objects.create(
-                user=user,
-                openid=openid,
-                access_token=access_token,
-                refresh_token=refresh_token,
-                photo_url=photo_url
-            )
-        
-        # 生成JWT token
-        refresh = RefreshToken.for_user(user)
-        
-        return Response({
-            'access': str(refresh.access_token),
-            'refresh': str(refresh),
-            'user': {
-                'id': user.id,
-                'username': user.username,
-                'photo': photo_url
-            }
-        }, status=status.HTTP_200_OK)
+        # 查找或创建用户，生成JWT token
+        data = acwing_login_user(openid, access_token, refresh_token, username, photo_url)
+        return Response(data, status=status.HTTP_200_OK)
         
+    except LoginError as e:
+        return Response({'error': str(e)}, status=e.status_code)
     except requests.RequestException as e:
         error_msg = f'Request AcWing API failed: {str(e)}'
         logger.error(f"[AcWing Login Error] {error_msg}")
@@ -137,217 +169,247 @@ def acwing_login(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-@api_view(['POST'])
-@permission_classes([AllowAny])
-def qq_login(request):
-    """QQ OAuth2 一键登录"""
-    code = request.data.get('code')
+@async_http.async_view(['POST'])
+async def acwing_login_async(request):
+    """acwing_login 的异步版本（POST /api/v1/async/auth/acwing/callback/，参数和返回相同）"""
+    code = async_http.request_data(request).get('code')
     
     if not code:
-        return Response({'error': '缺少授权码'}, status=status.HTTP_400_BAD_REQUEST)
-    
-    # QQ 应用信息（从配置文件读取）
-    QQ_APPID = getattr(settings, 'QQ_APPID', '')
-    QQ_APPKEY = getattr(settings, 'QQ_APPKEY', '')
-    QQ_REDIRECT_URI = 'https://app7626.acapp.acwing.com.cn/qq/callback'
+        return async_http.json_response({'error': '缺少授权码'}, status=status.HTTP_400_BAD_REQUEST)
     
+    client = async_http.get_client()
     try:
-        # 第一步：通过 code 获取 access_token（添加 unionid=1）
-        token_url = "https://graph.qq.com/oauth2.0/token"
-        token_params = {
-            'grant_type': 'authorization_code',
-            'client_id': QQ_APPID,
-            'client_secret': QQ_APPKEY,
-            'code': code,
-            'redirect_uri': QQ_REDIRECT_URI,
-            'unionid': 1  # ← 添加 UnionID 参数
-        }
-        token_response = requests.get(token_url, params=token_params, timeout=10)
+        token_response = await client.get(_acwing_token_url(code), timeout=10)
+        access_token, openid, refresh_token = _acwing_token(token_response.json())
         
-        # QQ 返回的是 URL 参数格式，需要解析
-        token_text = token_response.text
-        if 'access_token' not in token_text:
-            return Response({
-                'error': f'获取token失败: {token_text}'
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        # 解析 access_token
-        import urllib.parse
-        token_dict = urllib.parse.parse_qs(token_text)
-        access_token = token_dict['access_token'][0]
-        refresh_token = token_dict.get('refresh_token', [''])[0]
-        
-        # 第二步：获取 OpenID（添加 unionid=1）
-        openid_url = f"https://graph.qq.com/oauth2.0/me?access_token={access_token}&unionid=1"
-        openid_response = requests.get(openid_url, timeout=10)
-        openid_text = openid_response.text
-        
-        # 解析 OpenID（返回格式：callback( {"client_id":"YOUR_APPID","openid":"YOUR_OPENID"} );）
-        import json
-        import re
-        
-        # 解析 OpenID
-        match = re.search(r'callback\(\s*(\{.*?\})\s*\)', openid_text)
-        if not match:
-            try:
-                openid_data = json.loads(openid_text)
-            except json.JSONDecodeError:
-                return Response({
-                    'error': '获取OpenID失败'
-                }, status=status.HTTP_400_BAD_REQUEST)
-        else:
-            try:
-                openid_data = json.loads(match.group(1))
-            except json.JSONDecodeError:
-                return Response({
-                    'error': '获取OpenID失败'
-                }, status=status.HTTP_400_BAD_REQUEST)
+        userinfo_response = await client.get(_acwing_userinfo_url(access_token, openid), timeout=10)
+        username, photo_url = _acwing_userinfo(userinfo_response.json())
         
-        if 'openid' not in openid_data or not openid_data['openid']:
-            return Response({
-                'error': '获取OpenID失败'
-            }, status=status.HTTP_400_BAD_REQUEST)
+        data = await sync_to_async(acwing_login_user)(openid, access_token, refresh_token, username, photo_url)
+        return async_http.json_response(data, status=status.HTTP_200_OK)
         
-        openid = openid_data['openid']
-        unionid = openid_data.get('unionid', '')
-        
-        # 第三步：获取用户信息
-        userinfo_url = "https://graph.qq.com/user/get_user_info"
-        userinfo_params = {
-            'access_token': access_token,
-            'oauth_consumer_key': QQ_APPID,
-            'openid': openid
-        }
-        userinfo_response = requests.get(userinfo_url, params=userinfo_params, timeout=10)
-        userinfo_data = userinfo_response.json()
-        
-        if userinfo_data.get('ret') != 0:
-            return Response({
-                'error': f"获取用户信息失败: {userinfo_data.get('msg', 'unknown error')}"
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        nickname = userinfo_data.get('nickname', 'QQ用户')
-        photo_url = userinfo_data.get('figureurl_qq_2') or userinfo_data.get('figureurl_qq_1', '')
-        
-        # 尝试获取 QQ 邮箱（需要额外权限，可能失败）
-        qq_email = None
-        try:
-            email_url = "https://graph.qq.com/user/get_info"
-            email_params = {
-                'access_token': access_token,
-                'oauth_consumer_key': QQ_APPID,
-                'openid': openid,
-                'format': 'json'
-            }
-            email_response = requests.get(email_url, params=email_params, timeout=5)
-            email_data = email_response.json()
-            
-            if 'email' in email_data:
-                qq_email = email_data['email']
-            else:
-                email_suffix = openid[:10] if len(openid) >= 10 else openid[:8] if len(openid) >= 8 else openid
-                qq_email = f"{email_suffix}@qq.com"
-        except Exception:
-            email_suffix = openid[:10] if len(openid) >= 10 else openid[:8] if len(openid) >= 8 else openid
-            qq_email = f"{email_suffix}@qq.com"
-        
-        # 查找或创建用户（优先使用 UnionID）
-        qq_user = None
+    except LoginError as e:
+        return async_http.json_response({'error': str(e)}, status=e.status_code)
+    except httpx.HTTPError as e:
+        error_msg = f'Request AcWing API failed: {str(e)}'
+        logger.error(f"[AcWing Login Error] {error_msg}")
+        logger.error(traceback.format_exc())
+        return async_http.json_response({
+            'error': error_msg
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    except Exception as e:
+        error_msg = f'Login failed: {str(e)}'
+        logger.error(f"[AcWing Login Error] {error_msg}")
+        logger.error(traceback.format_exc())
+        return async_http.json_response({
+            'error': error_msg
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+# ---------- QQ 登录：解析上游响应、创建用户（同步、异步接口共用） ----------
+
+def _qq_token_params(code):
+    # QQ 应用信息（从配置文件读取）
+    return {
+        'grant_type': 'authorization_code',
+        'client_id': getattr(settings, 'QQ_APPID', ''),
+        'client_secret': getattr(settings, 'QQ_APPKEY', ''),
+        'code': code,
+        'redirect_uri': QQ_REDIRECT_URI,
+        'unionid': 1  # ← 添加 UnionID 参数
+    }
+
+
+def _qq_token(token_text):
+    """token 响应（URL 参数格式）-> (access_token, refresh_token)"""
+    if 'access_token' not in token_text:
+        raise LoginError(f'获取token失败: {token_text}')
+    
+    token_dict = urllib.parse.parse_qs(token_text)
+    return token_dict['access_token'][0], token_dict.get('refresh_token', [''])[0]
+
+
+def _qq_openid_url(access_token):
+    return f"https://graph.qq.com/oauth2.0/me?access_token={access_token}&unionid=1"
+
+
+def _qq_openid(openid_text):
+    """
+    OpenID 响应 -> (openid, unionid)
+    
+    返回格式：callback( {"client_id":"YOUR_APPID","openid":"YOUR_OPENID"} );
+    """
+    match = re.search(r'callback\(\s*(\{.*?\})\s*\)', openid_text)
+    try:
+        openid_data = json.loads(match.group(1) if match else openid_text)
+    except json.JSONDecodeError:
+        raise LoginError('获取OpenID失败')
+    
+    if 'openid' not in openid_data or not openid_data['openid']:
+        raise LoginError('获取OpenID失败')
+    
+    return openid_data['openid'], openid_data.get('unionid', '')
+
+
+def _qq_user_params(access_token, openid):
+    return {
+        'access_token': access_token,
+        'oauth_consumer_key': getattr(settings, 'QQ_APPID', ''),
+        'openid': openid
+    }
+
+
+def _qq_userinfo(userinfo_data):
+    """用户信息响应 -> (nickname, photo_url)"""
+    if userinfo_data.get('ret') != 0:
+        raise LoginError(f"获取用户信息失败: {userinfo_data.get('msg', 'unknown error')}")
+    
+    nickname = userinfo_data.get('nickname', 'QQ用户')
+    photo_url = userinfo_data.get('figureurl_qq_2') or userinfo_data.get('figureurl_qq_1', '')
+    return nickname, photo_url
+
+
+def _qq_email(openid, email_data=None):
+    """QQ 邮箱（需要额外权限，没有权限或请求失败时按 openid 生成）"""
+    if email_data is not None and 'email' in email_data:
+        return email_data['email']
+    email_suffix = openid[:10] if len(openid) >= 10 else openid[:8] if len(openid) >= 8 else openid
+    return f"{email_suffix}@qq.com"
+
+
+def qq_login_user(openid, unionid, access_token, refresh_token, nickname, photo_url, qq_email):
+    """查找或创建 QQ 用户（优先使用 UnionID）并签发 JWT，返回登录接口的响应数据"""
+    qq_user = None
+    
+    if unionid:
+        # 如果有 UnionID，优先通过 UnionID 查找（跨应用识别）
+        qq_user = QQUser.objects.filter(unionid=unionid).first()
         
-        if unionid:
-            # 如果有 UnionID，优先通过 UnionID 查找（跨应用识别）
-            qq_user = QQUser.objects.filter(unionid=unionid).first()
-            
-            if qq_user:
-                qq_user.openid = openid
-                qq_user.access_token = access_token
-                qq_user.refresh_token = refresh_token
-                qq_user.photo_url = photo_url
-                qq_user.nickname = nickname
-                qq_user.save()
-                user = qq_user.user
-            else:
-                qq_user = QQUser.objects.filter(openid=openid).first()
-                
-                if qq_user:
-                    qq_user.unionid = unionid
-                    qq_user.access_token = access_token
-                    qq_user.refresh_token = refresh_token
-                    qq_user.photo_url = photo_url
-                    qq_user.nickname = nickname
-                    qq_user.save()
-                    user = qq_user.user
+        if qq_user:
+            qq_user.openid = openid
+            qq_user.access_token = access_token
+            qq_user.refresh_token = refresh_token
+            qq_user.photo_url = photo_url
+            qq_user.nickname = nickname
+            qq_user.save()
+            user = qq_user.user
         else:
-            # 没有 unionid，回退到 openid 查找
             qq_user = QQUser.objects.filter(openid=openid).first()
             
             if qq_user:
-                # 已存在的用户，更新token和信息
+                qq_user.unionid = unionid
                 qq_user.access_token = access_token
                 qq_user.refresh_token = refresh_token
                 qq_user.photo_url = photo_url
                 qq_user.nickname = nickname
                 qq_user.save()
                 user = qq_user.user
+    else:
+        # 没有 unionid，回退到 openid 查找
+        qq_user = QQUser.objects.filter(openid=openid).first()
         
-        if not qq_user:
-            # 新用户，创建账号
-            safe_nickname = re.sub(r'[^\w\u4e00-\u9fff]', '_', nickname)[:30]
-            if not safe_nickname:
-                safe_nickname = f"QQ用户_{openid[:8]}"
-            
-            username = safe_nickname
-            base_username = username
-            counter = 1
-            while User.objects.filter(username=username).exists():
-                username = f"{base_username}_{counter}"
-                counter += 1
-                if counter > 1000:
-                    username = f"QQ用户_{openid[:8]}_{counter}"
-                    break
-            
+        if qq_user:
+            # 已存在的用户，更新token和信息
+            qq_user.access_token = access_token
+            qq_user.refresh_token = refresh_token
+            qq_user.photo_url = photo_url
+            qq_user.nickname = nickname
+            qq_user.save()
+            user = qq_user.user
+    
+    if not qq_user:
+        # 新用户，创建账号
+        safe_nickname = re.sub(r'[^\w\u4e00-\u9fff]', '_', nickname)[:30]
+        if not safe_nickname:
+            safe_nickname = f"QQ用户_{openid[:8]}"
+        
+        username = safe_nickname
+        base_username = username
+        counter = 1
+        while User.objects.filter(username=username).exists():
+            username = f"{base_username}_{counter}"
+            counter += 1
+            if counter > 1000:
+                username = f"QQ用户_{openid[:8]}_{counter}"
+                break
+        
+        try:
+            user = User.objects.create_user(
+                username=username,
+                email=qq_email,
+                password=None
+            )
             try:
-                user = User.objects.create_user(
-                    username=username,
-                    email=qq_email,
-                    password=None
+                QQUser.objects.create(
+                    user=user,
+                    openid=openid,
+                    unionid=unionid or None,
+                    access_token=access_token,
+                    refresh_token=refresh_token or '',
+                    photo_url=photo_url or '',
+                    nickname=nickname or username
                 )
-                try:
-                    QQUser.objects.create(
-                        user=user,
-                        openid=openid,
-                        unionid=unionid or None,
-                        access_token=access_token,
-                        refresh_token=refresh_token or '',
-                        photo_url=photo_url or '',
-                        nickname=nickname or username
-                    )
-                except Exception:
-                    user.delete()
-                    raise
             except Exception:
-                return Response({
-                    'error': '创建用户失败，请重试'
-                }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        else:
-            # 更新用户邮箱（如果为空）
-            if not user.email and qq_email:
-                user.email = qq_email
-                user.save()
+                user.delete()
+                raise
+        except Exception:
+            raise LoginError('创建用户失败，请重试', status.HTTP_500_INTERNAL_SERVER_ERROR)
+    else:
+        # 更新用户邮箱（如果为空）
+        if not user.email and qq_email:
+            user.email = qq_email
+            user.save()
+    
+    # 生成JWT token
+    refresh = RefreshToken.for_user(user)
+    
+    return {
+        'access': str(refresh.access_token),
+        'refresh': str(refresh),
+        'user': {
+            'id': user.id,
+            'username': user.username,
+            'photo': photo_url
+        }
+    }
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def qq_login(request):
+    """QQ OAuth2 一键登录"""
+    code = request.data.get('code')
+    
+    if not code:
+        return Response({'error': '缺少授权码'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        # 第一步：通过 code 获取 access_token（添加 unionid=1）
+        token_response = requests.get(QQ_TOKEN_URL, params=_qq_token_params(code), timeout=10)
+        access_token, refresh_token = _qq_token(token_response.text)
         
-        # 生成JWT token
-        refresh = RefreshToken.for_user(user)
+        # 第二步：获取 OpenID（添加 unionid=1）
+        openid_response = requests.get(_qq_openid_url(access_token), timeout=10)
+        openid, unionid = _qq_openid(openid_response.text)
         
-        return Response({
-            'access': str(refresh.access_token),
-            'refresh': str(refresh),
-            'user': {
-                'id': user.id,
-                'username': user.username,
-                'photo': photo_url
-            }
-        }, status=status.HTTP_200_OK)
+        # 第三步：获取用户信息
+        userinfo_response = requests.get(QQ_USERINFO_URL, params=_qq_user_params(access_token, openid), timeout=10)
+        nickname, photo_url = _qq_userinfo(userinfo_response.json())
         
+        # 尝试获取 QQ 邮箱（需要额外权限，可能失败）
+        try:
+            email_params = {**_qq_user_params(access_token, openid), 'format': 'json'}
+            email_response = requests.get(QQ_EMAIL_URL, params=email_params, timeout=5)
+            qq_email = _qq_email(openid, email_response.json())
+        except Exception:
+            qq_email = _qq_email(openid)
+        
+        # 查找或创建用户，生成JWT token
+        data = qq_login_user(openid, unionid, access_token, refresh_token, nickname, photo_url, qq_email)
+        return Response(data, status=status.HTTP_200_OK)
+        
+    except LoginError as e:
+        return Response({'error': str(e)}, status=e.status_code)
     except requests.RequestException as e:
         return Response({
             'error': 'QQ登录失败，请稍后重试'
@@ -358,6 +420,49 @@ def qq_login(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@async_http.async_view(['POST'])
+async def qq_login_async(request):
+    """qq_login 的异步版本（POST /api/v1/async/auth/qq/callback/，参数和返回相同）"""
+    code = async_http.request_data(request).get('code')
+    
+    if not code:
+        return async_http.json_response({'error': '缺少授权码'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    client = async_http.get_client()
+    try:
+        token_response = await client.get(QQ_TOKEN_URL, params=_qq_token_params(code), timeout=10)
+        access_token, refresh_token = _qq_token(token_response.text)
+        
+        openid_response = await client.get(_qq_openid_url(access_token), timeout=10)
+        openid, unionid = _qq_openid(openid_response.text)
+        
+        userinfo_response = await client.get(QQ_USERINFO_URL, params=_qq_user_params(access_token, openid), timeout=10)
+        nickname, photo_url = _qq_userinfo(userinfo_response.json())
+        
+        try:
+            email_params = {**_qq_user_params(access_token, openid), 'format': 'json'}
+            email_response = await client.get(QQ_EMAIL_URL, params=email_params, timeout=5)
+            qq_email = _qq_email(openid, email_response.json())
+        except Exception:
+            qq_email = _qq_email(openid)
+        
+        data = await sync_to_async(qq_login_user)(
+            openid, unionid, access_token, refresh_token, nickname, photo_url, qq_email
+        )
+        return async_http.json_response(data, status=status.HTTP_200_OK)
+        
+    except LoginError as e:
+        return async_http.json_response({'error': str(e)}, status=e.status_code)
+    except httpx.HTTPError:
+        return async_http.json_response({
+            'error': 'QQ登录失败，请稍后重试'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    except Exception:
+        return async_http.json_response({
+            'error': '登录失败，请稍后重试'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def get_acwing_login_url(request):
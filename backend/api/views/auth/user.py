@@ -6,10 +6,11 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django.contrib.auth import authenticate
+from django.conf import settings
 from django.utils import timezone
 from datetime import datetime, timedelta
 
-from ...models import Event, AcWingUser, QQUser
+from ...models import Event, AcWingUser, QQUser, ReminderPreference
 from ...serializers import UserSerializer
 
 
@@ -94,6 +95,45 @@ def update_profile(request):
     return Response(serializer.data)
 
 
+@api_view(['GET', 'PUT', 'PATCH'])
+@permission_classes([IsAuthenticated])
+def reminder_preference(request):
+    """
+    获取/更新提醒偏好
+    
+    digest_mode:
+        off    - 逐条提醒（默认）
+        hourly - 每小时汇总
+        daily  - 每日汇总
+    """
+    user = request.user
+    
+    if request.method == 'GET':
+        preference = ReminderPreference.objects.filter(user=user).first()
+        digest_mode = preference.digest_mode if preference else ReminderPreference.DIGEST_OFF
+    else:
+        digest_mode = request.data.get('digest_mode')
+        valid_modes = [mode for mode, _ in ReminderPreference.DIGEST_MODE_CHOICES]
+        if digest_mode not in valid_modes:
+            return Response({
+                'error': f'digest_mode 必须是 {", ".join(valid_modes)} 之一'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        preference, _ = ReminderPreference.objects.update_or_create(
+            user=user,
+            defaults={'digest_mode': digest_mode}
+        )
+    
+    return Response({
+        'digest_mode': digest_mode,
+        'digest_hour': settings.REMINDER_DIGEST_HOUR,
+        'choices': [
+            {'value': value, 'label': label}
+            for value, label in ReminderPreference.DIGEST_MODE_CHOICES
+        ],
+    })
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def change_password(request):
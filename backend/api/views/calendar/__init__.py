@@ -1,8 +1,9 @@
 """
 日历核心功能视图
-包括：日历管理、事件管理
+包括：日历管理、事件管理、个人日历订阅
 """
 
 from .calendars import *
 from .events import *
+from .feeds import *
 
@@ -1,12 +1,30 @@
 """
 Public Calendars API - 公开日历管理
 """
-from rest_framework import viewsets
+from datetime import datetime
+from django.utils import timezone
+from rest_framework import status, viewsets
 from rest_framework.decorators import action
+from rest_framework.negotiation import BaseContentNegotiation
 from rest_framework.response import Response
 
 from ...models import PublicCalendar, Event
 from ...serializers import PublicCalendarSerializer, EventSerializer
+from ...utils.conditional import event_validators, not_modified, set_validators
+from ...utils.ics import feed_cache_key, feed_response, iter_calendar
+from ...utils.recurrence import expand_events, parse_window, window_queryset
+
+
+class IgnoreClientContentNegotiation(BaseContentNegotiation):
+    """
+    订阅接口直接返回 text/calendar，不按 Accept 协商
+    （日历客户端常发送 Accept: text/calendar，否则会被 DRF 判为 406）
+    """
+    def select_parser(self, request, parsers):
+        return parsers[0]
+    
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return (renderers[0], renderers[0].media_type)
 
 
 class PublicCalendarViewSet(viewsets.ReadOnlyModelViewSet):
@@ -50,7 +68,7 @@ class PublicCalendarViewSet(viewsets.ReadOnlyModelViewSet):
                 'description': calendar.description,
                 'color': metadata['color'],
                 'icon': metadata['icon'],
-                'event_count': calendar.events.count(),
+                'event_count': calendar.event_count,
                 'is_public': calendar.is_public
             })
         
@@ -59,21 +77,65 @@ class PublicCalendarViewSet(viewsets.ReadOnlyModelViewSet):
             'calendars': calendars_data
         })
     
-    @action(detail=True, methods=['get'])
+    @action(detail=True, methods=['get'], content_negotiation_class=IgnoreClientContentNegotiation)
     def feed(self, request, url_slug=None):
-        """返回 iCalendar 格式的日历订阅"""
+        """
+        返回 iCalendar 格式的日历订阅（text/calendar）
+        
+        完整内容按日历缓存，命中时不查询事件；
+        日历增删事件、事件修改/删除时缓存自动失效（见 api/signals.py）
+        """
         calendar = self.get_object()
-        ics_content = self.generate_ics(calendar)
-        return Response(
-            {'ics': ics_content, 'events_count': calendar.events.count()},
-            content_type='application/json'
-        )
+        
+        def render():
+            events = calendar.events.all().order_by('start_time', 'id').iterator(chunk_size=500)
+            return iter_calendar(calendar.name, events, calendar.description)
+        
+        return feed_response(request, feed_cache_key(calendar.id), render, f'{calendar.url_slug}.ics')
     
     @action(detail=True, methods=['get'], url_path='events-json')
     def events_json(self, request, url_slug=None):
-        """返回 JSON 格式的日历事件列表（Android 订阅使用）"""
+        """
+        返回 JSON 格式的日历事件列表（Android 订阅使用）
+        
+        可选参数 start / end 指定时间窗口（重复事件在窗口内展开）；
+        不传时返回全部普通事件，重复事件展开今年和明年的发生
+        
+        数据未变时返回 304（If-None-Match / If-Modified-Since）
+        """
         calendar = self.get_object()
-        events = calendar.events.all().order_by('start_time')
+        
+        # 日历信息和默认窗口的年份也会影响响应内容，一并计入校验值；
+        # 移出、删除事件不会改变剩余事件的 updated_at，Last-Modified 还要取日历的变化时间
+        this_year = timezone.localtime().year
+        validators = event_validators(
+            request, calendar.events.all(), calendar.name, calendar.description, this_year,
+            changed_at=calendar.changed_at,
+        )
+        response = not_modified(request, validators)
+        if response is not None:
+            return response
+        
+        if request.query_params.get('start') or request.query_params.get('end'):
+            try:
+                window_start, window_end = parse_window(
+                    request.query_params.get('start'),
+                    request.query_params.get('end'),
+                )
+            except ValueError as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            events = expand_events(
+                window_queryset(calendar.events.all(), window_start, window_end),
+                window_start, window_end
+            )
+        else:
+            window_start = timezone.make_aware(datetime(this_year, 1, 1))
+            window_end = timezone.make_aware(datetime(this_year + 2, 1, 1))
+            single = list(calendar.events.filter(recurrence_rule=''))
+            recurring = expand_events(
+                calendar.events.exclude(recurrence_rule=''), window_start, window_end
+            )
+            events = sorted(single + recurring, key=lambda e: (e.start_time, e.id))
         
         # 序列化事件数据
         events_data = []
@@ -96,35 +158,10 @@ class PublicCalendarViewSet(viewsets.ReadOnlyModelViewSet):
                 'reminder_minutes': event.reminder_minutes,
             })
         
-        return Response({
+        response = Response({
             'calendar_name': calendar.name,
             'calendar_description': calendar.description,
             'events_count': len(events_data),
             'events': events_data
         })
-    
-    def generate_ics(self, calendar):
-        """生成 iCalendar 格式"""
-        events = calendar.events.all()
-        ics_lines = [
-            "BEGIN:VCALENDAR",
-            "VERSION:2.0",
-            f"PRODID:-//Ralendar//{calendar.name}//CN",
-            f"X-WR-CALNAME:{calendar.name}",
-        ]
-        
-        for event in events:
-            ics_lines.extend([
-                "BEGIN:VEVENT",
-                f"UID:event-{event.id}@kotlincalendar.com",
-                f"DTSTART:{event.start_time.strftime('%Y%m%dT%H%M%S')}",
-                f"DTEND:{event.end_time.strftime('%Y%m%dT%H%M%S')}",
-                f"SUMMARY:{event.title}",
-                f"DESCRIPTION:{event.description}",
-                f"LOCATION:{event.location}",
-                "END:VEVENT",
-            ])
-        
-        ics_lines.append("END:VCALENDAR")
-        return "\n".join(ics_lines)
-
+        return set_validators(response, validators)
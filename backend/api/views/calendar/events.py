@@ -1,26 +1,151 @@
 """
 Events API - 日程事件管理
 """
-from rest_framework import viewsets
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
 from django.contrib.auth.models import User
 
 from ...models import Event
-from ...serializers import EventSerializer
+from ...pagination import EventKeysetPagination
+from ...serializers import EventSerializer, EventCompactSerializer
+from ...utils.conditional import event_validators, not_modified, set_validators
+from ...utils.delta_sync import changes_since
+from ...utils.recurrence import expand_events, parse_window, window_queryset
+
+
+# 精简模式只需要读取的字段
+COMPACT_FIELDS = (
+    'id', 'title', 'start_time', 'end_time', 'location', 'source_app',
+    'recurrence_rule', 'recurrence_end',
+)
 
 
 class EventViewSet(viewsets.ModelViewSet):
-    """日程 CRUD API"""
+    """
+    日程 CRUD API
+    
+    列表支持时间窗口查询（月视图使用）：
+        GET /api/events/?start=2025-11-01&end=2025-12-01
+        GET /api/events/?start=2025-11-01&end=2025-12-01&compact=1
+    
+    - start / end: ISO 日期或日期时间，窗口为 [start, end)，最长 366 天
+    - 返回与窗口有交集的事件（包括窗口前开始、通过 end_time 跨入窗口的事件），
+      重复事件在窗口内展开为每一次发生
+    - compact=1: 只返回日历网格需要的字段
+    
+    列表类接口支持条件请求：带 If-None-Match / If-Modified-Since 且数据未变时返回 304
+    
+    列表支持游标分页（长历史用户、同步循环使用，每页开销固定）：
+        GET /api/events/?cursor=              第一页
+        GET /api/events/?cursor=<next_cursor> 下一页
+    """
     serializer_class = EventSerializer
     permission_classes = [AllowAny]  # 允许访问API，但只返回已登录用户的数据
     
     def get_queryset(self):
         """只返回当前用户的日程"""
         if self.request.user.is_authenticated:
-            return Event.objects.filter(user=self.request.user)
+            queryset = Event.objects.filter(user=self.request.user)
+            if not self.is_compact():
+                # username 等字段来自 user，列表查询时一并 JOIN
+                queryset = queryset.select_related('user')
+            return queryset
         # 未登录：返回空列表（保护隐私）
         return Event.objects.none()
     
+    def get_serializer_class(self):
+        if self.is_compact():
+            return EventCompactSerializer
+        return super().get_serializer_class()
+    
+    @property
+    def paginator(self):
+        """带 cursor 参数的普通列表使用游标分页，其余沿用默认的页码分页"""
+        if not hasattr(self, '_paginator'):
+            if (
+                self.action == 'list'
+                and not self.has_window()
+                and EventKeysetPagination.is_requested(self.request)
+            ):
+                self._paginator = EventKeysetPagination()
+            else:
+                self._paginator = super().paginator
+        return self._paginator
+    
+    def is_compact(self):
+        """是否请求精简模式（仅列表类接口生效）"""
+        return (
+            self.action in ('list', 'occurrences')
+            and self.request.query_params.get('compact') in ('1', 'true')
+        )
+    
+    def has_window(self):
+        params = self.request.query_params
+        return bool(params.get('start') or params.get('end'))
+    
+    def get_window_events(self):
+        """
+        按请求的时间窗口查询并展开事件
+        
+        Returns:
+            (window_start, window_end, 事件列表)
+        
+        Raises:
+            ValueError: 窗口参数无效
+        """
+        window_start, window_end = parse_window(
+            self.request.query_params.get('start'),
+            self.request.query_params.get('end'),
+        )
+        
+        queryset = self.get_queryset()
+        if self.is_compact():
+            queryset = queryset.only(*COMPACT_FIELDS)
+        
+        events = window_queryset(queryset, window_start, window_end)
+        return window_start, window_end, expand_events(events, window_start, window_end)
+    
+    def get_validators(self):
+        """当前用户事件列表的校验值（一条聚合查询）"""
+        if not self.request.user.is_authenticated:
+            return None
+        return event_validators(
+            self.request,
+            Event.objects.filter(user=self.request.user),
+            user=self.request.user,
+        )
+    
+    def list(self, request, *args, **kwargs):
+        """列表：数据未变时返回 304，否则按普通列表或时间窗口查询"""
+        validators = self.get_validators()
+        if validators:
+            response = not_modified(request, validators)
+            if response is not None:
+                return response
+        
+        response = self.list_events(request, *args, **kwargs)
+        return set_validators(response, validators) if validators else response
+    
+    def list_events(self, request, *args, **kwargs):
+        """列表：带 start/end 时按时间窗口查询"""
+        if not self.has_window():
+            return super().list(request, *args, **kwargs)
+        
+        try:
+            _, _, events = self.get_window_events()
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        page = self.paginate_queryset(events)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        
+        serializer = self.get_serializer(events, many=True)
+        return Response(serializer.data)
+    
     def perform_create(self, serializer):
         """创建日程时关联用户"""
         if self.request.user.is_authenticated:
@@ -30,4 +155,64 @@ class EventViewSet(viewsets.ModelViewSet):
             # 开发环境：使用默认用户或创建匿名用户
             default_user, _ = User.objects.get_or_create(username='anonymous')
             serializer.save(user=default_user)
-
+    
+    @action(detail=False, methods=['get'])
+    def occurrences(self, request):
+        """
+        获取时间窗口内的全部日程（不分页，重复事件按规则展开为每一次发生）
+        
+        **GET** `/api/events/occurrences/?start=2025-11-01&end=2025-12-01`
+        
+        - start / end: ISO 日期或日期时间，窗口为 [start, end)，最长 366 天
+        - 重复事件的每次发生 id 相同（指向主记录），start_time / end_time 为本次发生的时间
+        - compact=1: 只返回日历网格需要的字段
+        """
+        validators = self.get_validators()
+        if validators:
+            response = not_modified(request, validators)
+            if response is not None:
+                return response
+        
+        try:
+            window_start, window_end, occurrences = self.get_window_events()
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        data = self.get_serializer(occurrences, many=True).data
+        
+        response = Response({
+            'start': window_start.isoformat(),
+            'end': window_end.isoformat(),
+            'count': len(data),
+            'events': data,
+        })
+        return set_validators(response, validators) if validators else response
+    
+    @action(detail=False, methods=['get'])
+    def sync(self, request):
+        """
+        增量同步：只返回上次同步以来新建/修改/删除的日程
+        
+        **GET** `/api/events/sync/?token=<sync_token>`
+        
+        - 首次同步不传 token，返回全部日程和 sync_token
+        - 之后带上次的 sync_token，只返回变更：events（新建/修改）和 deleted（已删除的 ID）
+        - has_more 为 true 时用新的 sync_token 立即继续请求
+        - reset 为 true 表示本次是全量数据（令牌过期等），客户端应先清空本地数据
+        - 重复事件返回主记录（含 recurrence_rule），由客户端展开
+        """
+        if not request.user.is_authenticated:
+            return Response({'error': '请先登录'}, status=status.HTTP_401_UNAUTHORIZED)
+        
+        try:
+            changes = changes_since(request.user, request.query_params.get('token'))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            'sync_token': changes['sync_token'],
+            'has_more': changes['has_more'],
+            'reset': changes['reset'],
+            'events': EventSerializer(changes['events'], many=True).data,
+            'deleted': changes['deleted'],
+        })
@@ -0,0 +1,63 @@
+"""
+Private Calendar Feeds API - 个人日历订阅
+"""
+from django.conf import settings
+from django.http import Http404
+from django.urls import reverse
+from django.views.decorators.http import require_safe
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from ...utils.ics import feed_response
+from ...utils.user_feed import (
+    feed_window,
+    get_feed_token,
+    iter_user_calendar,
+    resolve_feed_token,
+    rotate_feed_token,
+    user_feed_cache_key,
+)
+
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+def calendar_feed_token(request):
+    """
+    获取/重置个人日历订阅地址
+    
+    GET  - 返回当前订阅地址（首次调用时生成）
+    POST - 重置订阅地址，旧地址立即失效（地址泄露时使用）
+    """
+    if request.method == 'POST':
+        token = rotate_feed_token(request.user)
+    else:
+        token = get_feed_token(request.user)
+    
+    url = request.build_absolute_uri(reverse('user_calendar_feed', args=[token]))
+    return Response({
+        'url': url,
+        'webcal_url': 'webcal://' + url.split('://', 1)[1],
+        'past_days': settings.USER_FEED_PAST_DAYS,
+        'future_days': settings.USER_FEED_FUTURE_DAYS,
+    })
+
+
+@require_safe
+def user_calendar_feed(request, token):
+    """
+    个人日历订阅（text/calendar，供外部日历应用轮询）
+    
+    不需要登录，凭地址中的签名令牌访问；令牌无效或已重置时返回 404
+    """
+    user = resolve_feed_token(token)
+    if user is None:
+        raise Http404('订阅地址无效或已失效')
+    
+    window_start, window_end = feed_window()
+    return feed_response(
+        request,
+        user_feed_cache_key(user, window_start),
+        lambda: iter_user_calendar(user, window_start, window_end),
+        'ralendar.ics',
+    )
@@ -7,72 +7,16 @@ from datetime import datetime, date
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
-from django.core.cache import cache
 import logging
 
-logger = logging.getLogger(__name__)
-
-
-# 节假日数据文件路径（从views/external/向上两级到api/，再进入data/）
-HOLIDAYS_DATA_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'data')
+from ...utils import day_info, festivals, holiday_index
 
-
-def load_holidays_data(year):
-    """加载节假日数据"""
-    cache_key = f'holidays_{year}'
-    holidays = cache.get(cache_key)
-    
-    if holidays is None:
-        file_path = os.path.join(HOLIDAYS_DATA_DIR, f'holidays_{year}.json')
-        
-        if os.path.exists(file_path):
-            with open(file_path, 'r', encoding='utf-8') as f:
-                holidays = json.load(f)
-            # 缓存 24 小时
-            cache.set(cache_key, holidays, 86400)
-        else:
-            holidays = {}
-    
-    return holidays
+logger = logging.getLogger(__name__)
 
 
 def get_holiday_info(target_date):
-    """获取指定日期的节假日信息"""
-    year = target_date.year
-    holidays_data = load_holidays_data(year)
-    
-    if str(year) not in holidays_data:
-        return None
-    
-    year_data = holidays_data[str(year)]
-    date_str = target_date.strftime('%Y-%m-%d')
-    
-    # 检查是否是节假日
-    holiday_info = {
-        'is_holiday': False,
-        'is_workday': False,
-        'holiday_name': None,
-        'holiday_type': None
-    }
-    
-    # 检查主要节假日
-    for holiday_name, holiday_date in year_data.items():
-        if holiday_date == date_str:
-            holiday_info['is_holiday'] = True
-            holiday_info['holiday_name'] = holiday_name
-            holiday_info['holiday_type'] = 'major'
-            return holiday_info
-    
-    # 检查节假日假期
-    for holiday_name, holiday_dates in year_data.items():
-        if isinstance(holiday_dates, list) and date_str in holiday_dates:
-            holiday_info['is_holiday'] = True
-            # 提取节假日名称（去掉"假期"）
-            holiday_info['holiday_name'] = holiday_name.replace('假期', '')
-            holiday_info['holiday_type'] = 'vacation'
-            return holiday_info
-    
-    return holiday_info
+    """获取指定日期的节假日信息（该年没有数据时返回 None）"""
+    return holiday_index.get_holiday_info(target_date)
 
 
 @api_view(['GET'])
@@ -83,37 +27,16 @@ def get_holidays(request):
     
     try:
         year = int(year)
-        holidays_data = load_holidays_data(year)
+        index = holiday_index.get_index(year)
         
-        if str(year) not in holidays_data:
+        if index is None:
             return Response({
                 'year': year,
                 'holidays': [],
                 'message': f'{year}年节假日数据未找到'
             })
         
-        year_data = holidays_data[str(year)]
-        holidays_list = []
-        
-        # 整理节假日数据
-        for holiday_name, holiday_date in year_data.items():
-            if isinstance(holiday_date, str):
-                # 单个日期
-                holidays_list.append({
-                    'name': holiday_name,
-                    'date': holiday_date,
-                    'type': 'major'
-                })
-            elif isinstance(holiday_date, list):
-                # 假期日期范围
-                holidays_list.append({
-                    'name': holiday_name,
-                    'dates': holiday_date,
-                    'start_date': holiday_date[0],
-                    'end_date': holiday_date[-1],
-                    'type': 'vacation',
-                    'days': len(holiday_date)
-                })
+        holidays_list = index.holidays
         
         return Response({
             'year': year,
@@ -143,100 +66,11 @@ def check_holiday(request):
     # 获取法定节假日信息
     holiday_info = get_holiday_info(target_date)
     
-    # 检查国际节日和传统节日
-    month_day = target_date.strftime('%m-%d')
-    
-    # 国际节日字典（带Emoji）
-    international_festivals_dict = {
-        '01-01': {'name': '元旦', 'emoji': '🎊'},
-        '02-14': {'name': '情人节', 'emoji': '💕'},
-        '03-08': {'name': '国际妇女节', 'emoji': '👩'},
-        '03-12': {'name': '植树节', 'emoji': '🌳'},
-        '04-01': {'name': '愚人节', 'emoji': '🤡'},
-        '05-01': {'name': '国际劳动节', 'emoji': '💪'},
-        '05-04': {'name': '青年节', 'emoji': '🎓'},
-        '06-01': {'name': '国际儿童节', 'emoji': '🧒'},
-        '07-01': {'name': '建党节', 'emoji': '🎉'},
-        '08-01': {'name': '建军节', 'emoji': '🎖️'},
-        '09-10': {'name': '教师节', 'emoji': '📚'},
-        '10-01': {'name': '国庆节', 'emoji': '🇨🇳'},
-        '10-31': {'name': '万圣节', 'emoji': '🎃'},
-        '11-11': {'name': '光棍节 / 双11购物节', 'emoji': '1️⃣'},
-        '12-24': {'name': '平安夜', 'emoji': '🎄'},
-        '12-25': {'name': '圣诞节', 'emoji': '🎅'}
-    }
-    
-    # 传统节日（农历，2025年对应的公历日期）
-    traditional_festivals_dict = {
-        '01-28': {'name': '除夕', 'emoji': '🏮'},
-        '01-29': {'name': '春节', 'emoji': '🧨'},
-        '02-12': {'name': '元宵节', 'emoji': '🏮'},
-        '05-31': {'name': '端午节', 'emoji': '🐉'},
-        '10-06': {'name': '中秋节', 'emoji': '🥮'},
-        '10-29': {'name': '重阳节', 'emoji': '🍵'}
-    }
-    
-    # 合并所有节日到一个列表（前端期望的格式）
-    festivals_list = []
-    
-    # 如果是法定节假日，也要添加到festivals列表（带emoji）
-    if holiday_info and holiday_info['is_holiday']:
-        # 为法定节假日匹配emoji
-        holiday_emoji = '🎉'
-        for key, festival in international_festivals_dict.items():
-            if festival['name'] in holiday_info['holiday_name']:
-                holiday_emoji = festival['emoji']
-                break
-        
-        festivals_list.append({
-            'name': holiday_info['holiday_name'],
-            'emoji': holiday_emoji,
-            'type': 'legal'
-        })
-    
-    # 添加国际节日（避免与已添加的法定节假日重复）
-    if month_day in international_festivals_dict:
-        festival = international_festivals_dict[month_day]
-        # 检查是否已经作为法定节假日添加过
-        if not any(f['name'] == festival['name'] for f in festivals_list):
-            festivals_list.append({
-                'name': festival['name'],
-                'emoji': festival['emoji'],
-                'type': 'international'
-            })
-    
-    # 添加传统节日（避免重复）
-    if month_day in traditional_festivals_dict:
-        festival = traditional_festivals_dict[month_day]
-        # 检查是否已经添加过
-        if not any(f['name'] == festival['name'] for f in festivals_list):
-            festivals_list.append({
-                'name': festival['name'],
-                'emoji': festival['emoji'],
-                'type': 'traditional'
-            })
+    # 法定节假日、国际节日、传统节日
+    festivals_list = day_info.festivals_for(target_date, holiday_info)
     
     # 获取农历信息
-    lunar_str = None
-    try:
-        from lunarcalendar import Converter, Solar
-        solar = Solar(target_date.year, target_date.month, target_date.day)
-        lunar = Converter.Solar2Lunar(solar)
-        
-        # 月份中文
-        month_cn = ['正', '二', '三', '四', '五', '六', '七', '八', '九', '十', '十一', '十二']
-        lunar_month = f"{month_cn[lunar.month - 1]}月"
-        
-        # 日期中文
-        day_cn = ['初一', '初二', '初三', '初四', '初五', '初六', '初七', '初八', '初九', '初十',
-                  '十一', '十二', '十三', '十四', '十五', '十六', '十七', '十八', '十九', '二十',
-                  '廿一', '廿二', '廿三', '廿四', '廿五', '廿六', '廿七', '廿八', '廿九', '三十']
-        lunar_day = day_cn[lunar.day - 1]
-        
-        lunar_str = f"{lunar_month}{lunar_day}"
-    except Exception as e:
-        logger.warning(f"获取农历失败: {e}")
-        lunar_str = "加载中..."
+    lunar_str = day_info.lunar_label(target_date) or "加载中..."
     
     # 将 festivals_list 按类型分组，以匹配前端期望的数据结构
     traditional_festivals = [f for f in festivals_list if f.get('type') == 'traditional']
@@ -260,6 +94,41 @@ def check_holiday(request):
     return Response(result)
 
 
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def get_holiday_range(request):
+    """
+    批量获取一段日期的节假日、节日、农历和调休信息（月视图/年视图一次请求）
+    
+    GET /api/holidays/range/?start=2025-09-29&end=2025-11-09
+    
+    响应（列式，第 i 个元素对应 dates[i]）:
+    {
+        "start": "2025-09-29",
+        "end": "2025-11-09",
+        "dates": ["2025-09-29", ...],
+        "lunar": ["八月初八", ...],
+        "is_holiday": [false, ...],
+        "is_workday": [false, ...],
+        "holiday_name": [null, ...],
+        "festivals": [[], [0], ...],
+        "festival_table": [{"name": "国庆节", "emoji": "🇨🇳", "type": "legal"}, ...]
+    }
+    """
+    try:
+        start = datetime.strptime(request.GET.get('start', ''), '%Y-%m-%d').date()
+        end = datetime.strptime(request.GET.get('end', ''), '%Y-%m-%d').date()
+    except ValueError:
+        return Response({'error': '请提供 start 和 end 参数，格式为 YYYY-MM-DD'}, status=400)
+    
+    try:
+        result = day_info.get_range(start, end)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=400)
+    
+    return Response(result)
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def get_today_holidays(request):
@@ -307,18 +176,9 @@ def get_today_holidays(request):
             'type': 'international'
         })
     
-    # 添加传统节日（农历节日，2025年对应的公历日期）
-    traditional_festivals = {
-        '01-28': {'name': '除夕', 'emoji': '🏮'},
-        '01-29': {'name': '春节', 'emoji': '🧨'},
-        '02-12': {'name': '元宵节', 'emoji': '🏮'},
-        '05-31': {'name': '端午节', 'emoji': '🐉'},
-        '10-06': {'name': '中秋节', 'emoji': '🥮'},
-        '10-29': {'name': '重阳节', 'emoji': '🍵'}
-    }
-    
-    if month_day in traditional_festivals:
-        festival = traditional_festivals[month_day]
+    # 添加传统节日（按农历换算）
+    festival = festivals.festival_on(today)
+    if festival:
         result['traditional_festivals'].append({
             'name': festival['name'],
             'emoji': festival['emoji'],
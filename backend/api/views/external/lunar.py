@@ -1,14 +1,38 @@
 """
 Lunar Calendar API - 农历转换
 """
+import calendar
+from datetime import date
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
-from lunarcalendar import Converter, Solar
+from api.utils import lunar_table
+
+
+def lunar_payload(date_str, info):
+    """单日农历信息的响应格式（单日查询和批量查询共用）"""
+    return {
+        'lunar_date': f"农历{info['lunar_year']}年{info['lunar_month']}{info['lunar_day']}",
+        'year': info['lunar_year'],
+        'month': info['lunar_month'],
+        'day': info['lunar_day'],
+        'zodiac': info['zodiac'],
+        'ganzhi': {
+            'year': info['ganzhi_year'],
+            'month': info['ganzhi_month'],
+            'day': info['ganzhi_day'],
+        },
+        'solar_term': info['solar_term'],
+        'solar_date': date_str
+    }
 
 
 @api_view(['GET'])
 def get_lunar_date(request):
-    """农历转换 API"""
+    """
+    农历转换 API
+    
+    数据来自预生成的农历表（generate_lunar_calendar），范围外的日期现场换算
+    """
     date_str = request.GET.get('date')  # 格式：2025-11-05
     
     if not date_str:
@@ -17,35 +41,52 @@ def get_lunar_date(request):
     try:
         # 解析日期
         year, month, day = map(int, date_str.split('-'))
-        
-        # 转换为农历
-        solar = Solar(year, month, day)
-        lunar = Converter.Solar2Lunar(solar)
-        
-        # 生肖对照表
-        zodiac_list = ['鼠', '牛', '虎', '兔', '龙', '蛇', '马', '羊', '猴', '鸡', '狗', '猪']
-        zodiac = zodiac_list[(lunar.year - 4) % 12]
-        
-        # 月份中文
-        month_cn = ['正', '二', '三', '四', '五', '六', '七', '八', '九', '十', '十一', '十二']
-        lunar_month = f"{month_cn[lunar.month - 1]}月"
-        
-        # 日期中文
-        day_cn = ['初一', '初二', '初三', '初四', '初五', '初六', '初七', '初八', '初九', '初十',
-                  '十一', '十二', '十三', '十四', '十五', '十六', '十七', '十八', '十九', '二十',
-                  '廿一', '廿二', '廿三', '廿四', '廿五', '廿六', '廿七', '廿八', '廿九', '三十']
-        lunar_day = day_cn[lunar.day - 1]
-        
-        return Response({
-            'lunar_date': f"农历{lunar.year}年{lunar_month}{lunar_day}",
-            'year': lunar.year,
-            'month': lunar_month,
-            'day': lunar_day,
-            'zodiac': zodiac,
-            'solar_date': date_str
-        })
+        info = lunar_table.get_day(date(year, month, day))
+        return Response(lunar_payload(date_str, info))
     except ValueError as e:
         return Response({'error': f'日期格式错误: {str(e)}'}, status=400)
     except Exception as e:
         return Response({'error': f'转换失败: {str(e)}'}, status=500)
 
+
+@api_view(['GET'])
+def get_lunar_range(request):
+    """
+    批量农历转换 API：一次返回整月或整年的农历信息
+    
+    参数:
+        year: 公历年份（必填）
+        month: 公历月份（可选，不传时返回整年）
+    
+    返回:
+        {
+            "year": 2025,
+            "month": 10,          # 整年时为 null
+            "days": [{与 /lunar/ 单日查询相同的字段}, ...]
+        }
+    """
+    try:
+        year = int(request.GET['year'])
+        month = int(request.GET['month']) if request.GET.get('month') else None
+        if month is None:
+            start, end = date(year, 1, 1), date(year, 12, 31)
+        else:
+            start = date(year, month, 1)
+            end = date(year, month, calendar.monthrange(year, month)[1])
+    except KeyError:
+        return Response({'error': '请提供 year 参数'}, status=400)
+    except ValueError as e:
+        return Response({'error': f'参数错误: {str(e)}'}, status=400)
+    
+    try:
+        days = [lunar_payload(day.isoformat(), info) for day, info in lunar_table.get_days(start, end)]
+    except ValueError as e:
+        return Response({'error': f'超出支持的日期范围: {str(e)}'}, status=400)
+    except Exception as e:
+        return Response({'error': f'转换失败: {str(e)}'}, status=500)
+    
+    return Response({
+        'year': year,
+        'month': month,
+        'days': days
+    })
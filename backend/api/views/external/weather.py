@@ -5,22 +5,55 @@
 """
 
 import logging
+import httpx
 import requests
 from django.conf import settings
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework import status
+from api.utils import async_http, weather_client
 
 logger = logging.getLogger(__name__)
 
 
+def weather_payload(live, location):
+    """把高德实况数据转换为接口返回的天气数据"""
+    # 计算体感温度（简易公式）
+    try:
+        temp = float(live.get('temperature', 0))
+        humidity = float(live.get('humidity', 50))
+        # 简易体感温度公式：体感 = 实际温度 - (风速影响) + (湿度影响)
+        # 高湿度会让体感更热/更冷
+        humidity_effect = (humidity - 50) * 0.05  # 湿度偏离50%的影响
+        feels_like = temp + humidity_effect
+        feels_like_str = f"{int(round(feels_like))}"
+    except (ValueError, TypeError):
+        feels_like_str = live.get('temperature', '--')  # 降级使用实际温度
+    
+    weather_data = {
+        'location': live.get('city', location),  # 城市名称
+        'temperature': live.get('temperature', '--'),  # 温度
+        'weather': live.get('weather', '未知'),  # 天气状况
+        'windDir': live.get('winddirection', '--'),  # 风向
+        'windScale': live.get('windpower', '--'),  # 风力等级
+        'humidity': live.get('humidity', '--'),  # 相对湿度
+        'feelsLike': feels_like_str,  # 计算的体感温度
+        'updateTime': live.get('reporttime', '')  # 更新时间
+    }
+    
+    logger.info(f'天气数据: {location} {weather_data["temperature"]}℃ {weather_data["weather"]}')
+    return weather_data
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def get_weather(request):
     """
     获取指定城市的实时天气（使用高德地图API）
     
+    同一城市的数据缓存 WEATHER_CACHE_SECONDS 秒，稍旧的数据先返回再后台刷新
+    
     参数：
     - location: 城市名称（必填）
               例如：北京、上海、广州
@@ -57,70 +90,25 @@ def get_weather(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
     try:
-        # 调用高德地图API - 实时天气
-        url = 'https://restapi.amap.com/v3/weather/weatherInfo'
-        params = {
-            'city': location,  # 城市名称或adcode
-            'key': api_key,  # API Key
-            'extensions': 'base'  # 返回实况天气
-        }
-        
-        logger.info(f'请求高德地图天气API: location={location}')
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        
-        data = response.json()
-        logger.info(f'高德地图API响应: status={data.get("status")}, info={data.get("info")}')
-        
-        # 检查API返回状态
-        if data.get('status') != '1':
-            error_msg = data.get('info', '未知错误')
-            logger.error(f'高德地图API错误: {error_msg}')
-            return Response({
-                'success': False,
-                'error': f'天气查询失败: {error_msg}'
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        # 检查是否有数据
-        lives = data.get('lives', [])
-        if not lives:
+        # 高德地图实时天气（带缓存，见 api/utils/weather_client.py）
+        try:
+            live = weather_client.get_live(location)
+        except weather_client.CityNotFound:
             logger.error(f'未找到城市天气数据: {location}')
             return Response({
                 'success': False,
                 'error': f'未找到城市: {location}'
             }, status=status.HTTP_404_NOT_FOUND)
-        
-        # 提取天气数据（取第一个结果）
-        live = lives[0]
-        
-        # 计算体感温度（简易公式）
-        try:
-            temp = float(live.get('temperature', 0))
-            humidity = float(live.get('humidity', 50))
-            # 简易体感温度公式：体感 = 实际温度 - (风速影响) + (湿度影响)
-            # 高湿度会让体感更热/更冷
-            humidity_effect = (humidity - 50) * 0.05  # 湿度偏离50%的影响
-            feels_like = temp + humidity_effect
-            feels_like_str = f"{int(round(feels_like))}"
-        except (ValueError, TypeError):
-            feels_like_str = live.get('temperature', '--')  # 降级使用实际温度
-        
-        weather_data = {
-            'location': live.get('city', location),  # 城市名称
-            'temperature': live.get('temperature', '--'),  # 温度
-            'weather': live.get('weather', '未知'),  # 天气状况
-            'windDir': live.get('winddirection', '--'),  # 风向
-            'windScale': live.get('windpower', '--'),  # 风力等级
-            'humidity': live.get('humidity', '--'),  # 相对湿度
-            'feelsLike': feels_like_str,  # 计算的体感温度
-            'updateTime': live.get('reporttime', '')  # 更新时间
-        }
-        
-        logger.info(f'天气数据: {location} {weather_data["temperature"]}℃ {weather_data["weather"]}')
+        except weather_client.WeatherError as e:
+            logger.error(f'高德地图API错误: {str(e)}')
+            return Response({
+                'success': False,
+                'error': f'天气查询失败: {str(e)}'
+            }, status=status.HTTP_400_BAD_REQUEST)
         
         return Response({
             'success': True,
-            'data': weather_data
+            'data': weather_payload(live, location)
         })
         
     except requests.exceptions.Timeout:
@@ -145,6 +133,71 @@ def get_weather(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@async_http.async_view(['GET'])
+async def get_weather_async(request):
+    """
+    get_weather 的异步版本（GET /api/v1/async/weather/，参数和返回相同）
+    
+    等待高德接口时不占用工作线程，需要用 ASGI 服务器部署
+    """
+    location = request.GET.get('location', '').strip()
+    
+    if not location:
+        return async_http.json_response({
+            'success': False,
+            'error': '请提供城市名称'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    if not getattr(settings, 'AMAP_API_KEY', ''):
+        logger.error('高德地图API Key未配置')
+        return async_http.json_response({
+            'success': False,
+            'error': '天气服务未配置'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    try:
+        try:
+            live = await weather_client.aget_live(location)
+        except weather_client.CityNotFound:
+            logger.error(f'未找到城市天气数据: {location}')
+            return async_http.json_response({
+                'success': False,
+                'error': f'未找到城市: {location}'
+            }, status=status.HTTP_404_NOT_FOUND)
+        except weather_client.WeatherError as e:
+            logger.error(f'高德地图API错误: {str(e)}')
+            return async_http.json_response({
+                'success': False,
+                'error': f'天气查询失败: {str(e)}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        return async_http.json_response({
+            'success': True,
+            'data': weather_payload(live, location)
+        })
+        
+    except httpx.TimeoutException:
+        logger.error('高德地图API请求超时')
+        return async_http.json_response({
+            'success': False,
+            'error': '天气服务请求超时，请稍后重试'
+        }, status=status.HTTP_504_GATEWAY_TIMEOUT)
+        
+    except httpx.HTTPError as e:
+        logger.error(f'高德地图API请求失败: {str(e)}')
+        return async_http.json_response({
+            'success': False,
+            'error': '无法连接到天气服务'
+        }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        
+    except Exception as e:
+        logger.error(f'获取天气数据异常: {str(e)}', exc_info=True)
+        return async_http.json_response({
+            'success': False,
+            'error': '获取天气数据失败'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def search_location(request):
@@ -13,11 +13,36 @@ from rest_framework_simplejwt.tokens import AccessToken
 from rest_framework_simplejwt.exceptions import TokenError
 
 from ...models import Event, QQUser, AcWingUser
+from ...pagination import EventKeysetPagination
 from ...serializers import EventSerializer
+from ...utils.conditional import event_validators, not_modified, set_validators
 
 # 初始化 logger
 logger = logging.getLogger('django')
 
+
+def paginate_events(request, events, descending=True):
+    """
+    按需对事件列表做游标分页（请求带 cursor 参数时生效）
+    
+    Args:
+        request: 当前请求
+        events: 事件 QuerySet
+        descending: 默认是否倒序（与各接口原有排序保持一致，可用 order=asc/desc 覆盖）
+    
+    Returns:
+        dict: 分页信息 + 本页事件 {'next', 'next_cursor', 'has_more', 'events'}；
+              未请求游标分页时返回 None
+    """
+    if not EventKeysetPagination.is_requested(request):
+        return None
+    
+    paginator = EventKeysetPagination(descending=descending)
+    page = paginator.paginate_queryset(events, request)
+    data = paginator.get_paginated_data(EventSerializer(page, many=True).data)
+    data['events'] = data.pop('results')
+    return data
+
 @api_view(['POST'])
 @authentication_classes([])  # 禁用全局认证，完全手动处理
 @permission_classes([AllowAny])  # 允许任何人访问
@@ -188,11 +213,7 @@ def batch_create_events(request):
                 event = serializer.save(user=ralendar_user)  # ← 关键！传递 user 对象
                 logger.info(f"[Fusion API] ✅ 创建成功: {event.title} (ID: {event.id})")
                 created_events.append(event)
-                
-                # 如果需要邮件提醒，标记（实际发送需要异步任务）
-                if event_data.get('email_reminder'):
-                    # TODO: 添加到邮件提醒任务队列
-                    pass
+                # 邮件提醒无需额外入队：保存时已计算 remind_at，由定时任务按时发送
             else:
                 errors.append({
                     'index': idx,
@@ -239,6 +260,9 @@ def get_user_events(request):
     ### 可选参数
     - unionid: QQ UnionID（推荐）
     - openid: QQ OpenID（备选）
+    - cursor: 游标分页（第一页传空值，之后传上一页返回的 next_cursor）
+    - page_size: 游标分页每页数量（默认 100，最大 500）
+    - order: asc / desc（游标分页排序，默认 desc）
     
     ### 响应示例
     ```json
@@ -305,16 +329,35 @@ def get_user_events(request):
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    # 3. 获取用户的所有事件
+    # 3. 获取用户的事件
     events = Event.objects.filter(user=ralendar_user).order_by('-start_time')
+    
+    # 条件请求：数据未变时直接返回 304（同步轮询不再重复下载）
+    validators = event_validators(request, events, ralendar_user.username, user=ralendar_user)
+    response = not_modified(request, validators)
+    if response is not None:
+        return response
+    
+    # 游标分页：按 (start_time, id) 逐页读取，每页开销固定
+    page = paginate_events(request, events)
+    if page is not None:
+        response = Response({
+            'user_id': ralendar_user.id,
+            'username': ralendar_user.username,
+            'events_count': len(page['events']),
+            **page,
+        })
+        return set_validators(response, validators)
+    
     serializer = EventSerializer(events, many=True)
     
-    return Response({
+    response = Response({
         'user_id': ralendar_user.id,
         'username': ralendar_user.username,
         'events_count': events.count(),
         'events': serializer.data
     })
+    return set_validators(response, validators)
 
 
 @api_view(['GET', 'PUT', 'DELETE'])  # One function handles all methods!
@@ -531,6 +574,7 @@ def get_events_with_location(request):
     
     ### 查询参数
     - `map_provider`: 可选，筛选地图服务商 (baidu/amap/tencent)
+    - `cursor`: 可选，游标分页（第一页传空值）
     
     ### 响应示例
     ```json
@@ -551,6 +595,11 @@ def get_events_with_location(request):
     if map_provider:
         events = events.filter(map_provider=map_provider)
     
+    # 可选：游标分页
+    page = paginate_events(request, events)
+    if page is not None:
+        return Response({'count': len(page['events']), **page})
+    
     serializer = EventSerializer(events, many=True)
     
     return Response({
@@ -567,6 +616,9 @@ def get_roamio_events(request):
     
     **GET** `/api/events/from-roamio/`
     
+    ### 查询参数
+    - `cursor`: 可选，游标分页（第一页传空值）
+    
     ### 响应示例
     ```json
     {
@@ -580,6 +632,11 @@ def get_roamio_events(request):
         source_app='roamio'
     ).order_by('-start_time')
     
+    # 可选：游标分页
+    page = paginate_events(request, events)
+    if page is not None:
+        return Response({'count': len(page['events']), **page})
+    
     serializer = EventSerializer(events, many=True)
     
     return Response({
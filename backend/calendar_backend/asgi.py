@@ -3,6 +3,10 @@ ASGI config for calendar_backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+/api/v1/async/ 下的异步接口（天气、运势、AI解析、第三方登录）需要用 ASGI 服务器运行才能
+在等待上游时不占用工作线程：start_asgi.sh 启动 uvicorn（127.0.0.1:8001），
+nginx 把 /api/v1/async/ 转发过去，其余请求仍由 uwsgi 处理
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
 """
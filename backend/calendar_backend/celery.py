@@ -25,11 +25,36 @@ app.conf.beat_schedule = {
         'task': 'api.tasks.check_and_send_reminders',
         'schedule': crontab(minute='*/1'),  # 每分钟执行一次
     },
+    # 每小时整点发送汇总提醒（每日汇总在 REMINDER_DIGEST_HOUR 点发送）
+    'send-reminder-digests': {
+        'task': 'api.tasks.send_reminder_digests',
+        'schedule': crontab(minute=0),  # 每小时 xx:00
+    },
+    # 每天凌晨4点清理过期的事件删除记录（增量同步墓碑）
+    'purge-event-tombstones': {
+        'task': 'api.tasks.purge_event_tombstones',
+        'schedule': crontab(hour=4, minute=0),  # 每天 04:00
+    },
     # 每月1号凌晨3点同步节假日数据
     'sync-holiday-data': {
         'task': 'api.tasks.sync_holiday_data',
         'schedule': crontab(hour=3, minute=0, day_of_month=1),  # 每月1号 03:00
     },
+    # 每月1号凌晨3点半生成农历数据表
+    'generate-lunar-calendar': {
+        'task': 'api.tasks.generate_lunar_calendar',
+        'schedule': crontab(hour=3, minute=30, day_of_month=1),  # 每月1号 03:30
+    },
+    # 每天凌晨预生成今天和未来几天的运势
+    'precompute-daily-fortunes': {
+        'task': 'api.tasks.precompute_daily_fortunes',
+        'schedule': crontab(hour=0, minute=5),  # 每天 00:05
+    },
+    # 每天早上7点半推送每日运势
+    'send-daily-fortunes': {
+        'task': 'api.tasks.send_daily_fortunes',
+        'schedule': crontab(hour=7, minute=30),  # 每天 07:30
+    },
 }
 
 # 时区配置
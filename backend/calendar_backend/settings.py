@@ -222,6 +222,18 @@ CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'Asia/Shanghai'
 CELERY_ENABLE_UTC = False
 
+# ==================== 缓存配置 ====================
+# uwsgi 的多个进程、Celery worker 和管理命令共用同一个缓存：
+# 订阅缓存版本号、节假日索引、天气后台刷新标记都要在进程之间可见
+CACHE_URL = os.environ.get('CACHE_URL', 'redis://localhost:6379/1')  # Redis 缓存地址（与 Celery 分开用 1 号库）
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': CACHE_URL,
+        'KEY_PREFIX': 'ralendar',
+    }
+}
+
 # ==================== Email 配置 ====================
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = os.environ.get('EMAIL_HOST', 'smtp.gmail.com')
@@ -235,6 +247,30 @@ DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', f'Ralendar <{EMAIL_HOS
 
 # 提醒设置
 REMINDER_ADVANCE_MINUTES = int(os.environ.get('REMINDER_ADVANCE_MINUTES', 15))  # 提前 15 分钟提醒
+REMINDER_BATCH_SIZE = int(os.environ.get('REMINDER_BATCH_SIZE', 50))  # 每批提醒邮件数（共用一个 SMTP 连接）
+REMINDER_DIGEST_HOUR = int(os.environ.get('REMINDER_DIGEST_HOUR', 7))  # 每日汇总提醒的发送时间（本地时间，点）
+
+# 日历订阅设置
+ICS_FEED_CACHE_SECONDS = int(os.environ.get('ICS_FEED_CACHE_SECONDS', 86400))  # 订阅内容缓存时间（数据变化时自动换用新的缓存键）
+USER_FEED_PAST_DAYS = int(os.environ.get('USER_FEED_PAST_DAYS', 30))  # 个人订阅包含过去多少天的事件
+USER_FEED_FUTURE_DAYS = int(os.environ.get('USER_FEED_FUTURE_DAYS', 365))  # 个人订阅包含未来多少天的事件
+
+# 增量同步设置
+EVENT_TOMBSTONE_RETENTION_DAYS = int(os.environ.get('EVENT_TOMBSTONE_RETENTION_DAYS', 30))  # 删除记录保留天数（超过后客户端需全量同步）
+
+# ==================== 节假日同步配置 ====================
+HOLIDAY_API_BASE = os.environ.get('HOLIDAY_API_BASE', 'http://timor.tech/api/holiday')  # Timor 节假日 API 地址
+HOLIDAY_SYNC_WORKERS = int(os.environ.get('HOLIDAY_SYNC_WORKERS', 4))  # 并发下载的年份数
+HOLIDAY_SYNC_RETRIES = int(os.environ.get('HOLIDAY_SYNC_RETRIES', 3))  # 连接失败 / 5xx 的重试次数
+
+# ==================== 农历数据表配置 ====================
+LUNAR_CALENDAR_YEARS_BEHIND = int(os.environ.get('LUNAR_CALENDAR_YEARS_BEHIND', 1))  # 生成到今年之前多少年
+LUNAR_CALENDAR_YEARS_AHEAD = int(os.environ.get('LUNAR_CALENDAR_YEARS_AHEAD', 2))  # 生成到今年之后多少年
+
+# ==================== 运势预生成配置 ====================
+FORTUNE_PRECOMPUTE_DAYS = int(os.environ.get('FORTUNE_PRECOMPUTE_DAYS', 7))  # 预生成今天之后多少天的运势
+FORTUNE_NOTIFY_BATCH_SIZE = int(os.environ.get('FORTUNE_NOTIFY_BATCH_SIZE', 100))  # 每日运势推送每批用户数（共用一个 SMTP 连接）
+FORTUNE_NOTIFY_TIMEOUT_MINUTES = int(os.environ.get('FORTUNE_NOTIFY_TIMEOUT_MINUTES', 120))  # 推送停在“推送中”超过此时间记为失败，允许重新推送
 
 # ==================== 百度地图配置 ====================
 BAIDU_MAP_AK = os.environ.get('BAIDU_MAP_AK', '')  # 百度地图 API Key
@@ -246,3 +282,12 @@ QWEN_API_KEY = os.environ.get('QWEN_API_KEY', '')  # 通义千问 API Key
 QWEATHER_API_KEY = os.environ.get('QWEATHER_API_KEY', '')  # 和风天气 API Key (已弃用)
 OPENWEATHER_API_KEY = os.environ.get('OPENWEATHER_API_KEY', '')  # OpenWeatherMap API Key (已弃用)
 AMAP_API_KEY = os.environ.get('AMAP_API_KEY', '')  # 高德地图 API Key (当前使用)
+WEATHER_TIMEOUT = int(os.environ.get('WEATHER_TIMEOUT', 5))  # 请求高德天气的超时时间（秒）
+WEATHER_CACHE_SECONDS = int(os.environ.get('WEATHER_CACHE_SECONDS', 600))  # 实况天气缓存时间，期间不请求上游
+WEATHER_STALE_SECONDS = int(os.environ.get('WEATHER_STALE_SECONDS', 3600))  # 超过缓存时间但在此之内：先返回旧数据，后台刷新
+WEATHER_FALLBACK_SECONDS = int(os.environ.get('WEATHER_FALLBACK_SECONDS', 86400))  # 上游出错时可以使用的旧数据最长保留时间
+
+# ==================== 异步 HTTP 客户端配置 ====================
+# /api/v1/async/ 下的异步接口（ASGI 部署）共用的 httpx 连接池
+ASYNC_HTTP_MAX_CONNECTIONS = int(os.environ.get('ASYNC_HTTP_MAX_CONNECTIONS', 100))  # 每个进程同时打开的上游连接上限
+ASYNC_HTTP_MAX_KEEPALIVE = int(os.environ.get('ASYNC_HTTP_MAX_KEEPALIVE', 20))  # 保持复用的空闲连接数
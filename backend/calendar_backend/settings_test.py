@@ -0,0 +1,31 @@
+"""
+测试配置
+
+使用方法:
+    python manage.py test api --settings=calendar_backend.settings_test
+
+- api 的历史迁移不能从空库完整执行（0002 与 0005 重复创建 AcWingUser），测试库按当前模型直接建表
+- 缓存、邮件使用进程内后端，不依赖 Redis / SMTP
+"""
+from .settings import *  # noqa: F401,F403
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    }
+}
+
+MIGRATION_MODULES = {'api': None}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+
+CELERY_TASK_ALWAYS_EAGER = True
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
@@ -0,0 +1,37 @@
+#!/bin/bash
+# 后台启动 ASGI 服务（uvicorn），处理 /api/v1/async/ 下的异步接口
+# 其余接口仍由 uwsgi 处理；nginx 把 /api/v1/async/ 转发到 127.0.0.1:8001
+
+echo "=========================================="
+echo "🚀 启动 ASGI 服务"
+echo "=========================================="
+
+# 创建日志目录
+mkdir -p logs
+
+# 停止已有的 uvicorn 进程
+echo "🛑 停止现有的 uvicorn 进程..."
+pkill -f "uvicorn calendar_backend.asgi"
+sleep 2
+
+# 启动 uvicorn（进程数与 uwsgi 的 processes 一致，每个进程一个事件循环和一个上游连接池）
+echo "📦 启动 uvicorn..."
+nohup uvicorn calendar_backend.asgi:application \
+    --host 127.0.0.1 --port 8001 \
+    --workers 2 \
+    --proxy-headers --forwarded-allow-ips 127.0.0.1 \
+    > logs/uvicorn.log 2>&1 &
+ASGI_PID=$!
+echo "✅ uvicorn 已启动 (PID: $ASGI_PID)"
+
+echo ""
+echo "=========================================="
+echo "✅ ASGI 服务启动完成！"
+echo "=========================================="
+echo ""
+echo "📊 查看日志："
+echo "  tail -f logs/uvicorn.log"
+echo ""
+echo "🛑 停止服务："
+echo "  pkill -f 'uvicorn calendar_backend.asgi'"
+echo ""